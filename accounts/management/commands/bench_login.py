@@ -0,0 +1,51 @@
+import time
+
+from django.contrib.auth import authenticate
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.tokens import make_login_token, check_login_token
+from exam.models import ParticipantProfile
+
+
+class Command(BaseCommand):
+    help = 'Bandingkan jumlah login per detik: password (PBKDF2) vs token sekali pakai'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='Username peserta (default: peserta pertama)')
+        parser.add_argument('--password', help='Password peserta (default: raw_password di profil)')
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        profiles = ParticipantProfile.objects.select_related('user')
+        if options['username']:
+            profiles = profiles.filter(user__username=options['username'])
+        profile = profiles.first()
+        if profile is None:
+            raise CommandError('Peserta tidak ditemukan.')
+
+        user = profile.user
+        password = options['password'] or profile.raw_password
+        if authenticate(username=user.username, password=password) is None:
+            raise CommandError('Password peserta tidak cocok.')
+
+        iterations = options['iterations']
+
+        # Kedua jalur sama-sama menulis session saat login(), jadi yang diukur
+        # hanya tahap verifikasi kredensial
+        start = time.perf_counter()
+        for _ in range(iterations):
+            authenticate(username=user.username, password=password)
+        password_elapsed = time.perf_counter() - start
+
+        token = make_login_token(user)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            check_login_token(token)
+        token_elapsed = time.perf_counter() - start
+
+        self.stdout.write(f'Iterasi        : {iterations}')
+        self.stdout.write(f'Password login : {iterations / password_elapsed:10.1f} login/detik '
+                          f'({password_elapsed / iterations * 1000:.2f} ms/login)')
+        self.stdout.write(f'Token login    : {iterations / token_elapsed:10.1f} login/detik '
+                          f'({token_elapsed / iterations * 1000:.2f} ms/login)')
+        self.stdout.write(self.style.SUCCESS(f'Token {password_elapsed / token_elapsed:.1f}x lebih cepat'))
@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from importlib import import_module
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+
+from exam.models import AnswerJournal, ParticipantTryout, Question
+from exam.seed import seed
+
+PREFIX = 'benchsesi'
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+class Command(BaseCommand):
+    help = 'Simulasi trafik ujian untuk membandingkan I/O django_session per backend session'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200, help='Request per thread')
+        parser.add_argument('--write-every', type=int, default=5,
+                            help='Setiap N request session ikut diubah (mis. messages)')
+        parser.add_argument('--answer-threads', type=int, default=None,
+                            help='Thread yang menyimpan jawaban bersamaan (default: sama dengan --threads, 0 = mati)')
+
+    def handle(self, *args, **options):
+        if options['answer_threads'] is None:
+            options['answer_threads'] = options['threads']
+        # Jawaban ditulis ke attempt sintetis supaya lock session vs jawaban ikut terukur
+        data = seed(participants=max(options['answer_threads'], 1), tryouts=1, questions=20,
+                    answer_ratio=0, prefix=PREFIX)
+        tryout = data['tryouts'][0]
+        attempts = list(ParticipantTryout.objects.filter(tryout=tryout).values_list('id', flat=True))
+        question_ids = list(Question.objects.filter(tryout=tryout).values_list('id', flat=True))
+        try:
+            self.stdout.write(
+                f'{"backend":<16}{"req/detik":>12}{"query session":>16}{"locked":>10}{"maks ms":>10}'
+                f'{"jawaban":>10}{"locked jwb":>12}{"maks ms jwb":>13}'
+            )
+            for name, engine in ENGINES.items():
+                result = self.run_engine(engine, options, attempts, question_ids)
+                self.stdout.write(
+                    f'{name:<16}{result["rate"]:>12.1f}{result["queries"]:>16}'
+                    f'{result["locked"]:>10}{result["max_ms"]:>10.1f}'
+                    f'{result["answers"]:>10}{result["answer_locked"]:>12}{result["answer_max_ms"]:>13.1f}'
+                )
+        finally:
+            # Peserta dihapus beserta attempt & jurnal jawabannya
+            User.objects.filter(username__startswith=f'{PREFIX}_').delete()
+            tryout.delete()
+
+    def run_engine(self, engine, options, attempts, question_ids):
+        SessionStore = import_module(engine).SessionStore
+        stats = {'queries': 0, 'locked': 0, 'max_ms': 0.0, 'answers': 0, 'answer_locked': 0, 'answer_max_ms': 0.0}
+        lock = threading.Lock()
+        done = threading.Event()
+        created_keys = []
+
+        def answer_writer(attempt_id):
+            # Peserta lain yang sedang mengerjakan: simpan jawaban terus selama simulasi session berjalan
+            rng = random.Random(attempt_id)
+            written = locked = 0
+            max_ms = 0.0
+            try:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    try:
+                        AnswerJournal.objects.create(participant_tryout_id=attempt_id,
+                                                     question_id=rng.choice(question_ids),
+                                                     selected_option=rng.choice('ABCD'))
+                        written += 1
+                    except OperationalError:
+                        locked += 1
+                    max_ms = max(max_ms, (time.perf_counter() - started) * 1000)
+            finally:
+                with lock:
+                    stats['answers'] += written
+                    stats['answer_locked'] += locked
+                    stats['answer_max_ms'] = max(stats['answer_max_ms'], max_ms)
+                connection.close()
+
+        def worker():
+            # Setiap thread = satu peserta dengan session sendiri
+            session = SessionStore()
+            session['_auth_user_id'] = '0'
+            session.save()
+            key = session.session_key
+            queries = locked = 0
+            max_ms = 0.0
+            try:
+                for i in range(options['requests']):
+                    started = time.perf_counter()
+                    with CaptureQueriesContext(connection) as ctx:
+                        try:
+                            s = SessionStore(session_key=key)
+                            s.get('_auth_user_id')
+                            if i % options['write_every'] == 0:
+                                s['last_request'] = i
+                                s.save()
+                                key = s.session_key
+                        except OperationalError:
+                            locked += 1
+                    max_ms = max(max_ms, (time.perf_counter() - started) * 1000)
+                    queries += sum(1 for q in ctx.captured_queries if 'django_session' in q['sql'])
+            finally:
+                with lock:
+                    stats['queries'] += queries
+                    stats['locked'] += locked
+                    stats['max_ms'] = max(stats['max_ms'], max_ms)
+                    created_keys.append(key)
+                connection.close()
+
+        writers = [threading.Thread(target=answer_writer, args=(attempt_id,))
+                   for attempt_id in attempts[:options['answer_threads']]]
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        for t in writers:
+            t.start()
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for t in writers:
+            t.join()
+
+        # Bersihkan session hasil simulasi
+        for key in created_keys:
+            if key:
+                SessionStore(session_key=key).delete()
+
+        stats['rate'] = options['threads'] * options['requests'] / elapsed
+        return stats
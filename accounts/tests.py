@@ -1,3 +1,95 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from exam import bulk
+from exam.models import ParticipantProfile
+from .tokens import make_login_token
+
+
+class TokenLoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('kartu', password='x')
+        self.profile = ParticipantProfile.objects.create(user=self.user, full_name='Peserta Kartu', school='SMA')
+        self.url = reverse('accounts:token_login', args=[make_login_token(self.user)])
+
+    def logged_in(self):
+        return self.client.session.get('_auth_user_id') == str(self.user.pk)
+
+    def test_get_confirms_and_post_logs_in(self):
+        # Prefetch / scanner link: GET tidak boleh login maupun menghanguskan token
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Peserta Kartu')
+        self.assertFalse(self.logged_in())
+        self.client.get(self.url)
+
+        self.assertRedirects(self.client.post(self.url), reverse('exam:tryout_list'), fetch_redirect_response=False)
+        self.assertTrue(self.logged_in())
+
+    def test_token_is_single_use(self):
+        self.client.post(self.url)
+        self.client.logout()
+        self.assertRedirects(self.client.post(self.url), reverse('accounts:login'), fetch_redirect_response=False)
+        self.assertFalse(self.logged_in())
+
+    @override_settings(LOGIN_TOKEN_MAX_AGE=-1)
+    def test_expired_token_is_rejected(self):
+        self.assertRedirects(self.client.get(self.url), reverse('accounts:login'), fetch_redirect_response=False)
+        self.client.post(self.url)
+        self.assertFalse(self.logged_in())
+
+    def test_blocked_participant_is_refused(self):
+        self.profile.blocked = True
+        self.profile.save()
+        self.assertRedirects(self.client.post(self.url), '/?blocked=true', fetch_redirect_response=False)
+        self.assertFalse(self.logged_in())
+
+
+class SessionProfileMixin:
+    """Logout and the forced logout of BlockedUserMiddleware under each SESSION_PROFILE engine"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('sesi', password='x')
+        self.profile = ParticipantProfile.objects.create(user=self.user, full_name='Peserta Sesi', school='SMA')
+        self.home = reverse('exam:tryout_list')
+        self.client.force_login(self.user)
+        self.cookie = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def replay_cookie(self):
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = self.cookie
+
+    def test_logout_ends_session(self):
+        self.assertEqual(self.client.get(self.home).status_code, 200)
+        self.assertRedirects(self.client.get(reverse('accounts:logout')), reverse('accounts:login'),
+                             fetch_redirect_response=False)
+        self.assertNotIn('_auth_user_id', self.client.session)
+        self.assertRedirects(self.client.get(self.home), f'/?next={self.home}', fetch_redirect_response=False)
+
+    def test_blocked_participant_is_logged_out(self):
+        self.assertEqual(self.client.get(self.home).status_code, 200)
+        bulk.run('block', [self.profile.pk])
+        self.assertRedirects(self.client.get(self.home), '/?blocked=true', fetch_redirect_response=False)
+        self.assertNotIn('_auth_user_id', self.client.session)
+        # Cookie lama yang dipakai ulang tidak boleh membuka halaman ujian lagi
+        self.replay_cookie()
+        self.assertEqual(self.client.get(self.home).status_code, 302)
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', SHARED_CACHE=True)
+class CachedDbSessionTests(SessionProfileMixin, TestCase):
+    def test_logout_revokes_old_cookie(self):
+        self.client.get(reverse('accounts:logout'))
+        self.replay_cookie()
+        self.assertRedirects(self.client.get(self.home), f'/?next={self.home}', fetch_redirect_response=False)
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+class SignedCookieSessionTests(SessionProfileMixin, TestCase):
+    def test_no_session_rows(self):
+        self.client.get(self.home)
+        self.assertFalse(Session.objects.exists())
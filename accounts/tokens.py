@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+
+LOGIN_TOKEN_SALT = 'accounts.login-token'
+
+
+def _last_login_stamp(user):
+    # last_login berubah setiap kali login() dipanggil, jadi token otomatis
+    # hangus setelah dipakai (atau setelah peserta login dengan password)
+    if user.last_login is None:
+        return ''
+    return user.last_login.isoformat()
+
+
+def make_login_token(user):
+    """Create a signed, single-use, time-boxed login token for a user"""
+    payload = {'u': user.pk, 'l': _last_login_stamp(user)}
+    return signing.dumps(payload, salt=LOGIN_TOKEN_SALT, compress=True)
+
+
+def check_login_token(token):
+    """Return the user for a valid token, or None. No password hashing involved."""
+    try:
+        payload = signing.loads(
+            token,
+            salt=LOGIN_TOKEN_SALT,
+            max_age=settings.LOGIN_TOKEN_MAX_AGE,
+        )
+    except signing.BadSignature:
+        return None
+
+    try:
+        user = User.objects.select_related('participantprofile').get(pk=payload.get('u'), is_active=True)
+    except User.DoesNotExist:
+        return None
+
+    if _last_login_stamp(user) != payload.get('l'):
+        return None
+    return user
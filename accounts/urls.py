@@ -5,5 +5,6 @@ app_name = 'accounts'
 
 urlpatterns = [
     path('', views.participant_login, name='login'),
+    path('login/<str:token>/', views.token_login, name='token_login'),
     path('logout/', views.participant_logout, name='logout'),
 ]
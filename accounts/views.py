@@ -3,6 +3,8 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_protect
 
+from .tokens import check_login_token
+
 @csrf_protect
 def participant_login(request):
     if request.user.is_authenticated:
@@ -32,6 +34,26 @@ def participant_login(request):
     blocked = request.GET.get('blocked')
     return render(request, 'accounts/login.html', {'blocked': blocked})
 
+@csrf_protect
+def token_login(request, token):
+    """Login via the one-time token printed on the participant card, confirmed with a POST"""
+    user = check_login_token(token)
+
+    if user is None or not hasattr(user, 'participantprofile'):
+        messages.error(request, 'Link login tidak valid atau sudah kedaluwarsa.')
+        return redirect('accounts:login')
+
+    if user.participantprofile.blocked:
+        return redirect('/?blocked=true')
+
+    # GET hanya menampilkan konfirmasi: login mengubah last_login dan menghanguskan token
+    if request.method != 'POST':
+        return render(request, 'accounts/token_login.html', {'participant': user.participantprofile})
+
+    # Token sudah diverifikasi lewat signature, tidak perlu authenticate()
+    login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+    return redirect('exam:tryout_list')
+
 def participant_logout(request):
     logout(request)
     return redirect('accounts:login')
@@ -1,5 +1,6 @@
 from django import forms
-from exam.models import ParticipantProfile
+from exam.bulk import ACTIONS
+from exam.models import ParticipantProfile, Tryout
 from django.contrib.auth.models import User
 
 class ParticipantExcelUploadForm(forms.Form):
@@ -14,3 +15,47 @@ class ParticipantManualForm(forms.ModelForm):
     class Meta:
         model = ParticipantProfile
         fields = ['full_name', 'school', 'day']
+
+
+class ProfilingForm(forms.Form):
+    rate = forms.FloatField(
+        min_value=0, max_value=100, initial=1, label='Sampel (%)',
+        help_text='Persentase request yang diprofil',
+    )
+    url_names = forms.CharField(
+        required=False, label='URL name',
+        help_text='Selalu profil URL ini, pisahkan dengan koma (mis. exam:save_answer, dashboard:index)',
+    )
+    minutes = forms.IntegerField(min_value=1, max_value=240, initial=15, label='Durasi (menit)')
+
+    def clean_url_names(self):
+        return [name.strip() for name in self.cleaned_data['url_names'].split(',') if name.strip()]
+
+
+
+class ParticipantCardSheetForm(forms.Form):
+    day = forms.TypedChoiceField(
+        choices=[('', 'Semua hari')] + list(ParticipantProfile._meta.get_field('day').choices),
+        coerce=int, empty_value=None, required=False,
+    )
+    school = forms.CharField(required=False)
+
+
+class ParticipantBulkForm(forms.Form):
+    action = forms.ChoiceField(choices=ACTIONS, label='Aksi')
+    day = forms.TypedChoiceField(
+        choices=[('', 'Semua hari')] + list(ParticipantProfile._meta.get_field('day').choices),
+        coerce=int, empty_value=None, required=False, label='Hari',
+    )
+    school = forms.CharField(required=False, label='Sekolah')
+    tryout = forms.ModelChoiceField(
+        Tryout.objects.all(), required=False, label='Try out', empty_label='Semua try out',
+        help_text='Hanya peserta yang punya attempt di try out ini; reset hanya menghapus attempt try out ini',
+    )
+    confirm_count = forms.IntegerField(required=False, widget=forms.HiddenInput)
+
+    def clean(self):
+        cleaned = super().clean()
+        if not (cleaned.get('day') or cleaned.get('school') or cleaned.get('tryout')):
+            raise forms.ValidationError('Pilih minimal satu filter: hari, sekolah atau try out.')
+        return cleaned
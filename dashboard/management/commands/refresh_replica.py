@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from exam.snapshots import online_backup
+
+
+class Command(BaseCommand):
+    help = 'Salin database primary ke file replica dengan SQLite online backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File replica (default: DATABASES[READ_REPLICA_ALIAS])')
+        parser.add_argument('--pages', type=int, default=256, help='Halaman per langkah backup')
+        parser.add_argument('--sleep', type=float, default=0.005, help='Jeda antar langkah (detik)')
+        parser.add_argument('--interval', type=int, default=0, help='Ulangi setiap N detik (0 = sekali)')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if not output:
+            alias = settings.READ_REPLICA_ALIAS
+            if not alias:
+                raise CommandError('Replica belum dikonfigurasi (DB_REPLICA_PATH) dan --output tidak diisi.')
+            output = str(settings.DATABASES[alias]['NAME'])
+
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('refresh_replica hanya untuk SQLite.')
+
+        while True:
+            elapsed = self.refresh(primary, output, options['pages'], options['sleep'])
+            self.stdout.write(f'Replica {output} diperbarui dalam {elapsed:.2f} detik')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def refresh(self, primary, output, pages, sleep):
+        started = time.perf_counter()
+        if primary.in_atomic_block:
+            # Backup dari koneksi yang sedang menulis tidak pernah selesai (source terkunci)
+            raise CommandError('refresh_replica tidak bisa dijalankan di dalam transaksi.')
+        primary.ensure_connection()
+        tmp_path = f'{output}.tmp'
+        # Backup bertahap: penulis jawaban hanya tertahan sebentar per langkah
+        online_backup(primary.connection, tmp_path, pages=pages, sleep=sleep)
+        # Ganti file secara atomik; koneksi replica baru (per request) membaca file baru
+        os.replace(tmp_path, output)
+        return time.perf_counter() - started
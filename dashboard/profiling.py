@@ -0,0 +1,209 @@
+"""
+Opt-in sampling profiler for live requests.
+
+Staff switch profiling on from the dashboard for a sampled fraction of
+requests and/or specific URL names, for a limited time. A profiled request
+runs its view while a background thread samples the request thread's call
+stack every PROFILING_INTERVAL_MS; the folded stacks are stored in
+RequestProfile and shown as a flame graph and a sorted function table.
+
+When profiling is off the middleware costs one dict lookup per request: the
+switch is read from the cache at most every PROFILING_CONFIG_POLL_SECONDS.
+The switch only reaches every worker through a shared cache, so without
+SHARED_CACHE (per-process LocMem: only the worker that handled the form would
+profile) enable() refuses and profiling stays off.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.urls import Resolver404, resolve
+
+CONFIG_KEY = 'profiling:config'
+
+_local_config = {'value': None, 'read_at': 0.0}
+
+
+def available():
+    return settings.SHARED_CACHE
+
+
+def enable(rate=0.0, url_names=(), minutes=15):
+    """Switch profiling on for every worker; None (nothing enabled) without SHARED_CACHE"""
+    if not available():
+        return None
+    config = {
+        'rate': rate,
+        'url_names': sorted(set(url_names)),
+        'until': time.time() + minutes * 60,
+    }
+    cache.set(CONFIG_KEY, config, timeout=minutes * 60)
+    _local_config['read_at'] = 0.0
+    return config
+
+
+def disable():
+    cache.delete(CONFIG_KEY)
+    _local_config['read_at'] = 0.0
+
+
+def current_config():
+    """Active profiling config or None, re-read from the cache every few seconds"""
+    if not available():
+        return None
+    now = time.time()
+    if now - _local_config['read_at'] > settings.PROFILING_CONFIG_POLL_SECONDS:
+        _local_config['value'] = cache.get(CONFIG_KEY)
+        _local_config['read_at'] = now
+    config = _local_config['value']
+    if config is None or config['until'] < now:
+        return None
+    return config
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in (str(settings.BASE_DIR), sys.prefix):
+        if filename.startswith(prefix):
+            filename = os.path.relpath(filename, prefix)
+            break
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Collect folded call stacks ('root;...;leaf' -> samples) of one thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+
+
+def function_table(stacks, limit=50):
+    """Per-function self/total sample counts, most expensive first"""
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        # Rekursi: fungsi yang sama hanya dihitung sekali per stack
+        for label in set(frames):
+            total[label] += count
+    rows = [
+        {'function': label, 'total': count, 'self': own.get(label, 0)}
+        for label, count in total.items()
+    ]
+    rows.sort(key=lambda row: (row['self'], row['total']), reverse=True)
+    return rows[:limit]
+
+
+def flame_graph(stacks, max_depth=60):
+    """Flat list of boxes {depth, left, width (percent), label, samples} for an icicle graph"""
+    total = sum(stacks.values())
+    if not total:
+        return []
+
+    tree = {}
+    for stack, count in stacks.items():
+        node = tree
+        for label in stack.split(';')[:max_depth]:
+            entry = node.setdefault(label, [0, {}])
+            entry[0] += count
+            node = entry[1]
+
+    boxes = []
+
+    def walk(node, depth, left):
+        for label, (count, children) in sorted(node.items()):
+            width = count * 100.0 / total
+            boxes.append({'depth': depth, 'left': left, 'width': width, 'label': label, 'samples': count})
+            walk(children, depth + 1, left)
+            left += width
+
+    walk(tree, 0, 0.0)
+    return boxes
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _sampled_url_name(self, request, config):
+        """URL name of the request when it should be profiled, else None"""
+        try:
+            url_name = resolve(request.path_info, getattr(request, 'urlconf', None)).view_name
+        except Resolver404:
+            return None
+        if url_name in config['url_names'] or random.random() < config['rate']:
+            return url_name
+        return None
+
+    def __call__(self, request):
+        # Keputusan diambil sekali di sini, sehingga sampler yang dimulai selalu dihentikan
+        config = current_config()
+        url_name = self._sampled_url_name(request, config) if config is not None else None
+        if url_name is None:
+            return self.get_response(request)
+
+        queries = {'count': 0}
+
+        def count_queries(execute, sql, params, many, context):
+            queries['count'] += 1
+            return execute(sql, params, many, context)
+
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            with connection.execute_wrapper(count_queries):
+                response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+
+        self.save(request, response, url_name, time.perf_counter() - started, queries['count'], stacks)
+        return response
+
+    def save(self, request, response, url_name, duration, query_count, stacks):
+        from .models import RequestProfile
+
+        user = getattr(request, 'user', None)
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:500],
+            url_name=url_name,
+            user=user if user is not None and user.is_authenticated else None,
+            status_code=response.status_code,
+            duration_ms=duration * 1000,
+            query_count=query_count,
+            sample_count=sum(stacks.values()),
+            stacks=dict(stacks),
+        )
+        # Simpan hanya N profil terbaru
+        RequestProfile.objects.filter(pk__lte=profile.pk - settings.PROFILING_KEEP).delete()
@@ -1,3 +1,384 @@
-from django.test import TestCase
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+
+from exam.models import ParticipantProfile, Tryout, Question, ParticipantTryout
+from exam import live, ratelimit, reports
+from exam.seed import seed
+from exam.tests import ScalingTestCase, SCALES
+from . import profiling
+from .models import RequestProfile
+from tryout_site.routers import (
+    ReplicaRouter, ReplicaPinMiddleware, PIN_COOKIE, replica_reads, use_database, use_primary,
+)
+
+
+class DashboardViewScalingTests(ScalingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def run_scales(self, url):
+        results = []
+        for scale in SCALES:
+            self.grow_to(scale)
+            queries, steps = self.measure('get', url)
+            results.append((self.data_rows(), queries, steps))
+        return results
+
+    def test_participant_list(self):
+        results = self.run_scales(reverse('dashboard:participant_list'))
+        self.assertScales(results, max_queries=7)
+
+    def test_participant_list_with_unfinished_attempts(self):
+        self.grow_to(1)
+        ParticipantTryout.objects.update(is_finished=False, started_at=timezone.now() - timedelta(minutes=5))
+        response = self.client.get(reverse('dashboard:participant_list'))
+        self.assertContains(response, 'title="Belum selesai"')
+
+    def test_tryout_list(self):
+        results = self.run_scales(reverse('dashboard:tryout_list'))
+        self.assertScales(results, max_queries=5)
+
+    def test_dashboard_index(self):
+        results = self.run_scales(reverse('dashboard:index'))
+        self.assertScales(results, max_queries=6)
+
+
+class LiveCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tryout = Tryout.objects.create(
+            title='Live', description='-', subjects='-',
+            publish_time=timezone.now() - timedelta(minutes=5),
+            work_time_minutes=60, is_published=True,
+        )
+        Question.objects.create(tryout=self.tryout, number=1, text='?', option_a='a', option_b='b',
+                                option_c='c', option_d='d', correct_option='A')
+        self.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.participants = []
+        for i in range(3):
+            user = User.objects.create_user(f'live{i}', password='x')
+            ParticipantProfile.objects.create(user=user, full_name=f'P{i}', school='SMA')
+            self.participants.append(user)
+
+    def counters(self):
+        self.client.force_login(self.staff)
+        return self.client.get(reverse('dashboard:live_counters')).json()
+
+    def test_counters_follow_exam_events(self):
+        for user in self.participants:
+            self.client.force_login(user)
+            self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        self.client.force_login(self.participants[0])
+        self.client.post(reverse('exam:submit_exam', args=[self.tryout.pk]))
+        self.client.force_login(self.participants[1])
+        self.client.post(reverse('exam:track_out_of_app', args=[self.tryout.pk]))
+        self.client.post(reverse('exam:track_out_of_app', args=[self.tryout.pk]))
+
+        self.assertEqual(self.counters(), {'started': 3, 'in_progress': 2, 'finished': 1, 'out_of_app': 1})
+
+        self.client.force_login(self.participants[1])
+        self.client.post(reverse('exam:track_out_of_app', args=[self.tryout.pk]), {'state': 'in'})
+        self.assertEqual(self.counters()['out_of_app'], 0)
+
+    def test_counters_reconcile_after_cache_loss(self):
+        for user in self.participants[:2]:
+            self.client.force_login(user)
+            self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        cache.clear()
+        self.assertEqual(self.counters()['started'], 2)
+        response = self.client.get(reverse('dashboard:index'))
+        self.assertContains(response, 'data-counter="in_progress">2<')
+
+    def test_out_of_app_counter_survives_cache_loss(self):
+        user = self.participants[0]
+        self.client.force_login(user)
+        self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        self.client.post(reverse('exam:track_out_of_app', args=[self.tryout.pk]))
+        # Cache baru / worker lain: penghitung dibangun ulang dari out_since di DB
+        cache.clear()
+        self.assertEqual(self.counters()['out_of_app'], 1)
+
+        self.client.force_login(user)
+        self.client.post(reverse('exam:track_out_of_app', args=[self.tryout.pk]), {'state': 'in'})
+        self.assertEqual(self.counters()['out_of_app'], 0)
+        cache.clear()
+        self.assertEqual(self.counters()['out_of_app'], 0)
+        self.assertEqual(ParticipantTryout.objects.get(participant__user=user).out_of_app_count, 1)
+
+        # Submit saat masih di luar tab: keluar dari hitungan tanpa query tambahan
+        self.client.force_login(user)
+        self.client.post(reverse('exam:track_out_of_app', args=[self.tryout.pk]))
+        self.assertEqual(self.counters()['out_of_app'], 1)
+        self.client.force_login(user)
+        self.client.post(reverse('exam:submit_exam', args=[self.tryout.pk]))
+        self.assertEqual(self.counters()['out_of_app'], 0)
+        cache.clear()
+        self.assertEqual(self.counters()['out_of_app'], 0)
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+
+    def read_alias_in_view(self, request):
+        seen = {}
+
+        @replica_reads
+        def view(request):
+            seen['alias'] = self.router.db_for_read(Tryout)
+            return HttpResponse()
+
+        view(request)
+        return seen['alias']
+
+    def test_no_replica_configured(self):
+        self.assertIsNone(self.read_alias_in_view(self.factory.get('/')))
+
+    @override_settings(READ_REPLICA_ALIAS='replica')
+    def test_replica_reads_and_overrides(self):
+        self.assertEqual(self.read_alias_in_view(self.factory.get('/')), 'replica')
+        self.assertIsNone(self.read_alias_in_view(self.factory.get('/', {'primary': 1})))
+
+        pinned = self.factory.get('/')
+        pinned.db_pinned = True
+        self.assertIsNone(self.read_alias_in_view(pinned))
+
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Tryout), 'default')
+        self.assertEqual(self.router.db_for_write(Tryout), 'default')
+        self.assertIsNone(self.router.db_for_read(Tryout))
+
+    @override_settings(DATABASE_ROUTERS=['tryout_site.routers.ReplicaRouter'])
+    def test_live_counters_reconcile_on_primary(self):
+        cache.clear()
+        live.active_tryout_ids()
+        # Alias 'stale' tidak ada: kalau reconcile membaca lewat router, query ini gagal
+        with use_database('stale'):
+            self.assertEqual(live.counters()['started'], 0)
+        self.assertIsNotNone(cache.get(live.RECONCILE_KEY))
+
+    def test_pin_cookie_set_after_write(self):
+        def writing_view(request):
+            Tryout.objects.create(title='x', description='-', subjects='-',
+                                  publish_time=timezone.now(), work_time_minutes=10)
+            return HttpResponse()
+
+        def reading_view(request):
+            list(Tryout.objects.all())
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(writing_view)(self.factory.get('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = ReplicaPinMiddleware(reading_view)(self.factory.get('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class ParticipantCardSheetTests(TestCase):
+    def setUp(self):
+        seed(participants=3, tryouts=1, questions=1, prefix='cards')
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        self.url = reverse('dashboard:participant_card_sheet')
+
+    def sheet(self, params=None):
+        response = self.client.get(self.url, params or {})
+        return response.status_code, b''.join(response.streaming_content).decode() if response.streaming else ''
+
+    @override_settings(DATABASE_ROUTERS=['tryout_site.routers.ReplicaRouter'], READ_REPLICA_ALIAS='stale')
+    def test_cards_read_users_from_primary(self):
+        # Alias 'stale' tidak ada: kartu yang dibaca dari replica akan gagal di sini
+        status, content = self.sheet()
+        self.assertEqual(status, 200)
+        self.assertEqual(content.count('sekali pakai'), ParticipantProfile.objects.count())
+
+    def test_day_filter_is_validated(self):
+        status, content = self.sheet({'day': 2})
+        self.assertEqual(content.count('sekali pakai'), ParticipantProfile.objects.filter(day=2).count())
+        self.assertEqual(self.sheet({'day': 'dua'})[0], 400)
+        self.assertEqual(self.sheet({'day': 9})[0], 400)
+
+
+@override_settings(SHARED_CACHE=True)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def tearDown(self):
+        profiling.disable()
+
+    def test_disabled_by_default(self):
+        self.client.get(reverse('dashboard:tryout_list'))
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(SHARED_CACHE=False)
+    def test_refused_without_shared_cache(self):
+        response = self.client.post(reverse('dashboard:profile_list'),
+                                    {'rate': 100, 'url_names': '', 'minutes': 5}, follow=True)
+        self.assertContains(response, 'butuh cache bersama')
+        self.assertIsNone(cache.get(profiling.CONFIG_KEY))
+        self.client.get(reverse('dashboard:tryout_list'))
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_staff_enables_profiling_for_url_name(self):
+        self.client.post(reverse('dashboard:profile_list'),
+                         {'rate': 0, 'url_names': 'dashboard:tryout_list', 'minutes': 5})
+        self.client.get(reverse('dashboard:index'))
+        self.client.get(reverse('dashboard:tryout_list'))
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.url_name, 'dashboard:tryout_list')
+        self.assertEqual(profile.user, self.staff)
+        self.assertGreater(profile.query_count, 0)
+        response = self.client.get(reverse('dashboard:profile_detail', args=[profile.pk]))
+        self.assertEqual(response.status_code, 200)
+
+        self.client.post(reverse('dashboard:profile_list'), {'disable': 1})
+        self.client.get(reverse('dashboard:tryout_list'))
+        self.assertEqual(RequestProfile.objects.count(), 1)
+
+    def test_sampler_stopped_when_view_raises(self):
+        profiling.enable(url_names=['dashboard:tryout_list'], minutes=5)
+        samplers = []
+
+        class RecordingSampler(profiling.StackSampler):
+            def __init__(self, *args):
+                super().__init__(*args)
+                samplers.append(self)
+
+        def failing_view(request):
+            raise RuntimeError('view gagal')
+
+        request = RequestFactory().get(reverse('dashboard:tryout_list'))
+        with mock.patch.object(profiling, 'StackSampler', RecordingSampler):
+            with self.assertRaises(RuntimeError):
+                profiling.ProfilingMiddleware(failing_view)(request)
+            # URL lain tidak dipilih: sampler tidak pernah dibuat
+            profiling.ProfilingMiddleware(lambda request: HttpResponse())(RequestFactory().get(reverse('dashboard:index')))
+
+        self.assertEqual(len(samplers), 1)
+        self.assertFalse(samplers[0]._thread.is_alive())
+
+    def test_sampler_folds_stacks(self):
+        def busy_leaf(until):
+            while time.perf_counter() < until:
+                pass
+
+        sampler = profiling.StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        busy_leaf(time.perf_counter() + 0.05)
+        stacks = sampler.stop()
+
+        self.assertTrue(stacks)
+        top = profiling.function_table(stacks)[0]
+        self.assertTrue(top['function'].startswith('busy_leaf'))
+        boxes = profiling.flame_graph(stacks)
+        self.assertAlmostEqual(sum(box['width'] for box in boxes if box['depth'] == 0), 100.0)
+
+
+class TryoutReportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tryout = seed(participants=10, tryouts=1, questions=5, prefix='report')['tryouts'][0]
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+
+    def test_report_page_and_csv(self):
+        response = self.client.get(reverse('dashboard:tryout_report', args=[self.tryout.pk]))
+        self.assertContains(response, 'Per Sekolah')
+
+        response = self.client.get(reverse('dashboard:tryout_report_csv', args=[self.tryout.pk]))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = response.content.decode().splitlines()
+        self.assertTrue(lines[0].startswith('kelompok,nama,jumlah'))
+        self.assertTrue(lines[1].startswith('semua,Semua,10,'))
+
+    @override_settings(READ_REPLICA_ALIAS='replica')
+    def test_report_views_read_from_replica(self):
+        seen = []
+        build = reports.score_report
+
+        def score_report(tryout_id):
+            seen.append(ReplicaRouter().db_for_read(ParticipantTryout))
+            return build(tryout_id)
+
+        with mock.patch.object(reports, 'score_report', score_report):
+            self.client.get(reverse('dashboard:tryout_report', args=[self.tryout.pk]))
+            self.client.get(reverse('dashboard:tryout_report_csv', args=[self.tryout.pk]))
+        self.assertEqual(seen, ['replica', 'replica'])
+
+
+class ParticipantBulkTests(TestCase):
+    def setUp(self):
+        seed(participants=6, tryouts=1, questions=3, prefix='bulkpage')
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        self.url = reverse('dashboard:participant_bulk')
+
+    def test_preview_then_run(self):
+        expected = ParticipantProfile.objects.filter(day=1).count()
+        response = self.client.post(self.url, {'action': 'block', 'day': 1, 'preview': 1})
+        self.assertEqual(response.context['preview'], expected)
+        self.assertFalse(ParticipantProfile.objects.filter(blocked=True).exists())
+
+        response = self.client.post(self.url, {'action': 'block', 'day': 1, 'confirm_count': expected, 'run': 1})
+        self.assertRedirects(response, reverse('dashboard:participant_list'))
+        self.assertEqual(ParticipantProfile.objects.filter(blocked=True).count(), expected)
+
+    def test_stale_confirmation_is_not_run(self):
+        response = self.client.post(self.url, {'action': 'delete', 'day': 1, 'confirm_count': 999, 'run': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ParticipantProfile.objects.count(), 6)
+
+    def test_requires_a_filter(self):
+        response = self.client.post(self.url, {'action': 'delete', 'preview': 1})
+        self.assertIsNone(response.context['preview'])
+        self.assertEqual(ParticipantProfile.objects.count(), 6)
+
+
+class RateLimitPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit.limiter.reset()
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+
+    @override_settings(RATE_LIMITS={'save_answer': {'rate': 1, 'burst': 1}})
+    def test_counters_and_limited_participants(self):
+        user = User.objects.create_user('peserta', password='x')
+        ParticipantProfile.objects.create(user=user, full_name='Peserta Cepat', school='SMA 1')
+        ratelimit.limiter.hit('save_answer', user.pk, now=10.0)
+        ratelimit.limiter.hit('save_answer', user.pk, now=10.0)
+
+        response = self.client.get(reverse('dashboard:rate_limits'))
+        self.assertEqual(response.context['endpoints'][0]['limited'], 1)
+        self.assertContains(response, 'Peserta Cepat')
+
+
+class RefreshReplicaTests(TransactionTestCase):
+    # Backup butuh data yang sudah di-commit, TestCase membungkus semuanya dalam transaksi
+    def test_refresh_replica_copies_database(self):
+        Tryout.objects.create(title='Replica', description='-', subjects='-',
+                              publish_time=timezone.now(), work_time_minutes=10)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'replica.sqlite3')
+            call_command('refresh_replica', output=output, stdout=io.StringIO())
+            with closing(sqlite3.connect(output)) as replica:
+                titles = [row[0] for row in replica.execute('SELECT title FROM exam_tryout')]
+        self.assertEqual(titles, ['Replica'])
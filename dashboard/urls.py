@@ -5,6 +5,7 @@ app_name = 'dashboard'
 
 urlpatterns = [
     path('', views.dashboard_index, name='index'),
+    path('live-counters/', views.live_counters, name='live_counters'),
     
     # Participant Management
     path('participants/', views.participant_list, name='participant_list'),
@@ -13,7 +14,9 @@ urlpatterns = [
     path('participants/<int:pk>/delete/', views.participant_delete, name='participant_delete'),
     path('participants/<int:pk>/block/', views.participant_block, name='participant_block'),
     path('participants/<int:pk>/send-email/', views.participant_send_email, name='participant_send_email'),
+    path('participants/bulk/', views.participant_bulk, name='participant_bulk'),
     path('participants/send-all-emails/', views.participant_send_all_emails, name='participant_send_all_emails'),
+    path('participant-cards/', views.participant_card_sheet, name='participant_card_sheet'),
     path('participant-card/<int:pk>/', views.participant_card, name='participant_card'),
     
     # Tryout Management
@@ -22,4 +25,11 @@ urlpatterns = [
     path('tryouts/<int:pk>/settings/', views.tryout_settings, name='tryout_settings'),
     path('tryouts/<int:pk>/edit/', views.tryout_edit, name='tryout_edit'),
     path('tryouts/<int:pk>/delete/', views.tryout_delete, name='tryout_delete'),
+    path('tryouts/<int:pk>/report/', views.tryout_report, name='tryout_report'),
+    path('tryouts/<int:pk>/report.csv', views.tryout_report_csv, name='tryout_report_csv'),
+
+    # Monitoring
+    path('rate-limits/', views.rate_limits, name='rate_limits'),
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<int:pk>/', views.profile_detail, name='profile_detail'),
 ]
@@ -1,3 +1,7 @@
+import csv
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
@@ -6,34 +10,44 @@ from django.utils.crypto import get_random_string
 from django.core.mail import EmailMultiAlternatives
 from django.urls import reverse
 from django.utils import timezone
-from django.http import JsonResponse
-from django.db.models import Avg
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.template.loader import get_template
+from django.db.models import Avg, Count, Q, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
+from accounts.tokens import make_login_token
+from tryout_site.routers import replica_reads
+from exam import bulk, live, ratelimit, reports
 from exam.models import ParticipantProfile, Tryout, Question, ParticipantTryout
+from exam.search import search_participants
 from exam.forms import TryoutForm, QuestionFormSet
-from .forms import ParticipantManualForm
+from . import profiling
+from .forms import ParticipantManualForm, ParticipantBulkForm, ParticipantCardSheetForm, ProfilingForm
+from .models import RequestProfile
 
 def is_admin(user):
     return user.is_staff or user.is_superuser
 
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
 def dashboard_index(request):
-    total_participants = ParticipantProfile.objects.count()
-    total_tryouts = Tryout.objects.count()
-    active_tryouts = Tryout.objects.filter(is_published=True, publish_time__lte=timezone.now()).count()
-    
-    context = {
-        'total_participants': total_participants,
-        'total_tryouts': total_tryouts,
-        'active_tryouts': active_tryouts,
-    }
+    context = live.totals()
+    context['live'] = live.counters()
     return render(request, 'dashboard/index.html', context)
 
 @login_required
 @user_passes_test(is_admin)
+def live_counters(request):
+    return JsonResponse(live.counters())
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
 def participant_list(request):
     participants = ParticipantProfile.objects.select_related('user').all().order_by('day', 'full_name')
+    query = request.GET.get('q', '').strip()
+    participants = search_participants(participants, query)
     
     # Get active tryouts for monitoring
     active_tryouts = Tryout.objects.filter(
@@ -47,19 +61,18 @@ def participant_list(request):
     # Get participant tryout status if there's active tryout
     participant_status = {}
     if has_active_tryout:
-        for participant in participants:
-            tryout_statuses = ParticipantTryout.objects.filter(
-                participant=participant,
-                tryout__in=active_tryouts
-            )
-            participant_status[participant.id] = {
-                'tryouts': tryout_statuses
-            }
+        # Satu query untuk semua peserta, dikelompokkan per peserta
+        attempts = list(ParticipantTryout.objects.filter(tryout__in=active_tryouts).order_by('tryout__publish_time'))
+        online = live.online_attempt_ids([pt.id for pt in attempts])
+        for pt in attempts:
+            pt.is_online = pt.id in online
+            participant_status.setdefault(pt.participant_id, {'tryouts': []})['tryouts'].append(pt)
     
     context = {
         'participants': participants,
         'has_active_tryout': has_active_tryout,
         'participant_status': participant_status,
+        'query': query,
     }
     return render(request, 'dashboard/participant_list.html', context)
 
@@ -128,9 +141,7 @@ def participant_edit(request, pk):
 @user_passes_test(is_admin)
 def participant_delete(request, pk):
     participant = get_object_or_404(ParticipantProfile, pk=pk)
-    user = participant.user
-    participant.delete()
-    user.delete()
+    bulk.run('delete', [participant.pk])
     messages.success(request, 'Peserta berhasil dihapus.')
     return redirect('dashboard:participant_list')
 
@@ -138,11 +149,41 @@ def participant_delete(request, pk):
 @user_passes_test(is_admin)
 def participant_block(request, pk):
     participant = get_object_or_404(ParticipantProfile, pk=pk)
-    participant.blocked = True
-    participant.save()
+    bulk.run('block', [participant.pk])
     messages.warning(request, f'Peserta {participant.full_name} telah diblokir.')
     return redirect('dashboard:participant_list')
 
+@login_required
+@user_passes_test(is_admin)
+def participant_bulk(request):
+    """Bulk actions in two steps: preview the matching count, then run with that count confirmed"""
+    form = ParticipantBulkForm(request.POST or None)
+    preview = None
+    if request.method == 'POST' and form.is_valid():
+        data = form.cleaned_data
+        tryout_id = data['tryout'].pk if data['tryout'] else None
+        participants = bulk.select_participants(data['day'], data['school'], tryout_id)
+        preview = participants.count()
+        # Jalankan hanya kalau jumlah yang dikonfirmasi masih sama dengan pratinjau
+        if 'run' in request.POST and data['confirm_count'] == preview:
+            result = bulk.run(data['action'], participants, tryout_id=tryout_id)
+            rows = ', '.join(f'{kind}: {count}' for kind, count in sorted(result['rows'].items())) or '-'
+            messages.success(
+                request,
+                f'{dict(bulk.ACTIONS)[data["action"]]} selesai untuk {result["participants"]} peserta ({rows}).',
+            )
+            return redirect('dashboard:participant_list')
+        if 'run' in request.POST:
+            messages.warning(request, 'Jumlah peserta berubah sejak pratinjau, periksa lagi sebelum menjalankan.')
+        form = ParticipantBulkForm(dict(request.POST.items(), confirm_count=preview))
+        form.is_valid()
+
+    return render(request, 'dashboard/participant_bulk.html', {
+        'form': form,
+        'preview': preview,
+        'action_label': dict(bulk.ACTIONS).get(form.data.get('action')),
+    })
+
 @login_required
 @user_passes_test(is_admin)
 def participant_send_email(request, pk):
@@ -243,25 +284,78 @@ def participant_card(request, pk):
     
     base_url = request.build_absolute_uri('/')[:-1]
     login_url = base_url + reverse('accounts:login')
+    token_login_url = base_url + reverse('accounts:token_login', args=[make_login_token(participant.user)])
     
     context = {
         'participant': participant,
         'login_url': login_url,
+        'token_login_url': token_login_url,
     }
     return render(request, 'dashboard/participant_card.html', context)
 
+CARDS_PER_SHEET_PAGE = 8
+
+@login_required
+@user_passes_test(is_admin)
+def participant_card_sheet(request):
+    """Printable sheet with many participant cards, filtered by day and/or school"""
+    # Sengaja tanpa @replica_reads: token kartu menandatangani last_login, replica yang basi
+    # menghasilkan token yang langsung ditolak check_login_token
+    participants = ParticipantProfile.objects.select_related('user').order_by('day', 'school', 'full_name')
+
+    form = ParticipantCardSheetForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest('Filter hari/sekolah tidak valid.')
+    day = form.cleaned_data['day']
+    school = form.cleaned_data['school']
+    if day:
+        participants = participants.filter(day=day)
+    if school:
+        participants = participants.filter(school=school)
+
+    base_url = request.build_absolute_uri('/')[:-1]
+    login_url = base_url + reverse('accounts:login')
+    head_template = get_template('dashboard/participant_card_sheet_head.html')
+    page_template = get_template('dashboard/participant_card_sheet_page.html')
+
+    def render_pages():
+        yield head_template.render({'day': day, 'school': school}, request)
+
+        # Satu query (iterator) dan satu render template per halaman kartu,
+        # jadi memori tetap kecil walaupun ada ribuan peserta
+        cards = []
+        for participant in participants.iterator(chunk_size=500):
+            cards.append({
+                'participant': participant,
+                'token_login_url': base_url + reverse('accounts:token_login', args=[make_login_token(participant.user)]),
+            })
+            if len(cards) == CARDS_PER_SHEET_PAGE:
+                yield page_template.render({'cards': cards, 'login_url': login_url})
+                cards = []
+        if cards:
+            yield page_template.render({'cards': cards, 'login_url': login_url})
+
+        yield '</body>\n</html>\n'
+
+    return StreamingHttpResponse(render_pages(), content_type='text/html; charset=utf-8')
+
 # ============ TRYOUT MANAGEMENT ============
 
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
 def tryout_list(request):
-    tryouts = Tryout.objects.all().order_by('-created_at')
-
-    # tempelkan atribut finished_count dan avg_score ke tiap tryout
-    for t in tryouts:
-        pts = ParticipantTryout.objects.filter(tryout=t, is_finished=True)
-        t.finished_count = pts.count()
-        t.avg_score = pts.aggregate(Avg('score'))['score__avg']
+    question_count = (
+        Question.objects.filter(tryout=OuterRef('pk'))
+        .order_by().values('tryout')
+        .annotate(c=Count('id')).values('c')
+    )
+    # finished_count, avg_score dan jumlah soal dihitung dalam satu query
+    tryouts = Tryout.objects.annotate(
+        finished_count=Count('participanttryout', filter=Q(participanttryout__is_finished=True)),
+        avg_score=Avg('participanttryout__score', filter=Q(participanttryout__is_finished=True)),
+        question_count=Coalesce(Subquery(question_count), 0),
+    ).order_by('-created_at')
 
     return render(request, 'dashboard/tryout_list.html', {'tryouts': tryouts})
 
@@ -271,7 +365,7 @@ def tryout_list(request):
 def tryout_create(request):
     if request.method == 'POST':
         form = TryoutForm(request.POST)
-        formset = QuestionFormSet(request.POST, prefix='questions')
+        formset = QuestionFormSet(request.POST, request.FILES, prefix='questions')
         if form.is_valid() and formset.is_valid():
             tryout = form.save()
             formset.instance = tryout
@@ -287,7 +381,7 @@ def tryout_edit(request, pk):
     tryout = get_object_or_404(Tryout, pk=pk)
     if request.method == 'POST':
         form = TryoutForm(request.POST, instance=tryout)
-        formset = QuestionFormSet(request.POST, instance=tryout, prefix='questions')
+        formset = QuestionFormSet(request.POST, request.FILES, instance=tryout, prefix='questions')
         if form.is_valid() and formset.is_valid():
             form.save()
             formset.save()
@@ -334,7 +428,7 @@ def tryout_edit(request, pk):
     
     if request.method == 'POST':
         form = TryoutForm(request.POST, instance=tryout)
-        formset = QuestionFormSet(request.POST, instance=tryout)
+        formset = QuestionFormSet(request.POST, request.FILES, instance=tryout)
         
         if form.is_valid() and formset.is_valid():
             form.save()
@@ -353,6 +447,49 @@ def tryout_edit(request, pk):
     }
     return render(request, 'dashboard/tryout_form.html', context)
 
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+def tryout_report(request, pk):
+    tryout = get_object_or_404(Tryout, pk=pk)
+    report = reports.score_report(tryout.id)
+    context = {
+        'tryout': tryout,
+        'report': report,
+        'overall_rows': [report['overall']] if report['overall'] else [],
+        'bins': [
+            f'{i * 100 // reports.HISTOGRAM_BINS}–{(i + 1) * 100 // reports.HISTOGRAM_BINS}%'
+            for i in range(reports.HISTOGRAM_BINS)
+        ],
+    }
+    return render(request, 'dashboard/tryout_report.html', context)
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+def tryout_report_csv(request, pk):
+    tryout = get_object_or_404(Tryout, pk=pk)
+    report = reports.score_report(tryout.id)
+
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="laporan-tryout-{tryout.id}.csv"'
+    writer = csv.writer(response)
+    percentile_columns = [f'p{p}' for p in reports.PERCENTILES]
+    writer.writerow(
+        ['kelompok', 'nama', 'jumlah', 'rata_rata', 'simpangan_baku', 'min', *percentile_columns, 'max']
+        + [f'bin_{i + 1}' for i in range(reports.HISTOGRAM_BINS)]
+    )
+    groups = [('semua', report['overall'])] if report['overall'] else []
+    groups += [('sekolah', row) for row in report['school']]
+    groups += [('hari', row) for row in report['day']]
+    for kind, row in groups:
+        writer.writerow(
+            [kind, row['group'], row['count'], round(row['mean'], 2), round(row['stddev'], 2), row['min']]
+            + [row[column] for column in percentile_columns]
+            + [row['max']] + row['histogram']
+        )
+    return response
+
 @login_required
 @user_passes_test(is_admin)
 def tryout_delete(request, pk):
@@ -360,3 +497,71 @@ def tryout_delete(request, pk):
     tryout.delete()
     messages.success(request, 'Try out berhasil dihapus.')
     return redirect('dashboard:tryout_list')
+
+# ============ RATE LIMIT ============
+
+@login_required
+@user_passes_test(is_admin)
+def rate_limits(request):
+    endpoints, top_limited = ratelimit.counters()
+    user_ids = [user_id for user_id, _ in top_limited]
+    profiles = ParticipantProfile.objects.in_bulk(user_ids, field_name='user_id')
+    context = {
+        'endpoints': [
+            dict(counts, name=name, **settings.RATE_LIMITS[name]) for name, counts in endpoints.items()
+        ],
+        'top_limited': [(profiles.get(user_id), count) for user_id, count in top_limited],
+    }
+    return render(request, 'dashboard/rate_limits.html', context)
+
+# ============ PROFILING ============
+
+@login_required
+@user_passes_test(is_admin)
+def profile_list(request):
+    if request.method == 'POST':
+        if 'disable' in request.POST:
+            profiling.disable()
+            messages.success(request, 'Profiling dimatikan.')
+            return redirect('dashboard:profile_list')
+        form = ProfilingForm(request.POST)
+        if form.is_valid():
+            config = profiling.enable(
+                rate=form.cleaned_data['rate'] / 100,
+                url_names=form.cleaned_data['url_names'],
+                minutes=form.cleaned_data['minutes'],
+            )
+            if config is None:
+                messages.error(request, 'Profiling butuh cache bersama (REDIS_URL atau SHARED_CACHE=1): '
+                                        'dengan cache per proses saklar hanya sampai ke satu worker.')
+            else:
+                messages.success(request, f'Profiling aktif selama {form.cleaned_data["minutes"]} menit.')
+            return redirect('dashboard:profile_list')
+    else:
+        form = ProfilingForm()
+
+    config = profiling.current_config()
+    if config is not None:
+        config = dict(config, rate=config['rate'] * 100,
+                      until=datetime.fromtimestamp(config['until'], tz=dt_timezone.utc))
+    profiles = RequestProfile.objects.select_related('user').defer('stacks')[:100]
+    return render(request, 'dashboard/profile_list.html', {
+        'form': form,
+        'config': config,
+        'available': profiling.available(),
+        'profiles': profiles,
+    })
+
+@login_required
+@user_passes_test(is_admin)
+def profile_detail(request, pk):
+    profile = get_object_or_404(RequestProfile, pk=pk)
+    boxes = profiling.flame_graph(profile.stacks)
+    context = {
+        'profile': profile,
+        'boxes': boxes,
+        'depth': max((box['depth'] for box in boxes), default=-1) + 1,
+        'functions': profiling.function_table(profile.stacks),
+    }
+    return render(request, 'dashboard/profile_detail.html', context)
+
@@ -1,11 +1,26 @@
 from django.contrib import admin
-from .models import ParticipantProfile, Tryout, Question, ParticipantTryout, ParticipantAnswer
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Max
+from . import answers
+from .search import search_questions, search_participants
+from .models import (
+    ParticipantProfile, Tryout, Question, ParticipantTryout, ParticipantAnswer, AnswerJournal,
+    MediaAsset, QuestionAttachment,
+)
+
+class FullTextSearchMixin:
+    """Replace the LIKE '%...%' admin search with the full-text index"""
+    full_text_search = None
+
+    def get_search_results(self, request, queryset, search_term):
+        return self.full_text_search(queryset, search_term), False
 
 @admin.register(ParticipantProfile)
-class ParticipantProfileAdmin(admin.ModelAdmin):
+class ParticipantProfileAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['full_name', 'user', 'school', 'day', 'blocked']
     list_filter = ['day', 'blocked']
     search_fields = ['full_name', 'school', 'user__username', 'user__email']
+    full_text_search = staticmethod(search_participants)
 
 @admin.register(Tryout)
 class TryoutAdmin(admin.ModelAdmin):
@@ -13,19 +28,102 @@ class TryoutAdmin(admin.ModelAdmin):
     list_filter = ['is_published', 'publish_time']
     search_fields = ['title', 'description']
 
+class QuestionAttachmentInline(admin.TabularInline):
+    model = QuestionAttachment
+    raw_id_fields = ['asset']
+    extra = 0
+
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['tryout', 'number', 'text']
     list_filter = ['tryout']
-    search_fields = ['text']
+    search_fields = ['text', 'option_a', 'option_b', 'option_c', 'option_d']
+    full_text_search = staticmethod(search_questions)
+    inlines = [QuestionAttachmentInline]
+
+@admin.register(MediaAsset)
+class MediaAssetAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'status', 'width', 'height', 'size', 'created_at']
+    list_filter = ['status']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'original', 'size', 'width', 'height', 'variants', 'created_at']
+
+class CursorChangeList(ChangeList):
+    """
+    Keyset pagination (pk < cursor) without COUNT(*): the page is read with
+    one LIMIT query and the total is estimated from MAX(pk).
+    """
+    def get_results(self, request):
+        cursor = getattr(request, 'admin_cursor', None)
+        queryset = self.queryset.order_by('-pk')
+        if cursor:
+            queryset = queryset.filter(pk__lt=cursor)
+
+        result_list = list(queryset[:self.list_per_page + 1])
+        self.has_next = len(result_list) > self.list_per_page
+        result_list = result_list[:self.list_per_page]
+
+        self.estimated_count = self.root_queryset.aggregate(n=Max('pk'))['n'] or 0
+        self.cursor = cursor
+        self.next_cursor = result_list[-1].pk if self.has_next else None
+        self.first_page_url = self.get_query_string(remove=['cursor'])
+        self.next_page_url = self.get_query_string({'cursor': self.next_cursor}) if self.has_next else None
+        self.result_list = result_list
+        self.result_count = len(result_list)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = self.has_next or bool(cursor)
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+
+class CursorPaginationMixin:
+    """Admin for very large tables: keyset pages, no exact counts, no select-all actions"""
+    change_list_template = 'admin/cursor_change_list.html'
+    show_full_result_count = False
+    sortable_by = ()
+    actions = None
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+    def changelist_view(self, request, extra_context=None):
+        # cursor bukan filter, keluarkan sebelum ChangeList membaca request.GET
+        request.GET = request.GET.copy()
+        request.admin_cursor = request.GET.pop('cursor', [None])[0]
+        return super().changelist_view(request, extra_context)
+
+def search_attempts_by_participant(queryset, term):
+    return queryset.filter(participant__in=search_participants(ParticipantProfile.objects.all(), term))
 
 @admin.register(ParticipantTryout)
-class ParticipantTryoutAdmin(admin.ModelAdmin):
+class ParticipantTryoutAdmin(CursorPaginationMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['participant', 'tryout', 'started_at', 'finished_at', 'is_finished', 'out_of_app_count']
     list_filter = ['is_finished', 'tryout']
+    list_select_related = ['participant', 'tryout']
+    raw_id_fields = ['participant', 'tryout']
     search_fields = ['participant__full_name']
+    full_text_search = staticmethod(search_attempts_by_participant)
+    readonly_fields = ['answer_vector']
+
+    @admin.display(description='Jawaban (packed)')
+    def answer_vector(self, obj):
+        if obj.packed_answers is None:
+            return 'Disimpan per baris (Participant answers)'
+        options = sorted(answers.unpack(obj.packed_answers).items())
+        return ' '.join(f'{number}:{option}' for number, option in options) or '-'
 
 @admin.register(ParticipantAnswer)
-class ParticipantAnswerAdmin(admin.ModelAdmin):
+class ParticipantAnswerAdmin(CursorPaginationMixin, admin.ModelAdmin):
     list_display = ['participant_tryout', 'question', 'selected_option', 'answered_at']
-    list_filter = ['selected_option']
+    # Tanpa list_filter: filter per try out / pilihan tidak punya indeks yang cocok dan memindai seluruh tabel.
+    # Jawaban satu attempt tetap bisa dibuka lewat ?participant_tryout__id__exact=<id> (indeks unik)
+    list_select_related = ['participant_tryout__participant', 'participant_tryout__tryout', 'question']
+    raw_id_fields = ['participant_tryout', 'question']
+
+@admin.register(AnswerJournal)
+class AnswerJournalAdmin(CursorPaginationMixin, admin.ModelAdmin):
+    list_display = ['participant_tryout', 'question', 'selected_option', 'created_at']
+    # Tanpa list_filter (lihat ParticipantAnswerAdmin); indeks tambahan akan memperlambat setiap simpan jawaban
+    list_select_related = ['participant_tryout__participant', 'participant_tryout__tryout', 'question']
+    raw_id_fields = ['participant_tryout', 'question']
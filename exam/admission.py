@@ -0,0 +1,86 @@
+"""
+Staggered admission into a tryout right after publish_time.
+
+Participants of one day cohort (ParticipantProfile.day) draw a ticket from
+an atomic counter in the shared cache the first time they press "Mulai".
+Ticket n may enter at publish_time + (n - 1) / rate, with rate taken from
+ADMISSION_RATES[day]; until then start_tryout shows a waiting room that polls
+admission_status. Nothing is written to the database while waiting, and the
+attempt (and its timer) only starts when the admitted participant comes back
+to start_tryout. Participants arriving after the rush get a ticket whose slot
+has already passed and go straight in.
+
+Tickets are keyed on the publish time, so moving publish_time starts a new
+queue. The queue lives in the cache, so without SHARED_CACHE (per-process
+LocMem: every worker would run its own counter) everyone is admitted at once.
+"""
+import math
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import fragments
+from .models import Tryout
+
+TICKET_TIMEOUT = 60 * 60 * 12
+
+
+@dataclass(frozen=True)
+class Admission:
+    admitted: bool
+    wait_seconds: int = 0
+    ahead: int = 0
+
+
+def opening(tryout_id):
+    """Cached {'published', 'publish_time'} (POSIX timestamp) of a tryout, or None if it does not exist"""
+    key = f'admission:tryout:{tryout_id}:{fragments.version(tryout_id)}' if fragments.cache_seconds() else None
+    data = cache.get(key) if key else None
+    if data is None:
+        row = Tryout.objects.filter(pk=tryout_id).values_list('is_published', 'publish_time').first()
+        data = {'published': row[0], 'publish_time': row[1].timestamp()} if row else {}
+        if key:
+            cache.set(key, data, timeout=fragments.cache_seconds())
+    return data or None
+
+
+def _ticket(tryout_id, publish_time, day, participant_id):
+    queue = f'admission:{tryout_id}:{int(publish_time)}:{day}'
+    key = f'{queue}:ticket:{participant_id}'
+    ticket = cache.get(key)
+    if ticket is None:
+        cache.add(f'{queue}:next', 0, timeout=TICKET_TIMEOUT)
+        try:
+            number = cache.incr(f'{queue}:next')
+        except ValueError:
+            # Penghitung terhapus (eviction) di antara add dan incr: tidak ada tiket
+            return None
+        # add: dua request bersamaan dari peserta yang sama tetap memakai tiket yang tersimpan pertama
+        cache.add(key, number, timeout=TICKET_TIMEOUT)
+        ticket = cache.get(key, number)
+    return ticket
+
+
+def admit(tryout_id, publish_time, participant_id, day, now=None):
+    """Admission of a participant into a tryout published at publish_time (POSIX timestamp)"""
+    rate = settings.ADMISSION_RATES.get(day)
+    if not rate or not settings.SHARED_CACHE:
+        return Admission(admitted=True)
+    now = time.time() if now is None else now
+
+    ticket = _ticket(tryout_id, publish_time, day, participant_id)
+    if ticket is None:
+        # Lebih baik masuk tanpa antre daripada error 500 di ruang tunggu
+        return Admission(admitted=True)
+    slot = publish_time + (ticket - 1) / rate
+    if slot <= now:
+        return Admission(admitted=True)
+    # Jumlah tiket yang slotnya sudah lewat
+    admitted_so_far = max(0, math.floor((now - publish_time) * rate) + 1)
+    return Admission(
+        admitted=False,
+        wait_seconds=math.ceil(slot - now),
+        ahead=max(ticket - 1 - admitted_so_far, 0),
+    )
@@ -0,0 +1,183 @@
+"""
+Compacted answer storage: one ParticipantAnswer row per answer, or packed.
+
+With ANSWER_STORAGE = 'packed' the journal of a finished attempt is compacted
+into ParticipantTryout.packed_answers instead of ParticipantAnswer rows: one
+ASCII byte per question number (b'A'..b'D', BLANK when unanswered), so 100
+answers take 100 bytes inside the attempt row instead of 100 indexed rows.
+
+An attempt is packed exactly when packed_answers is not NULL, so both kinds
+can live in one database. Scoring, regrading, take_exam, the admin and the
+archive go through the helpers here and read either kind.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BinaryField, Max
+from django.db.models.functions import Substr
+
+from .models import ParticipantTryout, ParticipantAnswer, AnswerJournal, Question
+
+BLANK = b'-'
+OPTIONS = ('A', 'B', 'C', 'D')
+
+
+def pack(options, width=0):
+    """{question number: option} -> bytes, at least width long; options outside A-D stay blank"""
+    # Nomor 0 / negatif akan menulis ke vector[-1] (soal terakhir) tanpa error
+    if any(number < 1 for number in options):
+        raise ValueError(f'Nomor soal harus >= 1: {sorted(n for n in options if n < 1)}')
+    width = max([width] + list(options))
+    vector = bytearray(BLANK * width)
+    for number, option in options.items():
+        # Baris lama bisa berisi nilai apa saja (SQLite tidak menegakkan max_length/choices)
+        if option in OPTIONS:
+            vector[number - 1] = ord(option)
+    return bytes(vector)
+
+
+def unpack(vector):
+    """bytes -> {question number: option} for the answered questions"""
+    return {
+        number: chr(byte)
+        for number, byte in enumerate(bytes(vector or b''), start=1)
+        if byte != BLANK[0]
+    }
+
+
+def _width(tryout_id):
+    return Question.objects.filter(tryout_id=tryout_id).aggregate(n=Max('number'))['n'] or 0
+
+
+def compact(participant_tryout):
+    """Write the latest journal entry per question into the attempt's answer storage"""
+    pt = participant_tryout
+    entries = list(
+        AnswerJournal.objects.latest_for(pt).values_list('question_id', 'question__number', 'selected_option')
+    )
+    if pt.packed_answers is None and settings.ANSWER_STORAGE != 'packed':
+        ParticipantAnswer.objects.bulk_create(
+            [
+                ParticipantAnswer(participant_tryout=pt, question_id=question_id, selected_option=option)
+                for question_id, _, option in entries
+            ],
+            update_conflicts=True,
+            unique_fields=['participant_tryout', 'question'],
+            update_fields=['selected_option', 'answered_at'],
+        )
+        return len(entries)
+
+    options = unpack(pt.packed_answers)
+    if pt.packed_answers is None:
+        # Attempt yang sudah punya baris sebelum mode packed diaktifkan: pindahkan sekalian
+        rows = ParticipantAnswer.objects.filter(participant_tryout=pt)
+        options.update(rows.values_list('question__number', 'selected_option'))
+        rows.delete()
+    options.update((number, option) for _, number, option in entries)
+    pt.packed_answers = pack(options, _width(pt.tryout_id))
+    ParticipantTryout.objects.filter(pk=pt.pk).update(packed_answers=pt.packed_answers)
+    return len(entries)
+
+
+def stored_options(participant_tryout_id):
+    """{question_id: option} already compacted for an attempt, rows or packed"""
+    options = dict(
+        ParticipantAnswer.objects.filter(participant_tryout_id=participant_tryout_id)
+        .values_list('question_id', 'selected_option')
+    )
+    if options:
+        return options
+    # Tanpa baris: attempt packed (apa pun ANSWER_STORAGE saat ini) atau memang belum dipadatkan
+    row = ParticipantTryout.objects.filter(pk=participant_tryout_id).values_list('tryout_id', 'packed_answers').first()
+    if row is None or row[1] is None:
+        return {}
+    by_number = unpack(row[1])
+    numbers = Question.objects.filter(tryout_id=row[0], number__in=by_number).values_list('number', 'id')
+    return {question_id: by_number[number] for number, question_id in numbers}
+
+
+def score(participant_tryout):
+    """(score, max_score) of an attempt against the current answer key"""
+    pt = participant_tryout
+    questions = list(
+        Question.objects.filter(tryout_id=pt.tryout_id).values_list('id', 'number', 'correct_option', 'score')
+    )
+    max_score = sum(points for _, _, _, points in questions)
+
+    if pt.packed_answers is not None:
+        # Scan byte: jawaban soal nomor n ada di vector[n - 1]
+        vector = bytes(pt.packed_answers)
+        total = sum(
+            points for _, number, correct, points in questions
+            if 1 <= number <= len(vector) and vector[number - 1] == ord(correct)
+        )
+    else:
+        selected = dict(
+            ParticipantAnswer.objects.filter(participant_tryout=pt).values_list('question_id', 'selected_option')
+        )
+        total = sum(points for question_id, _, correct, points in questions if selected.get(question_id) == correct)
+    return float(total), float(max_score)
+
+
+def packed_answered(tryout_id, number, option):
+    """Ids of packed attempts of a tryout whose answer to question `number` is option"""
+    return (
+        ParticipantTryout.objects.filter(tryout_id=tryout_id, packed_answers__isnull=False)
+        .annotate(choice=Substr('packed_answers', number, 1, output_field=BinaryField()))
+        .filter(choice=option.encode())
+        .values('id')
+    )
+
+
+def move_question(tryout_id, old_number, new_number=None):
+    """
+    Move one question's byte to new_number in every packed attempt of a
+    tryout, or blank it when new_number is None (question deleted).
+    """
+    attempts = ParticipantTryout.objects.filter(tryout_id=tryout_id, packed_answers__isnull=False)
+    # Lebar dari soal yang ada sekarang: nomor sementara saat menukar soal tidak melebarkan vektor selamanya
+    width = _width(tryout_id)
+    changed = []
+    for pt in attempts.only('id', 'packed_answers').iterator(chunk_size=2000):
+        options = unpack(pt.packed_answers)
+        option = options.pop(old_number, None)
+        if new_number is not None:
+            options[new_number] = option
+        vector = pack(options, width)
+        if vector != bytes(pt.packed_answers):
+            pt.packed_answers = vector
+            changed.append(pt)
+    ParticipantTryout.objects.bulk_update(changed, ['packed_answers'], batch_size=500)
+
+
+@transaction.atomic
+def convert(tryout_id, packed=True, chunk_size=500):
+    """Convert the compacted attempts of a tryout to packed vectors (or back to rows), return the count"""
+    width = _width(tryout_id)
+    numbers = dict(Question.objects.filter(tryout_id=tryout_id).values_list('id', 'number'))
+    question_ids = {number: question_id for question_id, number in numbers.items()}
+    # Attempt yang masih berjalan belum dipadatkan (jawabannya masih di jurnal), biarkan
+    attempts = list(
+        ParticipantTryout.objects.filter(tryout_id=tryout_id, is_finished=True, packed_answers__isnull=packed)
+        .only('id', 'packed_answers')
+    )
+    for start in range(0, len(attempts), chunk_size):
+        chunk = attempts[start:start + chunk_size]
+        rows = ParticipantAnswer.objects.filter(participant_tryout__in=chunk)
+        if packed:
+            options = {pt.id: {} for pt in chunk}
+            for pt_id, question_id, option in rows.values_list('participant_tryout_id', 'question_id', 'selected_option'):
+                options[pt_id][numbers[question_id]] = option
+            for pt in chunk:
+                pt.packed_answers = pack(options[pt.id], width)
+            rows.delete()
+        else:
+            ParticipantAnswer.objects.bulk_create([
+                ParticipantAnswer(participant_tryout=pt, question_id=question_ids[number], selected_option=option)
+                for pt in chunk
+                for number, option in unpack(pt.packed_answers).items()
+                if number in question_ids
+            ], batch_size=2000)
+            for pt in chunk:
+                pt.packed_answers = None
+        ParticipantTryout.objects.bulk_update(chunk, ['packed_answers'])
+    return len(attempts)
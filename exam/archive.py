@@ -0,0 +1,178 @@
+"""Export closed tryouts to gzip JSON-lines files and load them back."""
+import base64
+import datetime
+import gzip
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from .models import Tryout, ParticipantTryout, ParticipantAnswer, AnswerJournal
+
+ARCHIVE_VERSION = 1
+
+# Urutan penting untuk restore: attempt dulu, baru jawaban yang merujuk ke attempt
+ARCHIVED_MODELS = [
+    ('attempt', ParticipantTryout),
+    ('answer', ParticipantAnswer),
+    ('journal', AnswerJournal),
+]
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _querysets(tryout):
+    return {
+        'attempt': ParticipantTryout.objects.filter(tryout=tryout).order_by('id'),
+        'answer': ParticipantAnswer.objects.filter(participant_tryout__tryout=tryout).order_by('id'),
+        'journal': AnswerJournal.objects.filter(participant_tryout__tryout=tryout).order_by('id'),
+    }
+
+
+class ArchiveJSONEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder memotong mikrodetik, arsip harus presisi penuh
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        # packed_answers (BinaryField): base64, dibaca kembali oleh BinaryField.to_python
+        if isinstance(o, (bytes, memoryview)):
+            return base64.b64encode(o).decode('ascii')
+        return super().default(o)
+
+
+def _dump_line(record):
+    return (json.dumps(record, cls=ArchiveJSONEncoder, sort_keys=True) + '\n').encode('utf-8')
+
+
+def _build(model, row):
+    fields = {f.attname: f for f in model._meta.concrete_fields}
+    return model(**{name: fields[name].to_python(value) for name, value in row.items()})
+
+
+def export_tryout(tryout, path):
+    """Write all attempts, answers and journal rows of a tryout to path, return the manifest"""
+    digest = hashlib.sha256()
+    counts = {kind: 0 for kind, _ in ARCHIVED_MODELS}
+
+    with gzip.open(path, 'wb') as fh:
+        header = _dump_line({
+            'type': 'header',
+            'version': ARCHIVE_VERSION,
+            'tryout': {'id': tryout.id, 'title': tryout.title, 'publish_time': tryout.publish_time},
+        })
+        digest.update(header)
+        fh.write(header)
+
+        for kind, queryset in _querysets(tryout).items():
+            for row in queryset.values().iterator(chunk_size=2000):
+                line = _dump_line({'type': kind, 'row': row})
+                digest.update(line)
+                fh.write(line)
+                counts[kind] += 1
+
+        manifest = {'type': 'manifest', 'counts': counts, 'sha256': digest.hexdigest()}
+        fh.write(_dump_line(manifest))
+
+    return manifest
+
+
+def read_archive(path):
+    """Read and verify an archive, return (header, records_by_kind, manifest)"""
+    digest = hashlib.sha256()
+    header = manifest = None
+    records = {kind: [] for kind, _ in ARCHIVED_MODELS}
+
+    with gzip.open(path, 'rb') as fh:
+        for line in fh:
+            record = json.loads(line)
+            if record['type'] == 'manifest':
+                manifest = record
+                break
+            digest.update(line)
+            if record['type'] == 'header':
+                header = record
+            else:
+                records[record['type']].append(record['row'])
+
+    if header is None or manifest is None:
+        raise ArchiveError(f'{path}: arsip tidak lengkap (header/manifest hilang)')
+    if digest.hexdigest() != manifest['sha256']:
+        raise ArchiveError(f'{path}: checksum tidak cocok')
+    for kind, rows in records.items():
+        if len(rows) != manifest['counts'][kind]:
+            raise ArchiveError(f'{path}: jumlah baris {kind} tidak cocok')
+
+    return header, records, manifest
+
+
+def verify_against_database(tryout, manifest):
+    """Make sure the archive holds exactly the rows currently in the database"""
+    for kind, queryset in _querysets(tryout).items():
+        db_count = queryset.count()
+        if db_count != manifest['counts'][kind]:
+            raise ArchiveError(
+                f'Jumlah baris {kind} berbeda: database {db_count}, arsip {manifest["counts"][kind]}'
+            )
+
+
+@transaction.atomic
+def purge_tryout_answers(tryout, records, manifest):
+    """
+    Delete the answer and journal rows listed in an archive, keeping
+    ParticipantTryout with its score summary. The database check runs in the
+    same transaction and only archived pks are deleted, so rows written after
+    the export (attempts still running with --force) are never lost.
+    """
+    verify_against_database(tryout, manifest)
+    querysets = _querysets(tryout)
+    deleted = {}
+    for kind in ('journal', 'answer'):
+        ids = [row['id'] for row in records[kind]]
+        deleted[kind] = 0
+        for start in range(0, len(ids), 2000):
+            deleted[kind] += querysets[kind].filter(pk__in=ids[start:start + 2000]).delete()[0]
+        if deleted[kind] != len(ids):
+            # Baris arsip sudah berubah di database: batalkan seluruh penghapusan
+            raise ArchiveError(f'Baris {kind} terhapus {deleted[kind]}, arsip {len(ids)}')
+    return deleted
+
+
+def vacuum_database():
+    # Tanpa VACUUM, SQLite tidak mengecilkan file setelah DELETE
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
+
+
+@transaction.atomic
+def restore_archive(path):
+    """Load an archive back into the hot tables, return the number of rows per kind"""
+    header, records, manifest = read_archive(path)
+
+    if not Tryout.objects.filter(pk=header['tryout']['id']).exists():
+        raise ArchiveError(f'Try out #{header["tryout"]["id"]} sudah tidak ada di database')
+
+    restored = {}
+    for kind, model in ARCHIVED_MODELS:
+        objs = [_build(model, row) for row in records[kind]]
+        # ignore_conflicts: baris yang masih ada (mis. ParticipantTryout) tidak ditimpa
+        model.objects.bulk_create(objs, batch_size=2000, ignore_conflicts=True)
+
+        # bulk_create mengisi ulang field auto_now/auto_now_add dengan waktu sekarang,
+        # kembalikan timestamp asli dari arsip
+        auto_fields = [
+            f.name for f in model._meta.concrete_fields
+            if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)
+        ]
+        if auto_fields and objs:
+            for obj, row in zip(objs, records[kind]):
+                restored_obj = _build(model, row)
+                for name in auto_fields:
+                    setattr(obj, name, getattr(restored_obj, name))
+            model.objects.bulk_update(objs, auto_fields, batch_size=2000)
+
+        restored[kind] = len(objs)
+    return restored
@@ -0,0 +1,106 @@
+"""
+Signed, session-scoped attempt context for the exam endpoints.
+
+start_tryout puts a token signed with SECRET_KEY into the session that binds
+the user to one attempt (user, participant, attempt and tryout ids). The hot
+endpoints verify that token instead of looking up profile, tryout and
+ParticipantTryout, and read the deadline and finished flag from
+live.attempt_meta(). That metadata is cached per attempt and dropped on
+finish, on reset and when the tryout duration changes; a blocked participant
+is stopped earlier by BlockedUserMiddleware through live.participant_status().
+With SHARED_CACHE and a warm cache, locating and authorizing the attempt costs
+no query; otherwise it costs one indexed lookup of the attempt.
+
+Sessions without a token (older logins, attempts created elsewhere) fall
+back to the database once and get a token for the next request.
+"""
+from dataclasses import dataclass
+
+from django.core import signing
+from django.core.cache import cache
+
+from . import fragments, live
+from .models import Question
+
+SALT = 'exam.attempt-context'
+
+
+def _session_key(tryout_id):
+    return f'exam:attempt:{tryout_id}'
+
+
+@dataclass(frozen=True)
+class AttemptContext:
+    id: int
+    participant_id: int
+    tryout_id: int
+    deadline: float
+    finished: bool
+
+    def remaining_seconds(self, now):
+        return max(int(self.deadline - now.timestamp()), 0)
+
+    def expired(self, now):
+        return now.timestamp() > self.deadline
+
+
+def _store(request, participant_id, attempt_id, tryout_id):
+    token = signing.dumps({'u': request.user.pk, 'p': participant_id, 'a': attempt_id, 't': tryout_id}, salt=SALT)
+    # Hanya tulis kalau berubah: session yang tidak diubah tidak disimpan ulang
+    if request.session.get(_session_key(tryout_id)) != token:
+        request.session[_session_key(tryout_id)] = token
+
+
+def establish(request, participant_tryout):
+    """Store the signed context of participant_tryout in the session"""
+    _store(request, participant_tryout.participant_id, participant_tryout.id, participant_tryout.tryout_id)
+
+
+def _verified(request, tryout_id):
+    token = request.session.get(_session_key(tryout_id))
+    if token is None:
+        return None
+    try:
+        ids = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        return None
+    if ids.get('u') != request.user.pk or ids.get('t') != tryout_id:
+        return None
+    return ids
+
+
+def load(request, tryout_id):
+    """AttemptContext of the user's started attempt on tryout_id, or None"""
+    ids = _verified(request, tryout_id)
+    if ids is not None:
+        meta = live.attempt_meta(ids['p'], tryout_id)
+        # Attempt di-reset/dihapus sejak token dibuat: anggap belum mulai
+        if meta is None or meta['id'] != ids['a']:
+            request.session.pop(_session_key(tryout_id), None)
+            return None
+        participant_id = ids['p']
+    else:
+        status = live.request_status(request)
+        if status is None:
+            return None
+        participant_id = status['id']
+        meta = live.attempt_meta(participant_id, tryout_id)
+        if meta is None:
+            return None
+        _store(request, participant_id, meta['id'], tryout_id)
+    return AttemptContext(
+        id=meta['id'], participant_id=participant_id, tryout_id=tryout_id,
+        deadline=meta['deadline'], finished=meta['finished'],
+    )
+
+
+def question_ids(tryout_id):
+    """Ids of the tryout's questions, cached until a question changes (fragment version)"""
+    if not fragments.cache_seconds():
+        return frozenset(Question.objects.filter(tryout_id=tryout_id).values_list('id', flat=True))
+    key = f'exam:question-ids:{tryout_id}:{fragments.version(tryout_id)}'
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Question.objects.filter(tryout_id=tryout_id).values_list('id', flat=True))
+        cache.set(key, ids, timeout=fragments.cache_seconds())
+    return ids
@@ -0,0 +1,108 @@
+"""
+Bulk participant actions over a filtered selection (day, school, tryout).
+
+Actions run in chunks of BULK_CHUNK_SIZE participants, one transaction per
+chunk, with set-based UPDATE / DELETE statements: answer and journal rows of
+a chunk are removed with one DELETE ... WHERE participant_tryout_id IN (...)
+each instead of Django's per-object cascade. progress(done, total) is called
+after every chunk. Cached state that depends on the deleted rows (attempt
+metadata, live counters, dashboard totals) and the cached
+blocked flag of every touched participant are dropped as well.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+
+from . import live
+from .models import ParticipantProfile, ParticipantTryout, ParticipantAnswer, AnswerJournal
+
+ACTIONS = (
+    ('block', 'Blokir'),
+    ('unblock', 'Buka blokir'),
+    ('reset', 'Reset attempt'),
+    ('delete', 'Hapus peserta'),
+)
+
+
+def select_participants(day=None, school=None, tryout_id=None):
+    """Participants matching the filters; tryout_id keeps those with an attempt on it"""
+    participants = ParticipantProfile.objects.all()
+    if day:
+        participants = participants.filter(day=day)
+    if school:
+        participants = participants.filter(school__iexact=school)
+    if tryout_id:
+        participants = participants.filter(participanttryout__tryout_id=tryout_id)
+    return participants.order_by('pk')
+
+
+def _delete_attempts(participant_ids, tryout_id=None):
+    """Delete attempts with their answers and journal, return (rows per kind, deleted attempts)"""
+    attempts = ParticipantTryout.objects.filter(participant_id__in=participant_ids)
+    if tryout_id:
+        attempts = attempts.filter(tryout_id=tryout_id)
+    pairs = list(attempts.values_list('id', 'participant_id', 'tryout_id'))
+    if not pairs:
+        return {}, []
+
+    attempt_ids = [attempt_id for attempt_id, _, _ in pairs]
+    # Tanpa relasi turunan / signal, delete() menjadi satu DELETE langsung tanpa memuat baris
+    deleted = {
+        'journal': AnswerJournal.objects.filter(participant_tryout_id__in=attempt_ids).delete()[0],
+        'answer': ParticipantAnswer.objects.filter(participant_tryout_id__in=attempt_ids).delete()[0],
+    }
+    deleted['attempt'] = ParticipantTryout.objects.filter(pk__in=attempt_ids).delete()[0]
+    return deleted, pairs
+
+
+def _run_chunk(action, participant_ids, user_ids, tryout_id):
+    if action in ('block', 'unblock'):
+        updated = ParticipantProfile.objects.filter(pk__in=participant_ids).update(blocked=action == 'block')
+        return {'participant': updated}, []
+
+    # Peserta yang dihapus kehilangan semua attempt, bukan hanya attempt try out terpilih
+    deleted, attempts = _delete_attempts(participant_ids, tryout_id if action == 'reset' else None)
+    if action == 'delete':
+        deleted['participant'] = ParticipantProfile.objects.filter(pk__in=participant_ids).delete()[0]
+        # User terakhir: relasi lain (session admin, log) tetap ditangani Django
+        User.objects.filter(pk__in=user_ids).delete()
+    return deleted, attempts
+
+
+def run(action, participants, tryout_id=None, chunk_size=None, progress=None):
+    """
+    Apply action ('block', 'unblock', 'reset', 'delete') to a participant
+    queryset or id list; 'reset' only touches tryout_id when given. Returns
+    {'participants': n, 'rows': {kind: count}}.
+    """
+    if action not in dict(ACTIONS):
+        raise ValueError(f'Aksi tidak dikenal: {action}')
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    if isinstance(participants, QuerySet):
+        participants = participants.values_list('pk', flat=True)
+    # Daftar id diambil di depan supaya chunk tidak bergeser saat baris dihapus
+    participant_ids = list(participants)
+    total = len(participant_ids)
+
+    rows = {}
+    tryout_ids = set()
+    for start in range(0, total, chunk_size):
+        chunk = participant_ids[start:start + chunk_size]
+        user_ids = list(ParticipantProfile.objects.filter(pk__in=chunk).values_list('user_id', flat=True))
+        with transaction.atomic():
+            deleted, attempts = _run_chunk(action, chunk, user_ids, tryout_id)
+        # update() dan DELETE langsung tidak memicu signal: buang status blokir & metadata attempt di cache
+        live.forget_participants(user_ids)
+        live.forget_attempts(attempts)
+        for kind, count in deleted.items():
+            rows[kind] = rows.get(kind, 0) + count
+        tryout_ids.update(attempt[2] for attempt in attempts)
+        if progress is not None:
+            progress(min(start + chunk_size, total), total)
+
+    if tryout_ids:
+        live.reconcile(sorted(tryout_ids))
+    if action == 'delete':
+        live.invalidate_totals()
+    return {'participants': total, 'rows': rows}
@@ -1,4 +1,5 @@
 from django import forms
+from . import media
 from .models import Tryout, Question
 from django.forms import inlineformset_factory
 
@@ -16,7 +17,19 @@ class TryoutForm(forms.ModelForm):
             'subjects': forms.TextInput(attrs={'placeholder': 'Matematika · Fisika · Kimia'}),
         }
 
+def _image_field():
+    return forms.FileField(required=False, widget=forms.FileInput(attrs={'accept': 'image/*'}))
+
 class QuestionForm(forms.ModelForm):
+    # Gambar opsional untuk soal dan tiap pilihan; upload baru menggantikan yang lama
+    image_q = _image_field()
+    image_a = _image_field()
+    image_b = _image_field()
+    image_c = _image_field()
+    image_d = _image_field()
+
+    IMAGE_SLOTS = {'image_q': 'Q', 'image_a': 'A', 'image_b': 'B', 'image_c': 'C', 'image_d': 'D'}
+
     class Meta:
         model = Question
         fields = ['number', 'text', 'option_a', 'option_b',
@@ -25,6 +38,25 @@ class QuestionForm(forms.ModelForm):
             'text': forms.Textarea(attrs={'rows': 3}),
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        for field in self.IMAGE_SLOTS:
+            upload = cleaned_data.get(field)
+            if upload and upload.size > 5 * 1024 * 1024:
+                self.add_error(field, 'Ukuran gambar maksimal 5 MB.')
+            elif upload and media.image_extension(upload) is None:
+                self.add_error(field, 'File harus gambar PNG, JPEG, GIF atau WebP.')
+        return cleaned_data
+
+    def save(self, commit=True):
+        question = super().save(commit=commit)
+        if commit:
+            for field, slot in self.IMAGE_SLOTS.items():
+                upload = self.cleaned_data.get(field)
+                if upload:
+                    media.attach(question, slot, upload)
+        return question
+
 QuestionFormSet = inlineformset_factory(
     Tryout,
     Question,
@@ -0,0 +1,47 @@
+"""
+Version numbers for cached template fragments.
+
+Templates key {% cache %} blocks (tryout cards, the question paper) on the
+tryout's fragment version, so saving a tryout or one of its questions makes
+every cached fragment of that tryout stale at once without deleting keys.
+
+A bump only reaches the workers that share the cache, so without SHARED_CACHE
+(per-process LocMem) nothing keyed on a version is cached: cache_seconds()
+is 0 and the version-keyed lookups go to the database every time.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _key(tryout_id):
+    return f'fragments:tryout:{tryout_id}'
+
+
+def versions(tryout_ids):
+    """{tryout_id: version} for the given tryouts, in one cache round trip"""
+    keys = {_key(tryout_id): tryout_id for tryout_id in tryout_ids}
+    found = cache.get_many(list(keys))
+    result = {keys[key]: version for key, version in found.items()}
+
+    missing = {_key(tryout_id): 1 for tryout_id in tryout_ids if tryout_id not in result}
+    if missing:
+        # add, bukan set: jangan menimpa versi yang baru saja dinaikkan worker lain
+        for key in missing:
+            cache.add(key, 1, timeout=None)
+        result.update({keys[key]: version for key, version in cache.get_many(list(missing)).items()})
+    return result
+
+
+def version(tryout_id):
+    return versions([tryout_id]).get(tryout_id, 1)
+
+
+def cache_seconds():
+    """Timeout for entries keyed on a fragment version, 0 (not cached) without SHARED_CACHE"""
+    return settings.FRAGMENT_CACHE_SECONDS if settings.SHARED_CACHE else 0
+
+
+def bump(tryout_id):
+    cache.set(_key(tryout_id), time.time_ns(), timeout=None)
@@ -0,0 +1,44 @@
+"""Set-based score adjustments when the answer key or question scores change."""
+from django.db import transaction
+from django.db.models import F, Q
+
+from . import answers
+from .models import ParticipantTryout, ParticipantAnswer
+
+
+def _scored_attempts(tryout_id):
+    # Hanya attempt yang sudah dinilai; attempt lain dinilai saat submit dengan kunci terbaru
+    return ParticipantTryout.objects.filter(tryout_id=tryout_id, score__isnull=False)
+
+
+def _answered(tryout_id, question_id, number, option):
+    answered = Q(id__in=ParticipantAnswer.objects.filter(question_id=question_id, selected_option=option)
+                 .values('participant_tryout'))
+    # Attempt dengan vektor jawaban packed dicocokkan lewat byte nomor soal
+    if number is not None:
+        answered |= Q(id__in=answers.packed_answered(tryout_id, number, option))
+    return answered
+
+
+@transaction.atomic
+def apply_question_delta(tryout_id, question_id, old=None, new=None, number=None):
+    """
+    Adjust stored scores for one question. old/new are (correct_option, score)
+    tuples, or None when the question is being added or removed. Only the
+    delta is applied, in at most three UPDATE statements. number is the
+    question number, needed to regrade packed attempts.
+    """
+    if old == new:
+        return
+    attempts = _scored_attempts(tryout_id)
+
+    if old is not None:
+        old_correct, old_score = old
+        attempts.filter(_answered(tryout_id, question_id, number, old_correct)).update(score=F('score') - old_score)
+    if new is not None:
+        new_correct, new_score = new
+        attempts.filter(_answered(tryout_id, question_id, number, new_correct)).update(score=F('score') + new_score)
+
+    max_delta = (new[1] if new else 0.0) - (old[1] if old else 0.0)
+    if max_delta:
+        attempts.filter(max_score__isnull=False).update(max_score=F('max_score') + max_delta)
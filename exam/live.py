@@ -0,0 +1,249 @@
+"""
+Live exam counters kept in the shared cache.
+
+Views call the record_* helpers right after the matching database write, so
+the dashboard can read started / in progress / finished / out-of-app numbers
+without counting rows. Counters are reconciled against the database every
+LIVE_COUNTERS_RECONCILE_SECONDS, or immediately when a key is missing.
+
+The same cache also holds per-attempt metadata (deadline, finished flag),
+the participant status read by BlockedUserMiddleware and heartbeat presence
+for the exam heartbeat endpoint. Metadata and status are only cached when
+SHARED_CACHE is set: with a per-process cache a block or submit on one worker
+would not reach the others, so every call reads the database instead.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import ParticipantProfile, Tryout, ParticipantTryout
+
+RECONCILE_KEY = 'live:reconciled_at'
+ACTIVE_KEY = 'live:active_tryouts'
+TOTALS_KEY = 'live:totals'
+
+
+def _key(tryout_id, name):
+    return f'live:{tryout_id}:{name}'
+
+
+def reconcile(tryout_ids=None):
+    """Recompute started/finished/out counters from the primary database"""
+    # Juga dipanggil dari view @replica_reads: replica yang basi akan menimpa increment terbaru
+    attempts = ParticipantTryout.objects.using('default')
+    if tryout_ids is not None:
+        attempts = attempts.filter(tryout_id__in=tryout_ids)
+    rows = attempts.values('tryout_id').annotate(
+        started=Count('id', filter=Q(started_at__isnull=False)),
+        finished=Count('id', filter=Q(is_finished=True)),
+        out=Count('id', filter=Q(is_finished=False, out_since__isnull=False)),
+    )
+
+    values = {}
+    for tryout_id in tryout_ids or []:
+        values[_key(tryout_id, 'started')] = 0
+        values[_key(tryout_id, 'finished')] = 0
+        values[_key(tryout_id, 'out')] = 0
+    for row in rows:
+        values[_key(row['tryout_id'], 'started')] = row['started']
+        values[_key(row['tryout_id'], 'finished')] = row['finished']
+        values[_key(row['tryout_id'], 'out')] = row['out']
+    cache.set_many(values, timeout=None)
+
+    if tryout_ids is None:
+        cache.set(RECONCILE_KEY, timezone.now().timestamp(), timeout=None)
+
+
+def _incr(tryout_id, name):
+    try:
+        cache.incr(_key(tryout_id, name))
+    except ValueError:
+        # Key belum ada (cache baru / restart): ambil dari DB, sudah termasuk event ini
+        reconcile([tryout_id])
+
+
+def _decr(tryout_id, name):
+    try:
+        cache.decr(_key(tryout_id, name))
+    except ValueError:
+        reconcile([tryout_id])
+
+
+def record_started(tryout_id):
+    _incr(tryout_id, 'started')
+
+
+def record_finished(participant_tryout):
+    _incr(participant_tryout.tryout_id, 'finished')
+    # Attempt selesai tidak dihitung keluar lagi (reconcile hanya menghitung yang belum selesai)
+    if participant_tryout.out_since is not None:
+        _decr(participant_tryout.tryout_id, 'out')
+    forget_attempt(participant_tryout.participant_id, participant_tryout.tryout_id)
+
+
+def record_out(participant_tryout):
+    """Count an out-of-app event; the live counter only moves when the attempt was in the exam tab"""
+    # out_since disimpan di DB (bukan penanda di cache) supaya reconcile() bisa membangun ulang penghitung
+    attempts = ParticipantTryout.objects.filter(pk=participant_tryout.id)
+    left = attempts.filter(is_finished=False, out_since__isnull=True).update(
+        out_of_app_count=F('out_of_app_count') + 1, out_since=timezone.now(),
+    )
+    if left:
+        _incr(participant_tryout.tryout_id, 'out')
+    else:
+        # Event out ganda: hanya jumlah pelanggaran yang bertambah
+        attempts.update(out_of_app_count=F('out_of_app_count') + 1)
+
+
+def record_back(participant_tryout):
+    back = ParticipantTryout.objects.filter(
+        pk=participant_tryout.id, is_finished=False, out_since__isnull=False,
+    ).update(out_since=None)
+    if back:
+        _decr(participant_tryout.tryout_id, 'out')
+
+
+# ============ ATTEMPT METADATA & PRESENCE ============
+
+def _tryout_version(tryout_id):
+    return cache.get_or_set(f'live:tryout-version:{tryout_id}', 1, timeout=None)
+
+
+def bump_tryout_version(tryout_id):
+    """Invalidate cached attempt metadata of a tryout (e.g. after a duration change)"""
+    cache.set(f'live:tryout-version:{tryout_id}', time.time_ns(), timeout=None)
+
+
+def _attempt_key(participant_id, tryout_id):
+    return f'live:attempt:{tryout_id}:{_tryout_version(tryout_id)}:{participant_id}'
+
+
+def attempt_meta(participant_id, tryout_id):
+    """
+    Cached {'id', 'deadline', 'finished'} of an attempt, or None when the
+    participant has not started it. deadline is a POSIX timestamp.
+    """
+    key = _attempt_key(participant_id, tryout_id) if settings.SHARED_CACHE else None
+    meta = cache.get(key) if key else None
+    if meta is None:
+        pt = (
+            ParticipantTryout.objects.filter(participant_id=participant_id, tryout_id=tryout_id)
+            .select_related('tryout')
+            .only('id', 'started_at', 'is_finished', 'tryout__work_time_minutes')
+            .first()
+        )
+        if pt is None or pt.started_at is None:
+            return None
+        deadline = pt.started_at + timedelta(minutes=pt.tryout.work_time_minutes)
+        meta = {'id': pt.id, 'deadline': deadline.timestamp(), 'finished': pt.is_finished}
+        if key:
+            cache.set(key, meta, timeout=settings.LIVE_ATTEMPT_CACHE_SECONDS)
+    return meta
+
+
+def participant_status(user_id):
+    """Cached {'id', 'day', 'blocked'} of the user's participant profile, None for staff"""
+    key = f'live:participant:{user_id}' if settings.SHARED_CACHE else None
+    status = cache.get(key) if key else None
+    if status is None:
+        # {} juga di-cache: staff tidak punya profil, jangan query ulang tiap request
+        status = ParticipantProfile.objects.filter(user_id=user_id).values('id', 'day', 'blocked').first() or {}
+        if key:
+            cache.set(key, status, timeout=settings.LIVE_ATTEMPT_CACHE_SECONDS)
+    return status or None
+
+
+def request_status(request):
+    """participant_status of the request's user, looked up once per request"""
+    # BlockedUserMiddleware mengisi ini lebih dulu; view cukup memakai ulang
+    if not hasattr(request, '_participant_status'):
+        request._participant_status = participant_status(request.user.pk)
+    return request._participant_status
+
+
+def forget_participants(user_ids):
+    """Drop cached participant status (blocked flag) after a block, unblock or delete"""
+    cache.delete_many([f'live:participant:{user_id}' for user_id in user_ids])
+
+
+def forget_attempt(participant_id, tryout_id):
+    cache.delete(_attempt_key(participant_id, tryout_id))
+
+
+def forget_attempts(attempts):
+    """Drop all cached state of deleted attempts, given (id, participant_id, tryout_id) tuples"""
+    versions = {}
+    keys = []
+    for attempt_id, participant_id, tryout_id in attempts:
+        if tryout_id not in versions:
+            versions[tryout_id] = _tryout_version(tryout_id)
+        keys.append(f'live:attempt:{tryout_id}:{versions[tryout_id]}:{participant_id}')
+        keys.append(f'live:seen:{attempt_id}')
+    cache.delete_many(keys)
+
+
+def record_seen(participant_tryout_id):
+    """Mark an attempt as online; the database is written at most once per interval"""
+    now = timezone.now()
+    cache.set(f'live:seen:{participant_tryout_id}', now.timestamp(), timeout=settings.LIVE_ONLINE_SECONDS)
+    if cache.add(f'live:seen-flush:{participant_tryout_id}', 1, timeout=settings.LIVE_PRESENCE_WRITE_SECONDS):
+        ParticipantTryout.objects.filter(pk=participant_tryout_id).update(last_seen_at=now)
+
+
+def online_attempt_ids(participant_tryout_ids):
+    """Subset of the given attempt ids that sent a heartbeat recently"""
+    keys = {f'live:seen:{pk}': pk for pk in participant_tryout_ids}
+    return {keys[key] for key in cache.get_many(list(keys))}
+
+
+def active_tryout_ids():
+    ids = cache.get(ACTIVE_KEY)
+    if ids is None:
+        ids = list(
+            Tryout.objects.filter(is_published=True, publish_time__lte=timezone.now())
+            .values_list('id', flat=True)
+        )
+        cache.set(ACTIVE_KEY, ids, timeout=settings.LIVE_COUNTERS_RECONCILE_SECONDS)
+    return ids
+
+
+def totals():
+    """Participant / tryout totals for the dashboard, cached for a short while"""
+    data = cache.get(TOTALS_KEY)
+    if data is None:
+        data = {
+            'total_participants': ParticipantProfile.objects.count(),
+            'total_tryouts': Tryout.objects.count(),
+            'active_tryouts': len(active_tryout_ids()),
+        }
+        cache.set(TOTALS_KEY, data, timeout=settings.LIVE_COUNTERS_RECONCILE_SECONDS)
+    return data
+
+
+def invalidate_totals():
+    cache.delete(TOTALS_KEY)
+
+
+def counters():
+    """Live counters summed over the active tryouts"""
+    reconciled_at = cache.get(RECONCILE_KEY)
+    if reconciled_at is None or timezone.now().timestamp() - reconciled_at > settings.LIVE_COUNTERS_RECONCILE_SECONDS:
+        reconcile()
+
+    ids = active_tryout_ids()
+    keys = [_key(tryout_id, name) for tryout_id in ids for name in ('started', 'finished', 'out')]
+    values = cache.get_many(keys)
+
+    started = sum(values.get(_key(i, 'started'), 0) for i in ids)
+    finished = sum(values.get(_key(i, 'finished'), 0) for i in ids)
+    out = sum(max(values.get(_key(i, 'out'), 0), 0) for i in ids)
+    return {
+        'started': started,
+        'in_progress': max(started - finished, 0),
+        'finished': finished,
+        'out_of_app': out,
+    }
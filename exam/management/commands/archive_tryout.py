@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from exam.archive import (
+    ArchiveError, export_tryout, read_archive, verify_against_database,
+    purge_tryout_answers, vacuum_database,
+)
+from exam.models import Tryout, ParticipantTryout
+
+
+class Command(BaseCommand):
+    help = 'Arsipkan jawaban try out yang sudah selesai ke file .jsonl.gz lalu hapus dari tabel aktif'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tryout_id', type=int)
+        parser.add_argument('--output-dir', default=str(Path(settings.BASE_DIR) / 'archives'))
+        parser.add_argument('--keep', action='store_true', help='Hanya ekspor, jangan hapus baris')
+        parser.add_argument('--vacuum', action='store_true', help='Jalankan VACUUM setelah hapus (mengunci DB)')
+        parser.add_argument('--force', action='store_true', help='Arsipkan walaupun masih ada attempt yang belum selesai')
+
+    def handle(self, *args, **options):
+        try:
+            tryout = Tryout.objects.get(pk=options['tryout_id'])
+        except Tryout.DoesNotExist:
+            raise CommandError('Try out tidak ditemukan.')
+
+        unfinished = ParticipantTryout.objects.filter(tryout=tryout, is_finished=False).count()
+        if unfinished and not options['force']:
+            raise CommandError(f'Masih ada {unfinished} peserta yang belum selesai. Gunakan --force.')
+
+        output_dir = Path(options['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+        path = output_dir / f'tryout-{tryout.pk}-{stamp}.jsonl.gz'
+
+        manifest = export_tryout(tryout, path)
+        try:
+            # Baca ulang dari disk: checksum + jumlah baris harus cocok dengan database
+            _, records, reread = read_archive(path)
+            if reread['sha256'] != manifest['sha256']:
+                raise ArchiveError('Checksum berubah setelah ditulis')
+            verify_against_database(tryout, manifest)
+        except ArchiveError as e:
+            raise CommandError(f'Verifikasi arsip gagal, data tidak dihapus: {e}')
+
+        counts = ', '.join(f'{kind}={count}' for kind, count in manifest['counts'].items())
+        self.stdout.write(f'Arsip ditulis ke {path} ({counts}, sha256={manifest["sha256"][:12]}…)')
+
+        if options['keep']:
+            return
+
+        try:
+            deleted = purge_tryout_answers(tryout, records, manifest)
+        except ArchiveError as e:
+            raise CommandError(f'Data berubah setelah diekspor, tidak ada baris yang dihapus: {e}')
+        self.stdout.write(f'Baris dihapus: answer={deleted["answer"]}, journal={deleted["journal"]}')
+        if options['vacuum']:
+            vacuum_database()
+            self.stdout.write('VACUUM selesai.')
+        self.stdout.write(self.style.SUCCESS('Selesai. Skor peserta tetap tersimpan di ParticipantTryout.'))
@@ -0,0 +1,74 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from exam.models import ParticipantTryout
+from exam.seed import seed
+
+
+def _templates(cached_loader):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    if cached_loader:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    templates[0]['APP_DIRS'] = False
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+class Command(BaseCommand):
+    help = 'Bandingkan waktu render halaman peserta: tanpa cache vs cached loader + fragment cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tryouts', type=int, default=12)
+        parser.add_argument('--questions', type=int, default=100, help='Jumlah soal per try out')
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        # Data benchmark dibuat di dalam transaksi lalu di-rollback, database tidak berubah
+        with transaction.atomic():
+            data = seed(participants=1, tryouts=options['tryouts'], questions=options['questions'],
+                        attempts=0, prefix='benchrender')
+            profile = data['participants'][0]
+            tryout = data['tryouts'][0]
+            ParticipantTryout.objects.create(participant=profile, tryout=tryout, started_at=timezone.now())
+
+            client = Client()
+            client.force_login(profile.user)
+            urls = {
+                'tryout_list': reverse('exam:tryout_list'),
+                'take_exam': reverse('exam:take_exam', args=[tryout.id]),
+            }
+
+            self.stdout.write(f'Iterasi: {options["iterations"]}, {options["questions"]} soal per try out')
+            results = {}
+            for label, cached in (('tanpa cache', False), ('dengan cache', True)):
+                fragment_seconds = settings.FRAGMENT_CACHE_SECONDS if cached else 0
+                # Satu proses: LocMem di sini memang dipakai bersama oleh semua request benchmark
+                with override_settings(TEMPLATES=_templates(cached), FRAGMENT_CACHE_SECONDS=fragment_seconds,
+                                       SHARED_CACHE=cached):
+                    cache.clear()
+                    for name, url in urls.items():
+                        client.get(url)  # pemanasan: parse template / isi fragment cache
+                        start = time.perf_counter()
+                        for _ in range(options['iterations']):
+                            client.get(url)
+                        elapsed = (time.perf_counter() - start) / options['iterations'] * 1000
+                        results[label, name] = elapsed
+                        self.stdout.write(f'{label:13}  {name:12} {elapsed:8.2f} ms/request')
+
+            transaction.set_rollback(True)
+
+        for name in urls:
+            speedup = results['tanpa cache', name] / results['dengan cache', name]
+            self.stdout.write(self.style.SUCCESS(f'{name}: {speedup:.1f}x lebih cepat'))
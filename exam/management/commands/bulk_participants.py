@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exam import bulk
+from exam.models import Tryout
+
+
+class Command(BaseCommand):
+    help = 'Blokir / buka blokir / reset attempt / hapus peserta secara massal berdasarkan hari, sekolah atau try out'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=[name for name, _ in bulk.ACTIONS])
+        parser.add_argument('--day', type=int)
+        parser.add_argument('--school')
+        parser.add_argument('--tryout', type=int, help='Hanya peserta yang punya attempt di try out ini')
+        parser.add_argument('--chunk-size', type=int, help='Peserta per transaksi (default BULK_CHUNK_SIZE)')
+        parser.add_argument('--yes', action='store_true', help='Jalankan tanpa konfirmasi')
+
+    def handle(self, *args, **options):
+        if not (options['day'] or options['school'] or options['tryout']):
+            raise CommandError('Pilih minimal satu filter: --day, --school atau --tryout.')
+        if options['tryout'] and not Tryout.objects.filter(pk=options['tryout']).exists():
+            raise CommandError('Try out tidak ditemukan.')
+
+        participants = bulk.select_participants(options['day'], options['school'], options['tryout'])
+        total = participants.count()
+        if not total:
+            self.stdout.write('Tidak ada peserta yang cocok.')
+            return
+        if not options['yes']:
+            answer = input(f'{options["action"]} {total} peserta? [y/N] ')
+            if answer.strip().lower() != 'y':
+                raise CommandError('Dibatalkan.')
+
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} peserta')
+
+        result = bulk.run(
+            options['action'], participants, tryout_id=options['tryout'],
+            chunk_size=options['chunk_size'], progress=progress,
+        )
+        rows = ', '.join(f'{kind}={count}' for kind, count in sorted(result['rows'].items())) or '-'
+        self.stdout.write(self.style.SUCCESS(f'Selesai: {result["participants"]} peserta ({rows}).'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exam.answers import convert
+from exam.models import Tryout
+
+
+class Command(BaseCommand):
+    help = 'Ubah jawaban attempt try out dari baris ParticipantAnswer ke vektor packed (atau sebaliknya)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tryout_id', type=int)
+        parser.add_argument('--unpack', action='store_true', help='Kembalikan vektor packed menjadi baris')
+
+    def handle(self, *args, **options):
+        try:
+            tryout = Tryout.objects.get(pk=options['tryout_id'])
+        except Tryout.DoesNotExist:
+            raise CommandError('Try out tidak ditemukan.')
+
+        converted = convert(tryout.pk, packed=not options['unpack'])
+        target = 'baris' if options['unpack'] else 'packed'
+        self.stdout.write(self.style.SUCCESS(f'{converted} attempt diubah ke {target}.'))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exam.media import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Worker: buat varian gambar soal (resize + kompresi WebP) untuk upload baru'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=50, help='Jumlah gambar per putaran')
+        parser.add_argument('--loop', action='store_true', help='Terus berjalan, cek upload baru berkala')
+        parser.add_argument('--interval', type=float, default=5, help='Jeda antar putaran saat --loop (detik)')
+
+    def handle(self, *args, **options):
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise CommandError('Pillow belum terpasang: pip install Pillow')
+
+        while True:
+            processed = process_pending(limit=options['limit'], stdout=self.stdout)
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'{processed} gambar diproses'))
+            if not options['loop']:
+                break
+            if processed < options['limit']:
+                time.sleep(options['interval'])
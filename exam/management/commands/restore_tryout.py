@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exam.archive import ArchiveError, restore_archive
+
+
+class Command(BaseCommand):
+    help = 'Muat kembali arsip try out (.jsonl.gz) ke tabel aktif'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+
+    def handle(self, *args, **options):
+        try:
+            restored = restore_archive(options['path'])
+        except (ArchiveError, OSError) as e:
+            raise CommandError(str(e))
+
+        counts = ', '.join(f'{kind}={count}' for kind, count in restored.items())
+        self.stdout.write(self.style.SUCCESS(f'Arsip dimuat ({counts}).'))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exam.seed import seed
+
+
+class Command(BaseCommand):
+    help = 'Buat data sintetis (peserta, try out, soal, jawaban) untuk load test'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=10000)
+        parser.add_argument('--tryouts', type=int, default=24)
+        parser.add_argument('--questions', type=int, default=100, help='Jumlah soal per try out')
+        parser.add_argument('--attempts', type=int, default=None,
+                            help='Jumlah peserta per try out yang mengerjakan (default: semua)')
+        parser.add_argument('--answer-ratio', type=float, default=0.9)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed', help='Prefix username peserta sintetis')
+        parser.add_argument('--packed', action='store_true',
+                            help='Simpan jawaban sebagai vektor packed di ParticipantTryout')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        seed(
+            participants=options['participants'],
+            tryouts=options['tryouts'],
+            questions=options['questions'],
+            attempts=options['attempts'],
+            answer_ratio=options['answer_ratio'],
+            chunk_size=options['chunk_size'],
+            prefix=options['prefix'],
+            packed=options['packed'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Selesai dalam {time.perf_counter() - started:.1f} detik'))
@@ -0,0 +1,130 @@
+"""
+Question images: content-addressed storage and the resize worker.
+
+Uploads are only hashed and written in the request (store_upload); the same
+file uploaded for several tryouts maps to one MediaAsset. The file type comes
+from the leading magic bytes, not the upload name, and anything that is not
+PNG, JPEG, GIF or WebP is refused. Resizing into
+MEDIA_VARIANT_WIDTHS happens later in process_pending(), run by
+'manage.py process_media'. Paths contain the content hash, so files never
+change and are served with immutable cache headers (see media_asset view).
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+
+from . import fragments
+from .models import MediaAsset, QuestionAttachment
+
+# (offset, magic bytes, ekstensi); WebP = 'RIFF' ukuran 'WEBP'
+SIGNATURES = (
+    (0, b'\x89PNG\r\n\x1a\n', '.png'),
+    (0, b'\xff\xd8\xff', '.jpg'),
+    (0, b'GIF87a', '.gif'),
+    (0, b'GIF89a', '.gif'),
+    (8, b'WEBP', '.webp'),
+)
+
+
+def _path(digest, suffix):
+    return f'assets/{digest[:2]}/{digest}{suffix}'
+
+
+def image_extension(uploaded_file):
+    """Extension matching the file's magic bytes, or None when it is not a supported image"""
+    uploaded_file.seek(0)
+    head = uploaded_file.read(12)
+    uploaded_file.seek(0)
+    for offset, magic, extension in SIGNATURES:
+        if head[offset:offset + len(magic)] == magic and (offset == 0 or head.startswith(b'RIFF')):
+            return extension
+    return None
+
+
+def store_upload(uploaded_file):
+    """Hash an uploaded image and store it once, return its MediaAsset"""
+    extension = image_extension(uploaded_file)
+    if extension is None:
+        raise ValueError('Bukan gambar PNG, JPEG, GIF atau WebP')
+
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    digest = digest.hexdigest()
+
+    asset = MediaAsset.objects.filter(sha256=digest).first()
+    if asset is not None:
+        return asset
+
+    name = _path(digest, extension)
+    if not default_storage.exists(name):
+        uploaded_file.seek(0)
+        name = default_storage.save(name, uploaded_file)
+    try:
+        with transaction.atomic():
+            return MediaAsset.objects.create(sha256=digest, original=name, size=uploaded_file.size)
+    except IntegrityError:
+        # Upload yang sama bersamaan dari admin lain
+        return MediaAsset.objects.get(sha256=digest)
+
+
+def attach(question, slot, uploaded_file):
+    asset = store_upload(uploaded_file)
+    QuestionAttachment.objects.update_or_create(question=question, slot=slot, defaults={'asset': asset})
+    return asset
+
+
+def _render_variants(asset):
+    from PIL import Image, ImageOps
+
+    with default_storage.open(asset.original, 'rb') as fh:
+        image = Image.open(fh)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    asset.width, asset.height = image.size
+    variants = {}
+    for width in sorted(settings.MEDIA_VARIANT_WIDTHS):
+        # Tidak memperbesar gambar; varian terkecil tetap dibuat sebagai hasil kompresi ulang
+        if width > asset.width and variants:
+            break
+        variant = image.copy()
+        variant.thumbnail((min(width, asset.width), asset.height * 10))
+        buffer = io.BytesIO()
+        variant.save(buffer, 'WEBP', quality=settings.MEDIA_VARIANT_QUALITY, method=4)
+        name = _path(asset.sha256, f'-{variant.width}.webp')
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+        variants[str(variant.width)] = name
+    asset.variants = variants
+
+
+def process_pending(limit=50, stdout=None):
+    """Render variants for up to `limit` pending assets, return how many were processed"""
+    assets = list(MediaAsset.objects.filter(status='pending').order_by('id')[:limit])
+    for asset in assets:
+        try:
+            _render_variants(asset)
+            asset.status = 'ready'
+            asset.error = ''
+        except Exception as exc:  # file rusak / bukan gambar
+            asset.status = 'failed'
+            asset.error = str(exc)[:255]
+        asset.save(update_fields=['width', 'height', 'variants', 'status', 'error'])
+
+        # Naskah yang memakai gambar ini harus dirender ulang dengan srcset baru
+        tryout_ids = (
+            QuestionAttachment.objects.filter(asset=asset)
+            .values_list('question__tryout_id', flat=True).distinct()
+        )
+        for tryout_id in tryout_ids:
+            fragments.bump(tryout_id)
+        if stdout is not None:
+            stdout.write(f'{asset}: {asset.status} {asset.error}'.rstrip())
+    return len(assets)
@@ -2,13 +2,17 @@ from django.shortcuts import redirect
 from django.contrib.auth import logout
 from django.urls import reverse
 
+from . import live
+
 class BlockedUserMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        if request.user.is_authenticated and hasattr(request.user, 'participantprofile'):
-            if request.user.participantprofile.blocked:
+        # Status blokir dari cache (live.participant_status), bukan query profil tiap request
+        if request.user.is_authenticated:
+            status = live.request_status(request)
+            if status is not None and status['blocked']:
                 logout(request)
                 return redirect('/?blocked=true')
         
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-19 17:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0003_participanttryout_max_score_participanttryout_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerJournal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('selected_option', models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D')], max_length=1, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('participant_tryout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exam.participanttryout')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exam.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['participant_tryout', 'question', 'id'], name='exam_answer_partici_4fd1b1_idx')],
+            },
+        ),
+    ]
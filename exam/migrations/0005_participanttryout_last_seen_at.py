@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0004_answerjournal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participanttryout',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
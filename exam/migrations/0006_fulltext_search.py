@@ -0,0 +1,114 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# Indeks full-text SQLite FTS5, disinkronkan lewat trigger supaya bulk_create /
+# update() / admin semuanya ikut terindeks. Database lain memakai fallback LIKE.
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE exam_question_fts USING fts5(
+        text, option_a, option_b, option_c, option_d,
+        content='exam_question', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER exam_question_fts_ai AFTER INSERT ON exam_question BEGIN
+        INSERT INTO exam_question_fts(rowid, text, option_a, option_b, option_c, option_d)
+        VALUES (new.id, new.text, new.option_a, new.option_b, new.option_c, new.option_d);
+    END
+    """,
+    """
+    CREATE TRIGGER exam_question_fts_ad AFTER DELETE ON exam_question BEGIN
+        INSERT INTO exam_question_fts(exam_question_fts, rowid, text, option_a, option_b, option_c, option_d)
+        VALUES ('delete', old.id, old.text, old.option_a, old.option_b, old.option_c, old.option_d);
+    END
+    """,
+    """
+    CREATE TRIGGER exam_question_fts_au AFTER UPDATE ON exam_question BEGIN
+        INSERT INTO exam_question_fts(exam_question_fts, rowid, text, option_a, option_b, option_c, option_d)
+        VALUES ('delete', old.id, old.text, old.option_a, old.option_b, old.option_c, old.option_d);
+        INSERT INTO exam_question_fts(rowid, text, option_a, option_b, option_c, option_d)
+        VALUES (new.id, new.text, new.option_a, new.option_b, new.option_c, new.option_d);
+    END
+    """,
+    "INSERT INTO exam_question_fts(exam_question_fts) VALUES ('rebuild')",
+    """
+    CREATE VIRTUAL TABLE exam_participant_fts USING fts5(
+        full_name, school, username, email,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER exam_participant_fts_ai AFTER INSERT ON exam_participantprofile BEGIN
+        INSERT INTO exam_participant_fts(rowid, full_name, school, username, email)
+        SELECT new.id, new.full_name, new.school, u.username, u.email FROM auth_user u WHERE u.id = new.user_id;
+    END
+    """,
+    """
+    CREATE TRIGGER exam_participant_fts_ad AFTER DELETE ON exam_participantprofile BEGIN
+        DELETE FROM exam_participant_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER exam_participant_fts_au AFTER UPDATE OF full_name, school, user_id ON exam_participantprofile BEGIN
+        DELETE FROM exam_participant_fts WHERE rowid = old.id;
+        INSERT INTO exam_participant_fts(rowid, full_name, school, username, email)
+        SELECT new.id, new.full_name, new.school, u.username, u.email FROM auth_user u WHERE u.id = new.user_id;
+    END
+    """,
+    """
+    CREATE TRIGGER exam_participant_fts_user_au AFTER UPDATE OF username, email ON auth_user BEGIN
+        UPDATE exam_participant_fts SET username = new.username, email = new.email
+        WHERE rowid IN (SELECT id FROM exam_participantprofile WHERE user_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO exam_participant_fts(rowid, full_name, school, username, email)
+    SELECT p.id, p.full_name, p.school, u.username, u.email
+    FROM exam_participantprofile p JOIN auth_user u ON u.id = p.user_id
+    """,
+]
+
+REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS exam_participant_fts_user_au',
+    'DROP TRIGGER IF EXISTS exam_participant_fts_au',
+    'DROP TRIGGER IF EXISTS exam_participant_fts_ad',
+    'DROP TRIGGER IF EXISTS exam_participant_fts_ai',
+    'DROP TABLE IF EXISTS exam_participant_fts',
+    'DROP TRIGGER IF EXISTS exam_question_fts_au',
+    'DROP TRIGGER IF EXISTS exam_question_fts_ad',
+    'DROP TRIGGER IF EXISTS exam_question_fts_ai',
+    'DROP TABLE IF EXISTS exam_question_fts',
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+    except OperationalError:
+        # SQLite tanpa FTS5, pencarian memakai fallback LIKE
+        return
+    for sql in FORWARD_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in REVERSE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0005_participanttryout_last_seen_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
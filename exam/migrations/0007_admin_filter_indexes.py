@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0006_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='participantanswer',
+            index=models.Index(fields=['question', 'selected_option'], name='exam_partic_questio_ca32af_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participanttryout',
+            index=models.Index(fields=['tryout', 'is_finished'], name='exam_partic_tryout__d90e1c_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0008_question_media'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participanttryout',
+            name='packed_answers',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
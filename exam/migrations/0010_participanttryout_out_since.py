@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0009_participanttryout_packed_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participanttryout',
+            name='out_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
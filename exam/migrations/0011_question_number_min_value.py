@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-19 19:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0010_participanttryout_out_since'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='number',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
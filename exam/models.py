@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models import Max
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.validators import MinValueValidator
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 class ParticipantProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -34,7 +38,7 @@ class Tryout(models.Model):
 
 class Question(models.Model):
     tryout = models.ForeignKey(Tryout, on_delete=models.CASCADE, related_name='questions')
-    number = models.PositiveIntegerField()
+    number = models.PositiveIntegerField(validators=[MinValueValidator(1)])  # mulai 1: indeks vektor packed
     text = models.TextField()
     option_a = models.TextField()
     option_b = models.TextField()
@@ -50,6 +54,15 @@ class Question(models.Model):
         ordering = ['number']
         unique_together = ['tryout', 'number']
 
+    @cached_property
+    def media(self):
+        """{slot: MediaAsset} of this question without failed assets; prefetch 'attachments__asset' for lists"""
+        # Gambar yang gagal diproses (file rusak) tidak dirender sebagai <img> kosong
+        return {
+            attachment.slot: attachment.asset for attachment in self.attachments.all()
+            if attachment.asset.status != 'failed'
+        }
+
 class ParticipantTryout(models.Model):
     participant = models.ForeignKey(ParticipantProfile, on_delete=models.CASCADE)
     tryout = models.ForeignKey(Tryout, on_delete=models.CASCADE)
@@ -59,13 +72,23 @@ class ParticipantTryout(models.Model):
     out_of_app_count = models.PositiveIntegerField(default=0)
     score = models.FloatField(null=True, blank=True)         # nilai total
     max_score = models.FloatField(null=True, blank=True)     # total skor maksimum
+    last_seen_at = models.DateTimeField(null=True, blank=True)  # heartbeat terakhir (ditulis berkala)
+    out_since = models.DateTimeField(null=True, blank=True)  # sedang keluar dari tab ujian sejak
+    # Mode ANSWER_STORAGE='packed': 1 byte per nomor soal (A-D, '-' kosong), lihat exam/answers.py
+    packed_answers = models.BinaryField(null=True, blank=True, editable=False)
     
     class Meta:
         unique_together = ['participant', 'tryout']
+        indexes = [models.Index(fields=['tryout', 'is_finished'])]
     
     def __str__(self):
         return f"{self.participant.full_name} - {self.tryout.title}"
 
+    def compact_answer_journal(self):
+        """Write the latest journal entry per question into ParticipantAnswer or packed_answers"""
+        from .answers import compact
+        return compact(self)
+
 class ParticipantAnswer(models.Model):
     participant_tryout = models.ForeignKey(ParticipantTryout, on_delete=models.CASCADE)
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
@@ -74,6 +97,83 @@ class ParticipantAnswer(models.Model):
     
     class Meta:
         unique_together = ['participant_tryout', 'question']
+        indexes = [models.Index(fields=['question', 'selected_option'])]
     
     def __str__(self):
         return f"{self.participant_tryout.participant.full_name} - Q{self.question.number}"
+
+class AnswerJournalQuerySet(models.QuerySet):
+    def latest_for(self, participant_tryout):
+        """Latest journal entry per question of an attempt, in one query"""
+        latest_ids = (
+            self.filter(participant_tryout=participant_tryout)
+            .values('question')
+            .annotate(last_id=Max('id'))
+            .values('last_id')
+        )
+        return self.filter(id__in=latest_ids)
+
+class AnswerJournal(models.Model):
+    """Append-only log of every answer click, compacted into ParticipantAnswer on finish"""
+    participant_tryout = models.ForeignKey(ParticipantTryout, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    selected_option = models.CharField(max_length=1, choices=(('A','A'),('B','B'),('C','C'),('D','D')), null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AnswerJournalQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['participant_tryout', 'question', 'id'])]
+
+    def __str__(self):
+        return f"{self.participant_tryout_id} - Q{self.question_id} - {self.selected_option}"
+
+class MediaAsset(models.Model):
+    """
+    An uploaded image stored once under MEDIA_ROOT by its SHA-256, with
+    resized variants produced by the process_media worker.
+    """
+    STATUS_CHOICES = (('pending', 'Menunggu'), ('ready', 'Siap'), ('failed', 'Gagal'))
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    original = models.CharField(max_length=200)        # path relatif di storage
+    size = models.PositiveIntegerField()
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    variants = models.JSONField(default=dict, blank=True)  # {"lebar": path}
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status'])]
+
+    def __str__(self):
+        return self.sha256[:12]
+
+    def _sorted_variants(self):
+        return sorted((int(width), name) for width, name in self.variants.items())
+
+    @property
+    def url(self):
+        # Selama belum diproses, pakai file asli
+        variants = self._sorted_variants()
+        return default_storage.url(variants[-1][1] if variants else self.original)
+
+    @property
+    def srcset(self):
+        return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in self._sorted_variants())
+
+class QuestionAttachment(models.Model):
+    SLOT_CHOICES = (('Q', 'Soal'), ('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D'))
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='attachments')
+    slot = models.CharField(max_length=1, choices=SLOT_CHOICES)
+    asset = models.ForeignKey(MediaAsset, on_delete=models.PROTECT, related_name='attachments')
+
+    class Meta:
+        unique_together = ['question', 'slot']
+
+    def __str__(self):
+        return f"Q{self.question.number} {self.slot} - {self.asset}"
+
@@ -0,0 +1,126 @@
+"""
+In-process token-bucket rate limiting for the exam AJAX endpoints.
+
+Each (user, endpoint) pair has a bucket of RATE_LIMITS[endpoint]['burst']
+tokens refilled at 'rate' tokens per second. A request without a token gets
+429 with a Retry-After hint; take_exam.html waits and resends only the latest
+answer per question. The check is a dict lookup under a lock, no I/O.
+
+Allowed/limited counters are kept per process and added to the shared cache
+every RATE_LIMIT_FLUSH_SECONDS so staff see totals across workers.
+"""
+import math
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+COUNTER_KEY = 'ratelimit:{endpoint}:{outcome}'
+LIMITED_USERS_KEY = 'ratelimit:limited-users'
+
+
+class TokenBucketLimiter:
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_users = Counter()
+        self._flushed_at = time.monotonic()
+        self._pruned_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._pending.clear()
+            self._pending_users.clear()
+
+    def hit(self, endpoint, user_id, now=None):
+        """Take a token; return 0 when allowed, else seconds until the next token"""
+        rule = settings.RATE_LIMITS[endpoint]
+        rate, burst = rule['rate'], rule['burst']
+        now = time.monotonic() if now is None else now
+        key = (endpoint, user_id)
+
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                self._pending[endpoint, 'allowed'] += 1
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                self._pending[endpoint, 'limited'] += 1
+                self._pending_users[user_id] += 1
+                retry_after = (1 - tokens) / rate
+            flush = now - self._flushed_at >= settings.RATE_LIMIT_FLUSH_SECONDS
+            if now - self._pruned_at >= 60:
+                self._prune(now)
+
+        if flush:
+            self.flush(now)
+        return retry_after
+
+    def _prune(self, now):
+        # Bucket yang sudah penuh lagi tidak perlu disimpan
+        self._pruned_at = now
+        for key, (tokens, updated) in list(self._buckets.items()):
+            rule = settings.RATE_LIMITS[key[0]]
+            if tokens + (now - updated) * rule['rate'] >= rule['burst']:
+                del self._buckets[key]
+
+    def flush(self, now=None):
+        """Add pending counters to the shared cache"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            users, self._pending_users = self._pending_users, Counter()
+            self._flushed_at = time.monotonic() if now is None else now
+
+        for (endpoint, outcome), count in pending.items():
+            key = COUNTER_KEY.format(endpoint=endpoint, outcome=outcome)
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, count)
+        if users:
+            limited = Counter(cache.get(LIMITED_USERS_KEY, {}))
+            limited.update(users)
+            cache.set(LIMITED_USERS_KEY, dict(limited.most_common(50)), timeout=60 * 60 * 6)
+
+
+limiter = TokenBucketLimiter()
+
+
+def counters():
+    """{endpoint: {'allowed', 'limited'}} and the most limited user ids, across workers"""
+    limiter.flush()
+    keys = {
+        COUNTER_KEY.format(endpoint=endpoint, outcome=outcome): (endpoint, outcome)
+        for endpoint in settings.RATE_LIMITS for outcome in ('allowed', 'limited')
+    }
+    values = cache.get_many(list(keys))
+    endpoints = {endpoint: {'allowed': 0, 'limited': 0} for endpoint in settings.RATE_LIMITS}
+    for key, value in values.items():
+        endpoint, outcome = keys[key]
+        endpoints[endpoint][outcome] = value
+    return endpoints, Counter(cache.get(LIMITED_USERS_KEY, {})).most_common(20)
+
+
+def rate_limited(endpoint):
+    """Answer 429 with Retry-After when the user's bucket for endpoint is empty"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            retry_after = limiter.hit(endpoint, request.user.pk)
+            if retry_after:
+                response = JsonResponse(
+                    {'success': False, 'error': 'Terlalu banyak permintaan', 'retry_after': retry_after},
+                    status=429,
+                )
+                response['Retry-After'] = str(math.ceil(retry_after))
+                return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,169 @@
+"""
+Score distribution reports per school and per day, computed in the database.
+
+A report is built from a fixed number of queries regardless of the number of
+attempts: one aggregate per (school, day) group, one histogram count and one
+window-function query per dimension for the percentiles. The result is cached
+under a fingerprint of the scored attempts (count, score sums, last finish)
+read from the same database as the report, so a submit or regrade changes the
+key in every worker, even with a per-process cache, and a report built on a
+lagging replica is replaced once the replica catches up.
+"""
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, FloatField, Max, Min, Q, Sum, Value, Window
+from django.db.models.functions import Cast, Ceil, Floor, Least, RowNumber
+
+from .models import ParticipantTryout
+
+HISTOGRAM_BINS = 10
+PERCENTILES = (25, 50, 75, 90)
+
+# Dimensi laporan: (nama, field pengelompokan)
+DIMENSIONS = (
+    ('school', 'participant__school'),
+    ('day', 'participant__day'),
+)
+
+
+def _scored(tryout_id):
+    return ParticipantTryout.objects.filter(
+        tryout_id=tryout_id, is_finished=True, score__isnull=False,
+    ).order_by()
+
+
+def _key(tryout_id):
+    """Cache key from one aggregate over the scored attempts"""
+    row = _scored(tryout_id).aggregate(
+        n=Count('id'),
+        total=Sum('score'),
+        top=Sum('max_score'),
+        # Regrade bisa memindahkan poin antar peserta tanpa mengubah total; bobot id menangkapnya
+        weighted=Sum(F('score') * F('id')),
+        last=Max('finished_at'),
+    )
+    last = row['last'].timestamp() if row['last'] else 0
+    return f'reports:scores:{tryout_id}:{row["n"]}:{row["total"]}:{row["top"]}:{row["weighted"]}:{last}'
+
+
+def _summary(count, total, total_sq, low, high):
+    mean = total / count
+    # Simpangan baku sampel dari jumlah dan jumlah kuadrat
+    variance = (total_sq - count * mean * mean) / (count - 1) if count > 1 else 0.0
+    return {
+        'count': count,
+        'mean': mean,
+        'stddev': math.sqrt(max(variance, 0.0)),
+        'min': low,
+        'max': high,
+        'histogram': [0] * HISTOGRAM_BINS,
+    }
+
+
+def _group_stats(tryout_id):
+    """Per (school, day) sums, combined in Python into per-school, per-day and overall stats"""
+    rows = (
+        _scored(tryout_id)
+        .values('participant__school', 'participant__day')
+        .annotate(
+            n=Count('id'),
+            total=Sum('score'),
+            total_sq=Sum(F('score') * F('score')),
+            low=Min('score'),
+            high=Max('score'),
+            top=Max('max_score'),
+        )
+    )
+    buckets = {name: {} for name, _ in DIMENSIONS}
+    buckets['all'] = {}
+    max_score = 0.0
+    for row in rows:
+        max_score = max(max_score, row['top'] or 0.0)
+        for name, field in DIMENSIONS + (('all', None),):
+            group = row[field] if field else 'all'
+            acc = buckets[name].setdefault(group, [0, 0.0, 0.0, math.inf, -math.inf])
+            acc[0] += row['n']
+            acc[1] += row['total']
+            acc[2] += row['total_sq']
+            acc[3] = min(acc[3], row['low'])
+            acc[4] = max(acc[4], row['high'])
+
+    stats = {
+        name: {group: _summary(*acc) for group, acc in groups.items()}
+        for name, groups in buckets.items()
+    }
+    return stats, max_score
+
+
+def _histograms(tryout_id, stats):
+    """Histogram of score / max_score in HISTOGRAM_BINS equal bins, per group"""
+    bucket = Least(
+        Floor(Cast('score', FloatField()) * HISTOGRAM_BINS / F('max_score')),
+        Value(HISTOGRAM_BINS - 1.0),
+    )
+    rows = (
+        _scored(tryout_id)
+        .filter(max_score__gt=0)
+        .annotate(bucket=bucket)
+        .values('participant__school', 'participant__day', 'bucket')
+        .annotate(n=Count('id'))
+    )
+    for row in rows:
+        index = max(int(row['bucket']), 0)
+        for name, field in DIMENSIONS + (('all', None),):
+            group = row[field] if field else 'all'
+            stats[name][group]['histogram'][index] += row['n']
+
+
+def _percentiles(tryout_id, field, stats):
+    """Nearest-rank percentiles per group with ROW_NUMBER() / COUNT() windows"""
+    partition = [F(field)] if field else []
+    ranked = _scored(tryout_id).annotate(
+        rank=Window(RowNumber(), partition_by=partition, order_by=F('score').asc()),
+        size=Window(Count('id'), partition_by=partition),
+    )
+    wanted = Q()
+    for p in PERCENTILES:
+        wanted |= Q(rank=Ceil(F('size') * p / 100.0))
+    for row in ranked.filter(wanted).values(field or 'tryout_id', 'rank', 'size', 'score'):
+        group = row[field] if field else 'all'
+        summary = stats[group]
+        for p in PERCENTILES:
+            if row['rank'] == math.ceil(row['size'] * p / 100):
+                summary[f'p{p}'] = row['score']
+
+
+def _build(tryout_id):
+    stats, max_score = _group_stats(tryout_id)
+    if not stats['all']:
+        return {'max_score': 0.0, 'overall': None, 'school': [], 'day': []}
+
+    _histograms(tryout_id, stats)
+    for name, field in DIMENSIONS:
+        _percentiles(tryout_id, field, stats[name])
+    _percentiles(tryout_id, None, stats['all'])
+
+    def rows(groups):
+        return [dict(summary, group=group) for group, summary in sorted(groups.items())]
+
+    return {
+        'max_score': max_score,
+        'overall': dict(stats['all']['all'], group='Semua'),
+        'school': rows(stats['school']),
+        'day': rows(stats['day']),
+    }
+
+
+def score_report(tryout_id):
+    """
+    {'max_score', 'overall', 'school': [...], 'day': [...]} where every group
+    row has count, mean, stddev, min, max, p25/p50/p75/p90 and histogram.
+    """
+    key = _key(tryout_id)
+    report = cache.get(key)
+    if report is None:
+        report = _build(tryout_id)
+        cache.set(key, report, timeout=settings.REPORT_CACHE_SECONDS)
+    return report
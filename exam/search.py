@@ -0,0 +1,58 @@
+"""Full-text search over questions and participants (SQLite FTS5 with a LIKE fallback)."""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+QUESTION_FTS_TABLE = 'exam_question_fts'
+PARTICIPANT_FTS_TABLE = 'exam_participant_fts'
+
+QUESTION_FIELDS = ['text', 'option_a', 'option_b', 'option_c', 'option_d']
+PARTICIPANT_FIELDS = ['full_name', 'school', 'user__username', 'user__email']
+
+_fts_tables = {}
+
+
+def _has_fts(queryset, table):
+    connection = connections[queryset.db]
+    if connection.vendor != 'sqlite':
+        return False
+    key = (connection.alias, str(connection.settings_dict['NAME']))
+    if key not in _fts_tables:
+        _fts_tables[key] = set(connection.introspection.table_names())
+    return table in _fts_tables[key]
+
+
+def fts_query(term):
+    """Turn user input into an FTS5 query: every word must match as a prefix"""
+    words = re.findall(r'\w+', term)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _search(queryset, term, table, fields):
+    term = (term or '').strip()
+    if not term:
+        return queryset
+
+    if _has_fts(queryset, table):
+        query = fts_query(term)
+        if not query:
+            return queryset
+        return queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [query]))
+
+    # Fallback database lain: setiap kata harus ada di salah satu field
+    for word in term.split():
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': word})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def search_questions(queryset, term):
+    return _search(queryset, term, QUESTION_FTS_TABLE, QUESTION_FIELDS)
+
+
+def search_participants(queryset, term):
+    return _search(queryset, term, PARTICIPANT_FTS_TABLE, PARTICIPANT_FIELDS)
@@ -0,0 +1,130 @@
+"""Synthetic data for load tests and query-count benchmarks."""
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .answers import pack
+from .models import ParticipantProfile, Tryout, Question, ParticipantTryout, ParticipantAnswer
+
+OPTIONS = ['A', 'B', 'C', 'D']
+SCHOOLS = ['SMA Negeri 1', 'SMA Negeri 2', 'SMA Kristen', 'SMA Katolik', 'SMA Swasta', 'MA Negeri']
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@transaction.atomic
+def seed(participants=100, tryouts=3, questions=20, attempts=None, answer_ratio=0.9,
+         chunk_size=5000, prefix='seed', packed=False, stdout=None):
+    """
+    Generate participants, tryouts, questions, finished attempts and answers
+    with chunked bulk_create. attempts is the number of participants per
+    tryout that took it (default: everyone). packed stores the answers in
+    ParticipantTryout.packed_answers instead of ParticipantAnswer rows.
+    """
+    rng = random.Random(42)
+    now = timezone.now()
+    # Hash password sekali saja, PBKDF2 untuk 10k user akan makan waktu menit
+    password = 'seedpass'
+    password_hash = make_password(password)
+
+    def log(msg):
+        if stdout is not None:
+            stdout.write(msg)
+
+    offset = User.objects.filter(username__startswith=f'{prefix}_').count()
+    profiles = []
+    for chunk in _chunks(range(offset, offset + participants), chunk_size):
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}_{i}', email=f'{prefix}_{i}@example.com', password=password_hash)
+            for i in chunk
+        ])
+        profiles += ParticipantProfile.objects.bulk_create([
+            ParticipantProfile(
+                user=user,
+                full_name=f'Peserta {user.username}',
+                school=rng.choice(SCHOOLS),
+                day=rng.choice([1, 2]),
+                raw_password=password,
+            )
+            for user in users
+        ])
+    log(f'{len(profiles)} peserta')
+
+    created_tryouts = Tryout.objects.bulk_create([
+        Tryout(
+            title=f'Try Out {prefix} {i + 1}',
+            description='Data sintetis',
+            subjects='Matematika · Fisika · Kimia',
+            publish_time=now - timedelta(days=1),
+            work_time_minutes=120,
+            is_published=True,
+        )
+        for i in range(tryouts)
+    ])
+    log(f'{len(created_tryouts)} try out')
+
+    answer_count = 0
+    for tryout in created_tryouts:
+        tryout_questions = Question.objects.bulk_create([
+            Question(
+                tryout=tryout,
+                number=n,
+                text=f'Soal nomor {n}',
+                option_a='Pilihan A', option_b='Pilihan B',
+                option_c='Pilihan C', option_d='Pilihan D',
+                correct_option=rng.choice(OPTIONS),
+                score=1.0,
+            )
+            for n in range(1, questions + 1)
+        ])
+        max_score = float(len(tryout_questions))
+
+        takers = profiles if attempts is None else profiles[:attempts]
+        for chunk in _chunks(takers, chunk_size):
+            # Pilih jawaban dulu supaya skor attempt bisa langsung diisi
+            selections = [
+                [(q, rng.choice(OPTIONS)) for q in tryout_questions if rng.random() < answer_ratio]
+                for _ in chunk
+            ]
+            pts = ParticipantTryout.objects.bulk_create([
+                ParticipantTryout(
+                    participant=profile,
+                    tryout=tryout,
+                    started_at=now - timedelta(hours=3),
+                    finished_at=now - timedelta(hours=1),
+                    is_finished=True,
+                    score=sum(q.score for q, option in selected if option == q.correct_option),
+                    max_score=max_score,
+                    packed_answers=pack({q.number: option for q, option in selected}, len(tryout_questions))
+                    if packed else None,
+                )
+                for profile, selected in zip(chunk, selections)
+            ])
+            if packed:
+                answer_count += sum(len(selected) for selected in selections)
+                continue
+
+            answers = (
+                ParticipantAnswer(participant_tryout=pt, question=q, selected_option=option)
+                for pt, selected in zip(pts, selections)
+                for q, option in selected
+            )
+            for answer_chunk in _chunks(answers, chunk_size):
+                ParticipantAnswer.objects.bulk_create(answer_chunk)
+                answer_count += len(answer_chunk)
+
+    log(f'{answer_count} jawaban')
+    return {'participants': profiles, 'tryouts': created_tryouts, 'answers': answer_count}
@@ -0,0 +1,81 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from . import answers, fragments, live
+from .grading import apply_question_delta
+from .models import ParticipantProfile, Question, QuestionAttachment, Tryout
+
+
+@receiver(pre_save, sender=Question)
+def remember_answer_key(sender, instance, **kwargs):
+    instance._old_key = None
+    instance._old_number = None
+    if instance.pk:
+        row = (
+            Question.objects.filter(pk=instance.pk)
+            .values_list('correct_option', 'score', 'number')
+            .first()
+        )
+        if row is not None:
+            instance._old_key, instance._old_number = row[:2], row[2]
+
+
+@receiver(post_save, sender=Question)
+def regrade_changed_question(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_old_key', None)
+    new = (instance.correct_option, float(instance.score))
+    if old is not None:
+        old = (old[0], float(old[1]))
+    # Nomor soal berubah: byte jawaban packed ikut pindah sebelum dinilai ulang
+    old_number = getattr(instance, '_old_number', None)
+    if old_number is not None and old_number != instance.number:
+        answers.move_question(instance.tryout_id, old_number, instance.number)
+    apply_question_delta(instance.tryout_id, instance.pk, old=old, new=new, number=instance.number)
+
+
+@receiver(pre_delete, sender=Question)
+def regrade_deleted_question(sender, instance, origin=None, **kwargs):
+    # Try out ikut dihapus, attempt-nya juga hilang, tidak perlu dinilai ulang
+    if isinstance(origin, Tryout):
+        return
+    # Harus sebelum delete: ParticipantAnswer untuk soal ini ikut terhapus (cascade)
+    apply_question_delta(
+        instance.tryout_id, instance.pk,
+        old=(instance.correct_option, float(instance.score)), new=None, number=instance.number,
+    )
+
+
+@receiver(post_delete, sender=Question)
+def clear_deleted_question_answers(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Tryout):
+        return
+    # Soal baru dengan nomor yang sama tidak boleh mewarisi jawaban soal lama
+    answers.move_question(instance.tryout_id, instance.number)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_paper_fragments(sender, instance, **kwargs):
+    fragments.bump(instance.tryout_id)
+
+
+@receiver(post_save, sender=QuestionAttachment)
+@receiver(post_delete, sender=QuestionAttachment)
+def invalidate_paper_media(sender, instance, **kwargs):
+    fragments.bump(instance.question.tryout_id)
+
+
+@receiver(post_save, sender=Tryout)
+def invalidate_tryout_caches(sender, instance, created, raw=False, **kwargs):
+    # Durasi bisa berubah, deadline attempt yang di-cache harus dihitung ulang
+    if not created and not raw:
+        live.bump_tryout_version(instance.pk)
+        fragments.bump(instance.pk)
+
+
+@receiver(post_save, sender=ParticipantProfile)
+@receiver(post_delete, sender=ParticipantProfile)
+def invalidate_participant_status(sender, instance, **kwargs):
+    live.forget_participants([instance.user_id])
@@ -0,0 +1,226 @@
+"""
+Online snapshots of the SQLite database while the exam is running.
+
+take_snapshot() copies the live database with the SQLite online backup API,
+checks the copy with PRAGMA integrity_check, gzips it and rotates old
+snapshots. The database runs in WAL mode (settings.py), so the whole copy is
+made inside one read transaction on the source: writers never wait for a
+reader in WAL mode and the snapshot the backup reads cannot change, so it
+never restarts. Without WAL (rollback journal) that read transaction would
+block writers, so the copy is stepped instead; a write by another connection
+restarts it, and after max_restarts it is finished in one step.
+
+WriteProbe measures the commit latency writers see while a snapshot runs; the
+snapshot_db command runs it against a temporary copy, never the live file.
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+SNAPSHOT_PREFIX = 'db-'
+SNAPSHOT_SUFFIX = '.sqlite3.gz'
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def online_backup(source, target_path, pages=256, sleep=0.005, max_restarts=5):
+    """
+    Copy an open sqlite3 connection into target_path, return
+    {'steps', 'restarts', 'pages', 'seconds', 'wal', 'one_step'}.
+    """
+    stats = {'steps': 0, 'restarts': 0, 'pages': 0, 'one_step': False}
+    last_remaining = [None]
+
+    def progress(status, remaining, total):
+        stats['steps'] += 1
+        stats['pages'] = total
+        # remaining naik lagi: sumber ditulis koneksi lain, backup mulai dari awal
+        if last_remaining[0] is not None and remaining > last_remaining[0]:
+            stats['restarts'] += 1
+            if stats['restarts'] > max_restarts:
+                raise _TooManyRestarts
+        last_remaining[0] = remaining
+
+    stats['wal'] = source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    # WAL: satu transaksi baca untuk seluruh salinan, penulis tidak menunggu dan tidak ada restart
+    read_snapshot = stats['wal'] and not source.in_transaction
+    started = time.perf_counter()
+    target = sqlite3.connect(target_path)
+    try:
+        if read_snapshot:
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=sleep)
+        except _TooManyRestarts:
+            # Satu langkah penuh: penulis tertahan sekali selama salinan dibuat
+            source.backup(target, pages=-1)
+            stats['steps'] += 1
+            stats['one_step'] = True
+        # Salinan berdiri sendiri: tanpa file -wal/-shm di sebelahnya
+        target.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        if read_snapshot:
+            source.commit()
+        target.close()
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def check_integrity(path):
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+    except sqlite3.DatabaseError as exc:
+        result = str(exc)
+    finally:
+        conn.close()
+    if result != 'ok':
+        raise SnapshotError(f'{path}: integrity_check gagal ({result})')
+
+
+def list_snapshots(directory):
+    """Snapshot files in directory, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+
+def rotate(directory, keep):
+    removed = []
+    for path in list_snapshots(directory)[:-keep] if keep else []:
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+def take_snapshot(source_path, directory, keep=24, pages=256, sleep=0.005, max_restarts=5):
+    """Write a verified, compressed snapshot of source_path into directory and return a report"""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    final_path = os.path.join(directory, f'{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}')
+    raw_path = os.path.join(directory, f'.{SNAPSHOT_PREFIX}{stamp}.sqlite3.tmp')
+    gz_path = final_path + '.part'
+
+    try:
+        source = sqlite3.connect(source_path, timeout=30)
+        try:
+            report = online_backup(source, raw_path, pages=pages, sleep=sleep, max_restarts=max_restarts)
+        finally:
+            source.close()
+
+        started = time.perf_counter()
+        check_integrity(raw_path)
+        report['integrity_seconds'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with open(raw_path, 'rb') as src, gzip.open(gz_path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, length=1024 * 1024)
+        os.replace(gz_path, final_path)
+        report['compress_seconds'] = time.perf_counter() - started
+        report['size'] = os.path.getsize(raw_path)
+    finally:
+        for path in (raw_path, gz_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    report['path'] = final_path
+    report['compressed_size'] = os.path.getsize(final_path)
+    report['removed'] = rotate(directory, keep)
+    return report
+
+
+def verify_snapshot(path):
+    """Decompress a snapshot to a temporary file and run integrity_check on it"""
+    raw_path = path + '.verify'
+    try:
+        with gzip.open(path, 'rb') as src, open(raw_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, length=1024 * 1024)
+        check_integrity(raw_path)
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
+
+class WriteProbe:
+    """
+    Background writers committing small transactions to a scratch table of
+    the database, recording commit latency (seconds). Used to simulate and
+    measure answer-write load during a snapshot.
+    """
+    TABLE = 'snapshot_write_probe'
+
+    def __init__(self, path, writers=2, interval=0.01):
+        self.path = path
+        self.writers = writers
+        self.interval = interval
+        self.latencies = []
+        self.errors = 0
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {self.TABLE} (id INTEGER PRIMARY KEY, value TEXT)')
+        conn.close()
+        for _ in range(self.writers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        with sqlite3.connect(self.path, timeout=30) as conn:
+            conn.execute(f'DROP TABLE IF EXISTS {self.TABLE}')
+        conn.close()
+
+    def _run(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            while not self._stop.wait(self.interval):
+                started = time.perf_counter()
+                try:
+                    with conn:
+                        conn.execute(f'INSERT INTO {self.TABLE} (value) VALUES (?)', ('x' * 64,))
+                except sqlite3.OperationalError:
+                    with self._lock:
+                        self.errors += 1
+                    continue
+                with self._lock:
+                    self.latencies.append(time.perf_counter() - started)
+        finally:
+            conn.close()
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {'writes': 0, 'errors': self.errors, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+
+        def pick(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        return {
+            'writes': len(latencies),
+            'errors': self.errors,
+            'p50_ms': pick(0.50),
+            'p95_ms': pick(0.95),
+            'max_ms': latencies[-1] * 1000,
+        }
@@ -1,3 +1,1161 @@
-from django.test import TestCase
+import gzip
+import io
+import math
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+import unittest
+from contextlib import closing
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    ParticipantProfile, Tryout, Question, ParticipantTryout, ParticipantAnswer, AnswerJournal, MediaAsset,
+)
+from . import admission, answers, archive, attempts, bulk, fragments, live, media, ratelimit, reports, snapshots
+from .forms import QuestionForm
+from .search import search_questions, search_participants
+from .seed import seed
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow opsional, hanya dibutuhkan worker process_media
+    Image = None
+
+# Faktor ukuran data k: 20·k peserta, 2·k try out, 10·k soal per try out.
+# Tiga titik dengan rentang 8x supaya pertumbuhan query/latensi yang baru muncul di
+# ukuran lebih besar tetap tertangkap, tanpa membuat suite terlalu lambat
+SCALES = [1, 4, 8]
+
+
+class ScalingTestCase(TestCase):
+    """
+    Base class for query-count / database-work regression tests. Each view
+    is measured at every scale in SCALES; the number of queries may not grow
+    with the data and the SQLite VM steps spent in them (a deterministic
+    stand-in for rows touched, unlike wall-clock latency) may grow at most
+    linearly with the number of rows in the database.
+    """
+    work_slack = 2.0           # toleransi di atas pertumbuhan linear
+    step_size = 10             # instruksi VM SQLite per hitungan progress handler
+
+    def setUp(self):
+        cache.clear()
+        ratelimit.limiter.reset()
+
+    def grow_to(self, scale):
+        """Seed additional data so the database matches the given scale"""
+        current = getattr(self, '_scale', 0)
+        if scale > current:
+            seed(
+                participants=20 * (scale - current),
+                tryouts=2 * (scale - current),
+                questions=10 * scale,
+                prefix=f'scale{scale}',
+            )
+            self._scale = scale
+
+    def data_rows(self):
+        """Rows in the tables the seeded data grows (the x axis of assertScales)"""
+        models = (User, ParticipantProfile, Tryout, Question, ParticipantTryout, ParticipantAnswer, AnswerJournal)
+        return sum(model.objects.count() for model in models)
+
+    def measure(self, method, url, data=None, repeat=2, before=None):
+        """Return (query_count, vm_steps) of the last of repeat requests (caches warm)"""
+        connection.ensure_connection()
+        for _ in range(repeat):
+            if before is not None:
+                before()
+            steps = [0]
+
+            def count_step():
+                steps[0] += 1
+                return 0
+
+            connection.connection.set_progress_handler(count_step, self.step_size)
+            try:
+                with CaptureQueriesContext(connection) as ctx:
+                    response = getattr(self.client, method)(url, data or {})
+            finally:
+                connection.connection.set_progress_handler(None, 0)
+            self.assertLess(response.status_code, 400, url)
+        return len(ctx.captured_queries), steps[0]
+
+    def assertScales(self, results, max_queries):
+        """results: list of (data_rows, queries, vm_steps) in SCALES order"""
+        base_rows, base_queries, base_steps = results[0]
+        for rows, queries, steps in results:
+            self.assertLessEqual(queries, max_queries, f'{rows} baris: {queries} query')
+            self.assertEqual(queries, base_queries, f'jumlah query tumbuh dengan data ({rows} baris)')
+            bound = max(base_steps, 1) * (rows / base_rows) * self.work_slack
+            self.assertLessEqual(steps, bound, f'{rows} baris: {steps} > {bound:.0f} langkah VM (x{self.step_size})')
+
+
+@override_settings(SHARED_CACHE=True)
+class ExamViewScalingTests(ScalingTestCase):
+    def make_attempt(self, scale):
+        """Logged-in participant with an open attempt on a tryout of 10*scale questions"""
+        user = User.objects.create_user(f'bench{scale}', password='x')
+        profile = ParticipantProfile.objects.create(user=user, full_name='Bench', school='SMA', day=1)
+        tryout = Tryout.objects.create(
+            title=f'Bench {scale}', description='-', subjects='-',
+            publish_time=timezone.now() - timedelta(hours=1),
+            work_time_minutes=120, is_published=True,
+        )
+        questions = Question.objects.bulk_create([
+            Question(tryout=tryout, number=n, text='?', option_a='a', option_b='b',
+                     option_c='c', option_d='d', correct_option='A')
+            for n in range(1, 10 * scale + 1)
+        ])
+        pt = ParticipantTryout.objects.create(participant=profile, tryout=tryout, started_at=timezone.now())
+        ParticipantAnswer.objects.bulk_create([
+            ParticipantAnswer(participant_tryout=pt, question=q, selected_option='A') for q in questions
+        ])
+        self.client.force_login(user)
+        return tryout, pt, questions
+
+    def run_scales(self, request_for):
+        results = []
+        for scale in SCALES:
+            self.grow_to(scale)
+            tryout, pt, questions = self.make_attempt(scale)
+            method, url, data, before = request_for(tryout, pt, questions)
+            queries, steps = self.measure(method, url, data, before=before)
+            results.append((self.data_rows(), queries, steps))
+        return results
+
+    def test_tryout_list(self):
+        results = self.run_scales(lambda t, pt, qs: ('get', reverse('exam:tryout_list'), None, None))
+        self.assertScales(results, max_queries=5)
+
+    def test_take_exam(self):
+        results = self.run_scales(lambda t, pt, qs: ('get', reverse('exam:take_exam', args=[t.pk]), None, None))
+        self.assertScales(results, max_queries=5)
+
+    def test_save_answer(self):
+        results = self.run_scales(lambda t, pt, qs: (
+            'post', reverse('exam:save_answer', args=[t.pk]),
+            {'question_id': qs[-1].pk, 'selected_option': 'B'}, None,
+        ))
+        # session, user, insert jurnal; attempt dari konteks session + cache
+        self.assertScales(results, max_queries=3)
+
+    def test_submit_exam(self):
+        def reopen(pt):
+            return lambda: ParticipantTryout.objects.filter(pk=pt.pk).update(is_finished=False)
+
+        results = self.run_scales(lambda t, pt, qs: (
+            'post', reverse('exam:submit_exam', args=[t.pk]), None, reopen(pt),
+        ))
+        self.assertScales(results, max_queries=8)
+
+    def test_submit_exam_scores_attempt(self):
+        self.grow_to(1)
+        tryout, pt, questions = self.make_attempt(1)
+        self.client.post(reverse('exam:submit_exam', args=[tryout.pk]))
+        pt.refresh_from_db()
+        self.assertTrue(pt.is_finished)
+        self.assertEqual(pt.score, len(questions))
+        self.assertEqual(pt.max_score, len(questions))
+
+
+class RegradeTests(TestCase):
+    def setUp(self):
+        self.tryout = Tryout.objects.create(
+            title='Regrade', description='-', subjects='-',
+            publish_time=timezone.now() - timedelta(hours=1),
+            work_time_minutes=120, is_published=True,
+        )
+        self.q1 = Question.objects.create(tryout=self.tryout, number=1, text='?', option_a='a', option_b='b',
+                                          option_c='c', option_d='d', correct_option='A', score=2)
+        self.q2 = Question.objects.create(tryout=self.tryout, number=2, text='?', option_a='a', option_b='b',
+                                          option_c='c', option_d='d', correct_option='B', score=1)
+        self.attempts = []
+        for i, options in enumerate([('A', 'B'), ('B', 'B'), ('C', None)]):
+            user = User.objects.create_user(f'regrade{i}', password='x')
+            profile = ParticipantProfile.objects.create(user=user, full_name=f'P{i}', school='SMA')
+            pt = ParticipantTryout.objects.create(participant=profile, tryout=self.tryout, started_at=timezone.now())
+            for question, option in zip([self.q1, self.q2], options):
+                if option:
+                    ParticipantAnswer.objects.create(participant_tryout=pt, question=question, selected_option=option)
+            self.client.force_login(user)
+            self.client.post(reverse('exam:submit_exam', args=[self.tryout.pk]))
+            self.attempts.append(pt)
+
+    def scores(self):
+        return [
+            (pt.score, pt.max_score)
+            for pt in ParticipantTryout.objects.filter(pk__in=[a.pk for a in self.attempts]).order_by('pk')
+        ]
+
+    def test_scores_before_change(self):
+        self.assertEqual(self.scores(), [(3.0, 3.0), (1.0, 3.0), (0.0, 3.0)])
+
+    def test_correct_option_change(self):
+        self.q1.correct_option = 'B'
+        self.q1.save()
+        self.assertEqual(self.scores(), [(1.0, 3.0), (3.0, 3.0), (0.0, 3.0)])
+
+    def test_score_change(self):
+        self.q1.score = 5
+        self.q1.save()
+        self.assertEqual(self.scores(), [(6.0, 6.0), (1.0, 6.0), (0.0, 6.0)])
+
+    def test_question_added_and_deleted(self):
+        q3 = Question.objects.create(tryout=self.tryout, number=3, text='?', option_a='a', option_b='b',
+                                     option_c='c', option_d='d', correct_option='A', score=4)
+        self.assertEqual(self.scores(), [(3.0, 7.0), (1.0, 7.0), (0.0, 7.0)])
+        q3.delete()
+        self.q2.delete()
+        self.assertEqual(self.scores(), [(2.0, 2.0), (0.0, 2.0), (0.0, 2.0)])
+
+    def test_matches_full_rescore(self):
+        self.q2.correct_option = 'C'
+        self.q2.score = 3
+        self.q2.save()
+        for pt in ParticipantTryout.objects.filter(tryout=self.tryout):
+            expected = sum(
+                a.question.score for a in ParticipantAnswer.objects.filter(participant_tryout=pt).select_related('question')
+                if a.selected_option == a.question.correct_option
+            )
+            self.assertEqual(pt.score, expected)
+
+
+@override_settings(ANSWER_STORAGE='packed')
+class PackedRegradeTests(RegradeTests):
+    """The regrade cases again, with answers compacted into packed vectors"""
+
+    def vectors(self):
+        return [bytes(pt.packed_answers) for pt in ParticipantTryout.objects.filter(tryout=self.tryout).order_by('pk')]
+
+    def test_answers_are_packed(self):
+        self.assertFalse(ParticipantAnswer.objects.exists())
+        self.assertEqual(self.vectors(), [b'AB', b'BB', b'C-'])
+
+    def test_matches_full_rescore(self):
+        self.q2.correct_option = 'C'
+        self.q2.score = 3
+        self.q2.save()
+        for pt in ParticipantTryout.objects.filter(tryout=self.tryout):
+            self.assertEqual((pt.score, pt.max_score), answers.score(pt))
+
+    def test_renumber_moves_answers(self):
+        self.q2.number = 5
+        self.q2.save()
+        self.assertEqual(self.vectors(), [b'A---B', b'B---B', b'C----'])
+        self.assertEqual(self.scores(), [(3.0, 3.0), (1.0, 3.0), (0.0, 3.0)])
+
+    def test_deleted_question_is_blanked(self):
+        self.q2.delete()
+        Question.objects.create(tryout=self.tryout, number=2, text='?', option_a='a', option_b='b',
+                                option_c='c', option_d='d', correct_option='B', score=1)
+        self.assertEqual(self.vectors(), [b'A', b'B', b'C'])
+        self.assertEqual(self.scores(), [(2.0, 3.0), (0.0, 3.0), (0.0, 3.0)])
+
+    def test_swap_through_temporary_number_keeps_width(self):
+        for question, number in ((self.q1, 99), (self.q2, 1), (self.q1, 2)):
+            question.number = number
+            question.save()
+        self.assertEqual(self.vectors(), [b'BA', b'BB', b'-C'])
+        self.assertEqual(self.scores(), [(3.0, 3.0), (1.0, 3.0), (0.0, 3.0)])
+
+
+class PackedAnswerTests(TestCase):
+    def setUp(self):
+        self.tryout = seed(participants=4, tryouts=1, questions=6, prefix='packed')['tryouts'][0]
+
+    def test_pack_unpack(self):
+        vector = answers.pack({1: 'A', 3: 'D', 4: None}, 5)
+        self.assertEqual(vector, b'A-D--')
+        self.assertEqual(answers.unpack(vector), {1: 'A', 3: 'D'})
+        # Nilai di luar A-D (baris lama, POST mentah) tidak boleh menggagalkan submit
+        self.assertEqual(answers.pack({1: 'AB', 2: '\u20ac', 3: 'C'}), b'--C')
+        with self.assertRaises(ValueError):
+            answers.pack({0: 'A', 2: 'B'}, 3)
+        # Nomor 0 juga ditolak saat soal dibuat
+        form = QuestionForm(data={'number': 0, 'text': '?', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c',
+                                  'option_d': 'd', 'correct_option': 'A', 'score': 1})
+        self.assertIn('number', form.errors)
+
+    def test_convert_round_trip_keeps_answers_and_scores(self):
+        def snapshot():
+            return {
+                pt.pk: (answers.stored_options(pt.pk), answers.score(pt))
+                for pt in ParticipantTryout.objects.filter(tryout=self.tryout)
+            }
+
+        with override_settings(ANSWER_STORAGE='packed'):
+            before = snapshot()
+            self.assertEqual(answers.convert(self.tryout.pk), 4)
+            self.assertFalse(ParticipantAnswer.objects.exists())
+            self.assertEqual(snapshot(), before)
+
+        # Attempt packed tetap terbaca setelah ANSWER_STORAGE kembali ke 'rows'
+        self.assertEqual(snapshot(), before)
+        self.assertEqual(answers.convert(self.tryout.pk, packed=False), 4)
+        self.assertFalse(ParticipantTryout.objects.filter(packed_answers__isnull=False).exists())
+        self.assertEqual(snapshot(), before)
+
+    def test_convert_skips_running_attempts(self):
+        running = ParticipantTryout.objects.filter(tryout=self.tryout).first()
+        ParticipantTryout.objects.filter(pk=running.pk).update(is_finished=False)
+        self.assertEqual(answers.convert(self.tryout.pk), 3)
+        running.refresh_from_db()
+        self.assertIsNone(running.packed_answers)
+        self.assertTrue(ParticipantAnswer.objects.filter(participant_tryout=running).exists())
+
+    def test_archive_and_admin_read_packed_attempts(self):
+        answers.convert(self.tryout.pk)
+        pt = ParticipantTryout.objects.filter(tryout=self.tryout).first()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tryout.jsonl.gz')
+            archive.export_tryout(self.tryout, path)
+            _, records, _ = archive.read_archive(path)
+        row = next(row for row in records['attempt'] if row['id'] == pt.pk)
+        self.assertEqual(bytes(archive._build(ParticipantTryout, row).packed_answers), bytes(pt.packed_answers))
+
+        self.client.force_login(User.objects.create_superuser('root', 'root@example.com', 'x'))
+        response = self.client.get(reverse('admin:exam_participanttryout_change', args=[pt.pk]))
+        self.assertContains(response, ' '.join(
+            f'{number}:{option}' for number, option in sorted(answers.unpack(pt.packed_answers).items())
+        ))
+
+
+class AnswerJournalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit.limiter.reset()
+        self.tryout = Tryout.objects.create(
+            title='Jurnal', description='-', subjects='-',
+            publish_time=timezone.now() - timedelta(minutes=5),
+            work_time_minutes=30, is_published=True,
+        )
+        self.q1, self.q2, self.q3 = [
+            Question.objects.create(tryout=self.tryout, number=n, text='?', option_a='a', option_b='b',
+                                    option_c='c', option_d='d', correct_option='B')
+            for n in (1, 2, 3)
+        ]
+        user = User.objects.create_user('jurnal', password='x')
+        ParticipantProfile.objects.create(user=user, full_name='Jurnal', school='SMA')
+        self.client.force_login(user)
+        self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        self.pt = ParticipantTryout.objects.get()
+
+    def save(self, question, option):
+        return self.client.post(reverse('exam:save_answer', args=[self.tryout.pk]),
+                                {'question_id': question.pk, 'selected_option': option}).json()
+
+    def test_clicks_are_appended_and_compacted_to_latest_per_question(self):
+        for question, option in ((self.q1, 'A'), (self.q2, 'C'), (self.q1, 'B'), (self.q3, 'D'), (self.q3, '')):
+            self.assertTrue(self.save(question, option)['success'])
+        self.assertEqual(AnswerJournal.objects.filter(participant_tryout=self.pt).count(), 5)
+        self.assertFalse(ParticipantAnswer.objects.exists())
+
+        self.client.post(reverse('exam:submit_exam', args=[self.tryout.pk]))
+        self.assertEqual(answers.stored_options(self.pt.pk), {self.q1.pk: 'B', self.q2.pk: 'C', self.q3.pk: None})
+        self.pt.refresh_from_db()
+        self.assertEqual((self.pt.score, self.pt.max_score), (1.0, 3.0))
+
+    def test_answers_after_finish_are_rejected(self):
+        self.save(self.q1, 'B')
+        self.client.post(reverse('exam:submit_exam', args=[self.tryout.pk]))
+        self.assertEqual(self.save(self.q1, 'A')['error'], 'Tryout already finished')
+        self.assertEqual(AnswerJournal.objects.count(), 1)
+        self.assertEqual(answers.stored_options(self.pt.pk), {self.q1.pk: 'B'})
+
+    def test_recompaction_picks_up_late_entries(self):
+        self.save(self.q1, 'A')
+        self.pt.compact_answer_journal()
+        self.pt.compact_answer_journal()
+        self.assertEqual(ParticipantAnswer.objects.count(), 1)
+        # Entri yang lolos cek sebelum finish (request yang masih berjalan) menang saat dipadatkan ulang
+        AnswerJournal.objects.create(participant_tryout=self.pt, question=self.q1, selected_option='B')
+        self.pt.compact_answer_journal()
+        self.assertEqual(answers.stored_options(self.pt.pk), {self.q1.pk: 'B'})
+
+    @override_settings(ANSWER_STORAGE='packed')
+    def test_packed_compaction_and_late_entries(self):
+        self.save(self.q1, 'A')
+        self.save(self.q3, 'C')
+        self.pt.compact_answer_journal()
+        AnswerJournal.objects.create(participant_tryout=self.pt, question=self.q1, selected_option='B')
+        self.pt.compact_answer_journal()
+        self.assertEqual(bytes(self.pt.packed_answers), b'B-C')
+        self.assertFalse(ParticipantAnswer.objects.exists())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.tryout = seed(participants=3, tryouts=1, questions=4, prefix='archive')['tryouts'][0]
+        self.pt = ParticipantTryout.objects.filter(tryout=self.tryout).first()
+        self.question = Question.objects.filter(tryout=self.tryout).first()
+        for option in 'ABC':
+            AnswerJournal.objects.create(participant_tryout=self.pt, question=self.question, selected_option=option)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def rows(self):
+        return {
+            'answer': list(ParticipantAnswer.objects.filter(participant_tryout__tryout=self.tryout).order_by('id').values()),
+            'journal': list(AnswerJournal.objects.filter(participant_tryout__tryout=self.tryout).order_by('id').values()),
+        }
+
+    def test_export_purge_restore_round_trip(self):
+        before = self.rows()
+        path = os.path.join(self.directory, 'tryout.jsonl.gz')
+        manifest = archive.export_tryout(self.tryout, path)
+        _, records, _ = archive.read_archive(path)
+
+        deleted = archive.purge_tryout_answers(self.tryout, records, manifest)
+        self.assertEqual(deleted, {'journal': 3, 'answer': len(before['answer'])})
+        self.assertEqual(self.rows(), {'answer': [], 'journal': []})
+        self.assertEqual(ParticipantTryout.objects.filter(tryout=self.tryout).count(), 3)
+
+        archive.restore_archive(path)
+        self.assertEqual(self.rows(), before)
+
+    def test_rows_written_after_export_are_not_purged(self):
+        export = archive.export_tryout
+
+        def export_then_answer(tryout, path):
+            manifest = export(tryout, path)
+            AnswerJournal.objects.create(participant_tryout=self.pt, question=self.question, selected_option='D')
+            return manifest
+
+        before = self.rows()
+        with mock.patch('exam.management.commands.archive_tryout.export_tryout', export_then_answer):
+            with self.assertRaises(CommandError):
+                call_command('archive_tryout', self.tryout.pk, output_dir=self.directory, force=True,
+                             stdout=io.StringIO())
+        self.assertEqual(len(self.rows()['journal']), len(before['journal']) + 1)
+        self.assertEqual(self.rows()['answer'], before['answer'])
+
+    def test_purge_deletes_only_archived_rows(self):
+        path = os.path.join(self.directory, 'tryout.jsonl.gz')
+        manifest = archive.export_tryout(self.tryout, path)
+        _, records, _ = archive.read_archive(path)
+        # Baris lain diganti dengan jumlah yang sama: hitungan cocok, pk tidak
+        AnswerJournal.objects.filter(pk=records['journal'][0]['id']).delete()
+        AnswerJournal.objects.create(participant_tryout=self.pt, question=self.question, selected_option='D')
+
+        with self.assertRaises(archive.ArchiveError):
+            archive.purge_tryout_answers(self.tryout, records, manifest)
+        self.assertEqual(AnswerJournal.objects.filter(participant_tryout=self.pt).count(), 3)
+
+
+@override_settings(SHARED_CACHE=True)
+class HeartbeatTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tryout = Tryout.objects.create(
+            title='Heartbeat', description='-', subjects='-',
+            publish_time=timezone.now() - timedelta(minutes=5),
+            work_time_minutes=30, is_published=True,
+        )
+        user = User.objects.create_user('hb', password='x')
+        self.profile = ParticipantProfile.objects.create(user=user, full_name='HB', school='SMA')
+        self.client.force_login(user)
+        self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        self.url = reverse('exam:heartbeat', args=[self.tryout.pk])
+
+    def test_heartbeat_reports_remaining_time(self):
+        data = self.client.get(self.url).json()
+        self.assertTrue(data['success'])
+        self.assertFalse(data['finished'])
+        self.assertFalse(data['blocked'])
+        self.assertAlmostEqual(data['remaining_seconds'], 30 * 60, delta=5)
+
+    def test_heartbeat_uses_cache_and_coalesces_presence_writes(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        # Hanya session, user dan profile (middleware); tidak ada query/tulis attempt
+        self.assertFalse([q for q in ctx.captured_queries if 'exam_participanttryout' in q['sql']])
+        self.assertIsNotNone(ParticipantTryout.objects.get().last_seen_at)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_status_is_read_once_per_heartbeat(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        # Status yang sudah dibaca BlockedUserMiddleware dipakai ulang oleh view
+        self.assertEqual(len([q for q in ctx.captured_queries if 'exam_participantprofile' in q['sql']]), 1)
+
+    def test_heartbeat_sees_duration_change_and_finish(self):
+        self.client.get(self.url)
+        self.tryout.work_time_minutes = 60
+        self.tryout.save()
+        self.assertAlmostEqual(self.client.get(self.url).json()['remaining_seconds'], 60 * 60, delta=5)
+
+        self.client.post(reverse('exam:submit_exam', args=[self.tryout.pk]))
+        self.assertTrue(self.client.get(self.url).json()['finished'])
+
+    def test_attempt_deleted_behind_cached_meta(self):
+        self.client.get(self.url)
+        # Reset di proses lain: baris hilang, metadata cache di proses ini masih ada
+        ParticipantTryout.objects.all().delete()
+        start_url = reverse('exam:start_tryout', args=[self.tryout.pk])
+        self.assertRedirects(self.client.post(reverse('exam:submit_exam', args=[self.tryout.pk])), start_url,
+                             fetch_redirect_response=False)
+        with mock.patch.object(attempts.AttemptContext, 'expired', return_value=True):
+            self.assertRedirects(self.client.get(reverse('exam:take_exam', args=[self.tryout.pk])), start_url,
+                                 fetch_redirect_response=False)
+
+
+@override_settings(ADMISSION_RATES={1: 2}, SHARED_CACHE=True)
+class AdmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_tickets_enter_at_cohort_rate(self):
+        first = [admission.admit(1, 1000.0, participant_id, day=1, now=1000.0) for participant_id in range(1, 6)]
+        self.assertEqual([a.admitted for a in first], [True, False, False, False, False])
+        self.assertEqual([a.wait_seconds for a in first[1:]], [1, 1, 2, 2])
+        self.assertEqual([a.ahead for a in first[1:]], [0, 1, 2, 3])
+
+        # Tiket tetap sama saat polling; dua detik kemudian slot 5 peserta sudah lewat
+        self.assertTrue(all(admission.admit(1, 1000.0, pk, day=1, now=1002.0).admitted for pk in range(1, 6)))
+        self.assertFalse(admission.admit(1, 1000.0, 6, day=1, now=1002.0).admitted)
+
+    def test_cohorts_and_publish_time_have_separate_queues(self):
+        admission.admit(1, 1000.0, 1, day=1, now=1000.0)
+        self.assertFalse(admission.admit(1, 1000.0, 2, day=1, now=1000.0).admitted)
+        self.assertTrue(admission.admit(1, 1000.0, 3, day=2, now=1000.0).admitted)
+        # publish_time dimundurkan: antrean baru, peserta 2 jadi yang pertama
+        self.assertTrue(admission.admit(1, 5000.0, 2, day=1, now=5000.0).admitted)
+
+    def test_admits_without_queue_when_cache_is_not_shared_or_counter_is_lost(self):
+        admission.admit(1, 1000.0, 1, day=1, now=1000.0)
+        with override_settings(SHARED_CACHE=False):
+            self.assertTrue(admission.admit(1, 1000.0, 2, day=1, now=1000.0).admitted)
+        # Penghitung hilang di antara add dan incr: masuk, bukan 500
+        with mock.patch.object(admission.cache, 'incr', side_effect=ValueError):
+            self.assertTrue(admission.admit(1, 1000.0, 3, day=1, now=1000.0).admitted)
+
+    @override_settings(ADMISSION_RATES={1: 0.001})
+    def test_waiting_room_defers_attempt_and_timer(self):
+        tryout = Tryout.objects.create(
+            title='Antre', description='-', subjects='-',
+            publish_time=timezone.now() - timedelta(minutes=5),
+            work_time_minutes=30, is_published=True,
+        )
+        users = []
+        for i in range(2):
+            user = User.objects.create_user(f'antre{i}', password='x')
+            ParticipantProfile.objects.create(user=user, full_name=f'Antre {i}', school='SMA', day=1)
+            users.append(user)
+        start_url = reverse('exam:start_tryout', args=[tryout.pk])
+        status_url = reverse('exam:admission_status', args=[tryout.pk])
+
+        self.client.force_login(users[0])
+        self.assertRedirects(self.client.get(start_url), reverse('exam:take_exam', args=[tryout.pk]),
+                             fetch_redirect_response=False)
+
+        self.client.force_login(users[1])
+        response = self.client.get(start_url)
+        self.assertTemplateUsed(response, 'exam/waiting_room.html')
+        self.assertFalse(ParticipantTryout.objects.filter(participant__user=users[1]).exists())
+        self.client.get(status_url)
+        # Polling berikutnya hanya membaca cache
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(status_url).json()
+        self.assertFalse(data['admitted'])
+        self.assertGreater(data['wait_seconds'], 0)
+        self.assertFalse([q for q in ctx.captured_queries if 'exam_' in q['sql']])
+
+        with override_settings(ADMISSION_RATES={}):
+            self.assertTrue(self.client.get(status_url).json()['admitted'])
+            self.client.get(start_url)
+        pt = ParticipantTryout.objects.get(participant__user=users[1])
+        self.assertAlmostEqual(pt.started_at.timestamp(), timezone.now().timestamp(), delta=5)
+
+
+@override_settings(SHARED_CACHE=True)
+class AttemptContextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit.limiter.reset()
+        self.tryout = Tryout.objects.create(
+            title='Context', description='-', subjects='-',
+            publish_time=timezone.now() - timedelta(minutes=5),
+            work_time_minutes=30, is_published=True,
+        )
+        self.question = Question.objects.create(
+            tryout=self.tryout, number=1, text='?', option_a='a', option_b='b',
+            option_c='c', option_d='d', correct_option='A',
+        )
+        self.user = User.objects.create_user('ctx', password='x')
+        self.profile = ParticipantProfile.objects.create(user=self.user, full_name='Ctx', school='SMA')
+        self.client.force_login(self.user)
+        self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        self.url = reverse('exam:save_answer', args=[self.tryout.pk])
+
+    def save(self):
+        return self.client.post(self.url, {'question_id': self.question.pk, 'selected_option': 'B'})
+
+    def test_hot_endpoints_skip_profile_tryout_and_attempt_lookups(self):
+        self.save()
+        requests = [
+            (self.client.post, self.url, {'question_id': self.question.pk, 'selected_option': 'C'}),
+            (self.client.get, reverse('exam:heartbeat', args=[self.tryout.pk]), None),
+            (self.client.post, reverse('exam:track_out_of_app', args=[self.tryout.pk]), None),
+        ]
+        lookups = ('exam_participantprofile', 'FROM "exam_tryout"', 'FROM "exam_participanttryout"')
+        for method, url, data in requests:
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertTrue(method(url, data or {}).json()['success'])
+            self.assertFalse([q['sql'] for q in ctx.captured_queries if any(t in q['sql'] for t in lookups)], url)
+
+    def test_tampered_or_foreign_token_is_ignored(self):
+        other = User.objects.create_user('other', password='x')
+        ParticipantProfile.objects.create(user=other, full_name='Other', school='SMA')
+        token = self.client.session[f'exam:attempt:{self.tryout.pk}']
+
+        self.client.force_login(other)
+        session = self.client.session
+        session[f'exam:attempt:{self.tryout.pk}'] = token
+        session.save()
+        # Token milik peserta lain: tidak dipakai, peserta ini belum mulai
+        self.assertEqual(self.save().json()['error'], 'Tryout not found')
+        self.assertFalse(AnswerJournal.objects.exists())
+
+        session = self.client.session
+        session[f'exam:attempt:{self.tryout.pk}'] = token[:-2] + 'xx'
+        session.save()
+        self.assertFalse(self.save().json()['success'])
+
+    def test_block_reset_and_deadline_invalidate_context(self):
+        self.assertTrue(self.save().json()['success'])
+
+        self.tryout.work_time_minutes = 0
+        self.tryout.save()
+        self.assertEqual(self.save().json()['error'], 'Time is up')
+        self.tryout.work_time_minutes = 30
+        self.tryout.save()
+
+        bulk.run('reset', [self.profile.pk], tryout_id=self.tryout.pk)
+        self.assertIsNone(attempts.load(self.client.get('/').wsgi_request, self.tryout.pk))
+        self.assertEqual(self.save().json()['error'], 'Tryout not found')
+
+        self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        self.assertTrue(self.save().json()['success'])
+        bulk.run('block', [self.profile.pk])
+        self.assertRedirects(self.save(), '/?blocked=true', fetch_redirect_response=False)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_block_and_finish_from_another_worker_without_shared_cache(self):
+        self.assertTrue(self.save().json()['success'])
+        # update() tanpa signal: seperti blokir / submit yang dijalankan proses lain
+        ParticipantTryout.objects.filter(participant=self.profile).update(is_finished=True, score=7)
+        self.assertEqual(self.save().json()['error'], 'Tryout already finished')
+        self.client.post(reverse('exam:submit_exam', args=[self.tryout.pk]))
+        self.assertEqual(ParticipantTryout.objects.get(participant=self.profile).score, 7)
+
+        ParticipantProfile.objects.filter(pk=self.profile.pk).update(blocked=True)
+        self.assertRedirects(self.save(), '/?blocked=true', fetch_redirect_response=False)
+
+    def test_unknown_question_is_rejected(self):
+        other = Tryout.objects.create(title='Lain', description='-', subjects='-',
+                                      publish_time=timezone.now(), work_time_minutes=30)
+        foreign = Question.objects.create(tryout=other, number=1, text='?', option_a='a', option_b='b',
+                                          option_c='c', option_d='d', correct_option='A')
+        response = self.client.post(self.url, {'question_id': foreign.pk, 'selected_option': 'A'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_option_is_rejected(self):
+        for option in ('AB', '\u20ac', 'a'):
+            response = self.client.post(self.url, {'question_id': self.question.pk, 'selected_option': option})
+            self.assertEqual(response.json()['error'], 'Invalid option')
+        self.assertFalse(AnswerJournal.objects.exists())
+        self.client.post(self.url, {'question_id': self.question.pk, 'selected_option': ''})
+        self.assertIsNone(AnswerJournal.objects.get().selected_option)
+
+
+@override_settings(RATE_LIMITS={'save_answer': {'rate': 2, 'burst': 3}})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit.limiter.reset()
+        self.tryout = Tryout.objects.create(
+            title='Limit', description='-', subjects='-',
+            publish_time=timezone.now() - timedelta(minutes=5),
+            work_time_minutes=30, is_published=True,
+        )
+        self.question = Question.objects.create(
+            tryout=self.tryout, number=1, text='?', option_a='a', option_b='b',
+            option_c='c', option_d='d', correct_option='A',
+        )
+        user = User.objects.create_user('limit', password='x')
+        ParticipantProfile.objects.create(user=user, full_name='Limit', school='SMA')
+        self.client.force_login(user)
+        self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        self.url = reverse('exam:save_answer', args=[self.tryout.pk])
+
+    def save(self, option='A'):
+        return self.client.post(self.url, {'question_id': self.question.pk, 'selected_option': option})
+
+    def test_burst_then_429_with_retry_after(self):
+        for option in 'ABC':
+            self.assertEqual(self.save(option).status_code, 200)
+        response = self.save('D')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertAlmostEqual(response.json()['retry_after'], 0.5, delta=0.05)
+        # Jawaban yang ditolak tidak tersimpan
+        self.assertEqual(AnswerJournal.objects.count(), 3)
+
+        endpoints, top_limited = ratelimit.counters()
+        self.assertEqual(endpoints['save_answer'], {'allowed': 3, 'limited': 1})
+        self.assertEqual(top_limited, [(response.wsgi_request.user.pk, 1)])
+
+    def test_bucket_refills_over_time(self):
+        limiter = ratelimit.TokenBucketLimiter()
+        for _ in range(3):
+            self.assertEqual(limiter.hit('save_answer', 1, now=100.0), 0)
+        self.assertAlmostEqual(limiter.hit('save_answer', 1, now=100.0), 0.5)
+        # Peserta lain punya bucket sendiri
+        self.assertEqual(limiter.hit('save_answer', 2, now=100.0), 0)
+        self.assertEqual(limiter.hit('save_answer', 1, now=100.5), 0)
+        self.assertGreater(limiter.hit('save_answer', 1, now=100.5), 0)
+
+
+class BulkActionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        data = seed(participants=12, tryouts=2, questions=5, prefix='bulk')
+        self.tryout, self.other = data['tryouts']
+
+    def test_block_and_unblock_by_day(self):
+        day_one = bulk.select_participants(day=1)
+        expected = day_one.count()
+        result = bulk.run('block', day_one, chunk_size=5)
+        self.assertEqual(result['rows'], {'participant': expected})
+        self.assertEqual(ParticipantProfile.objects.filter(blocked=True).count(), expected)
+        self.assertFalse(ParticipantProfile.objects.filter(blocked=True, day=2).exists())
+
+        bulk.run('unblock', bulk.select_participants(day=1))
+        self.assertFalse(ParticipantProfile.objects.filter(blocked=True).exists())
+
+    def test_reset_only_touches_selected_tryout_and_drops_caches(self):
+        profile = ParticipantProfile.objects.order_by('pk').first()
+        self.assertIsNotNone(live.attempt_meta(profile.pk, self.tryout.pk))
+        reports.score_report(self.tryout.pk)
+
+        progress = []
+        result = bulk.run('reset', bulk.select_participants(tryout_id=self.tryout.pk),
+                          tryout_id=self.tryout.pk, chunk_size=5, progress=lambda *p: progress.append(p))
+
+        self.assertEqual(progress, [(5, 12), (10, 12), (12, 12)])
+        self.assertEqual(result['rows']['attempt'], 12)
+        self.assertFalse(ParticipantTryout.objects.filter(tryout=self.tryout).exists())
+        self.assertFalse(ParticipantAnswer.objects.filter(participant_tryout__tryout=self.tryout).exists())
+        self.assertEqual(ParticipantTryout.objects.filter(tryout=self.other).count(), 12)
+        self.assertIsNone(live.attempt_meta(profile.pk, self.tryout.pk))
+        self.assertIsNone(reports.score_report(self.tryout.pk)['overall'])
+
+    def test_delete_removes_users_with_set_based_queries(self):
+        school = ParticipantProfile.objects.values_list('school', flat=True).first()
+        selected = list(bulk.select_participants(school=school).values_list('pk', 'user_id'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            bulk.run('delete', [pk for pk, _ in selected])
+        # Tidak ada DELETE per baris jawaban: jumlah query tidak bergantung jumlah jawaban
+        self.assertLess(len(ctx.captured_queries), 30)
+
+        self.assertFalse(ParticipantProfile.objects.filter(school=school).exists())
+        self.assertFalse(User.objects.filter(pk__in=[user_id for _, user_id in selected]).exists())
+        self.assertEqual(
+            ParticipantTryout.objects.count(),
+            2 * ParticipantProfile.objects.count(),
+        )
+
+
+@override_settings(SHARED_CACHE=True)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tryout = Tryout.objects.create(
+            title='Fragment', description='-', subjects='Fisika',
+            publish_time=timezone.now() - timedelta(minutes=5),
+            work_time_minutes=30, is_published=True,
+        )
+        self.question = Question.objects.create(
+            tryout=self.tryout, number=1, text='Soal lama', option_a='a', option_b='b',
+            option_c='c', option_d='d', correct_option='A',
+        )
+        user = User.objects.create_user('frag', password='x')
+        ParticipantProfile.objects.create(user=user, full_name='Frag', school='SMA')
+        self.client.force_login(user)
+        self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        self.url = reverse('exam:take_exam', args=[self.tryout.pk])
+
+    def test_cached_paper_skips_question_query(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "exam_question"' in q['sql']])
+
+    @override_settings(SHARED_CACHE=False)
+    def test_no_paper_cache_without_shared_cache(self):
+        self.client.get(self.url)
+        # Perubahan tanpa signal: seperti bump versi yang terjadi di worker lain (LocMem terpisah)
+        Question.objects.filter(pk=self.question.pk).update(text='Soal baru')
+        added, = Question.objects.bulk_create([Question(
+            tryout=self.tryout, number=2, text='?', option_a='a', option_b='b',
+            option_c='c', option_d='d', correct_option='A',
+        )])
+        self.assertContains(self.client.get(self.url), 'Soal baru')
+        response = self.client.post(reverse('exam:save_answer', args=[self.tryout.pk]),
+                                    {'question_id': added.pk, 'selected_option': 'A'})
+        self.assertTrue(response.json()['success'])
+
+    def test_participant_answers_are_not_cached(self):
+        self.client.get(self.url)
+        self.client.post(reverse('exam:save_answer', args=[self.tryout.pk]),
+                         {'question_id': self.question.pk, 'selected_option': 'C'})
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['existing_answers'], {self.question.pk: 'C'})
+        self.assertContains(response, f'{{"{self.question.pk}": "C"}}')
+
+    def test_question_and_tryout_edits_invalidate_fragments(self):
+        self.client.get(self.url)
+        self.client.get(reverse('exam:tryout_list'))
+
+        self.question.text = 'Soal baru'
+        self.question.save()
+        self.tryout.subjects = 'Kimia'
+        self.tryout.save()
+
+        self.assertContains(self.client.get(self.url), 'Soal baru')
+        self.assertContains(self.client.get(reverse('exam:tryout_list')), 'Kimia')
+
+
+class ScoreReportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tryout = seed(participants=40, tryouts=1, questions=12, prefix='report')['tryouts'][0]
+
+    def test_report_matches_python_statistics(self):
+        attempts = ParticipantTryout.objects.filter(tryout=self.tryout).select_related('participant')
+        report = reports.score_report(self.tryout.id)
+
+        expected = {'all': []}
+        for pt in attempts:
+            expected['all'].append(pt.score)
+            expected.setdefault(pt.participant.school, []).append(pt.score)
+
+        for row in [report['overall']] + report['school']:
+            scores = sorted(expected['all' if row['group'] == 'Semua' else row['group']])
+            self.assertEqual(row['count'], len(scores))
+            self.assertAlmostEqual(row['mean'], statistics.mean(scores))
+            if len(scores) > 1:
+                self.assertAlmostEqual(row['stddev'], statistics.stdev(scores))
+            self.assertEqual(row['p50'], scores[math.ceil(len(scores) / 2) - 1])
+            self.assertEqual(sum(row['histogram']), len(scores))
+        self.assertEqual(sum(row['count'] for row in report['day']), 40)
+
+    def test_report_is_cached_until_scores_change(self):
+        first = reports.score_report(self.tryout.id)
+        # Hanya query sidik jari, laporan sendiri dari cache
+        with self.assertNumQueries(1):
+            reports.score_report(self.tryout.id)
+
+        question = self.tryout.questions.first()
+        question.score = 5.0
+        question.save()
+        regraded = reports.score_report(self.tryout.id)
+        self.assertGreater(regraded['max_score'], first['max_score'])
+
+    def test_score_change_in_another_worker_is_picked_up(self):
+        # update() tanpa invalidasi, seperti submit yang dilayani worker lain dengan cache per proses
+        reports.score_report(self.tryout.id)
+        attempts = ParticipantTryout.objects.filter(tryout=self.tryout).order_by('pk')
+        low, high = attempts.first(), attempts.last()
+        # Poin pindah antar peserta: jumlah skor tetap, laporan tetap harus berubah
+        ParticipantTryout.objects.filter(pk=low.pk).update(score=low.score + 1)
+        ParticipantTryout.objects.filter(pk=high.pk).update(score=high.score - 1)
+        self.assertEqual(reports.score_report(self.tryout.id), reports._build(self.tryout.id))
+
+    def test_report_query_count_does_not_grow(self):
+        with CaptureQueriesContext(connection) as small:
+            reports.score_report(self.tryout.id)
+        seed(participants=80, tryouts=0, prefix='report-more')
+        ParticipantTryout.objects.bulk_create([
+            ParticipantTryout(participant=profile, tryout=self.tryout, is_finished=True, score=1.0, max_score=12.0)
+            for profile in ParticipantProfile.objects.filter(participanttryout__isnull=True)
+        ])
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(reports.score_report(self.tryout.id)['overall']['count'], 120)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class QuestionMediaTests(TestCase):
+    # Magic bytes PNG dengan isi sembarang: lolos pengecekan tipe, gagal di worker
+    FIGURE = b'\x89PNG\r\n\x1a\nfigure-bytes'
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.tryout = Tryout.objects.create(
+            title='Media', description='-', subjects='-',
+            publish_time=timezone.now() - timedelta(minutes=5),
+            work_time_minutes=30, is_published=True,
+        )
+        self.question = Question.objects.create(
+            tryout=self.tryout, number=1, text='Perhatikan gambar', option_a='a', option_b='b',
+            option_c='c', option_d='d', correct_option='A',
+        )
+
+    def png(self, name='figure.png', size=(1500, 600)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (200, 30, 30)).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def test_same_content_is_stored_once(self):
+        first = media.store_upload(SimpleUploadedFile('a.png', self.FIGURE))
+        second = media.store_upload(SimpleUploadedFile('b.jpg', self.FIGURE))
+        self.assertEqual(first, second)
+        self.assertEqual(MediaAsset.objects.count(), 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'assets', first.sha256[:2]))), 1)
+
+    @unittest.skipIf(Image is None, 'Pillow tidak terpasang')
+    def test_worker_renders_variants_for_exam_page(self):
+        user = User.objects.create_user('media', password='x')
+        ParticipantProfile.objects.create(user=user, full_name='Media', school='SMA')
+        self.client.force_login(user)
+        self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+        url = reverse('exam:take_exam', args=[self.tryout.pk])
+
+        asset = media.attach(self.question, 'Q', self.png())
+        self.assertContains(self.client.get(url), f'src="/media/{asset.original}"')
+
+        self.assertEqual(media.process_pending(), 1)
+        asset.refresh_from_db()
+        self.assertEqual(asset.status, 'ready')
+        self.assertEqual(sorted(map(int, asset.variants)), [320, 640, 1024])
+
+        # Fragment naskah diperbarui setelah worker selesai
+        response = self.client.get(url)
+        self.assertContains(response, 'srcset=')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="1500" height="600"')
+
+    def test_type_comes_from_content(self):
+        jpeg = SimpleUploadedFile('foto.png', b'\xff\xd8\xff\xe0' + b'0' * 20)
+        self.assertTrue(media.store_upload(jpeg).original.endswith('.jpg'))
+        webp = SimpleUploadedFile('gambar', b'RIFF\x00\x00\x00\x00WEBPVP8 ')
+        self.assertTrue(media.store_upload(webp).original.endswith('.webp'))
+        with self.assertRaises(ValueError):
+            media.store_upload(SimpleUploadedFile('soal.png', b'%PDF-1.4 bukan gambar'))
+        self.assertEqual(MediaAsset.objects.count(), 2)
+
+    def test_form_rejects_non_image(self):
+        form = QuestionForm(
+            data={'number': 2, 'text': '?', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c',
+                  'option_d': 'd', 'correct_option': 'A', 'score': 1},
+            files={'image_q': SimpleUploadedFile('soal.png', b'%PDF-1.4 bukan gambar')},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('image_q', form.errors)
+
+    def test_invalid_upload_is_marked_failed_and_not_rendered(self):
+        user = User.objects.create_user('media', password='x')
+        ParticipantProfile.objects.create(user=user, full_name='Media', school='SMA')
+        self.client.force_login(user)
+        self.client.get(reverse('exam:start_tryout', args=[self.tryout.pk]))
+
+        asset = media.attach(self.question, 'Q', SimpleUploadedFile('broken.png', self.FIGURE))
+        media.process_pending()
+        self.assertEqual(MediaAsset.objects.get().status, 'failed')
+        response = self.client.get(reverse('exam:take_exam', args=[self.tryout.pk]))
+        self.assertContains(response, 'Perhatikan gambar')
+        self.assertNotContains(response, asset.original)
+
+    def test_assets_are_served_immutable(self):
+        asset = media.store_upload(SimpleUploadedFile('a.png', self.FIGURE))
+        response = self.client.get(f'/media/{asset.original}')
+        self.assertEqual(b''.join(response.streaming_content), self.FIGURE)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get('/media/assets/../../manage.py').status_code, 404)
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.source = os.path.join(self.tmp, 'live.sqlite3')
+        with sqlite3.connect(self.source) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE answer (id INTEGER PRIMARY KEY, value TEXT)')
+            conn.executemany('INSERT INTO answer (value) VALUES (?)', [('x' * 200,)] * 5000)
+        conn.close()
+        self.directory = os.path.join(self.tmp, 'snapshots')
+
+    def test_snapshot_under_write_load(self):
+        with snapshots.WriteProbe(self.source, writers=2, interval=0.001) as probe:
+            time.sleep(0.05)
+            report = snapshots.take_snapshot(self.source, self.directory, pages=4, sleep=0.001, max_restarts=3)
+        self.assertEqual(probe.summary()['errors'], 0)
+        self.assertGreater(probe.summary()['writes'], 0)
+        # Satu transaksi baca di mode WAL: salinan bertahap selesai tanpa restart
+        self.assertTrue(report['wal'])
+        self.assertGreater(report['steps'], 1)
+        self.assertEqual(report['restarts'], 0)
+        self.assertFalse(report['one_step'])
+
+        snapshots.verify_snapshot(report['path'])
+        with gzip.open(report['path']) as src, open(os.path.join(self.tmp, 'copy.sqlite3'), 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        with closing(sqlite3.connect(os.path.join(self.tmp, 'copy.sqlite3'))) as copy:
+            self.assertEqual(copy.execute('SELECT COUNT(*) FROM answer').fetchone()[0], 5000)
+
+    def test_rollback_journal_falls_back_after_max_restarts(self):
+        with closing(sqlite3.connect(self.source)) as conn:
+            conn.execute('PRAGMA journal_mode=DELETE')
+        with snapshots.WriteProbe(self.source, writers=2, interval=0.001) as probe:
+            time.sleep(0.05)
+            report = snapshots.take_snapshot(self.source, self.directory, pages=4, sleep=0.001, max_restarts=3)
+        self.assertFalse(report['wal'])
+        self.assertEqual(probe.summary()['errors'], 0)
+        # Selesai bertahap, atau satu langkah setelah tepat max_restarts + 1 restart, tidak pernah berputar terus
+        self.assertLessEqual(report['restarts'], 3 + int(report['one_step']))
+        snapshots.verify_snapshot(report['path'])
+
+    def test_rotation_keeps_newest(self):
+        paths = [snapshots.take_snapshot(self.source, self.directory, keep=2)['path'] for _ in range(3)]
+        self.assertEqual(snapshots.list_snapshots(self.directory), paths[1:])
+
+    def test_corrupt_snapshot_fails_verification(self):
+        path = os.path.join(self.tmp, 'db-broken.sqlite3.gz')
+        with gzip.open(path, 'wb') as fh:
+            fh.write(b'not a database' * 100)
+        with self.assertRaises(snapshots.SnapshotError):
+            snapshots.verify_snapshot(path)
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        tryout = Tryout.objects.create(
+            title='Search', description='-', subjects='-',
+            publish_time=timezone.now(), work_time_minutes=30,
+        )
+        self.q1 = Question.objects.create(tryout=tryout, number=1, text='Hitung percepatan gravitasi bumi',
+                                          option_a='9,8', option_b='10', option_c='11', option_d='12',
+                                          correct_option='A')
+        self.q2 = Question.objects.create(tryout=tryout, number=2, text='Rumus kimia air',
+                                          option_a='H2O', option_b='CO2', option_c='NaCl', option_d='O2',
+                                          correct_option='A')
+        user = User.objects.create_user('budi_santoso', email='budi@example.com', password='x')
+        self.p1 = ParticipantProfile.objects.create(user=user, full_name='Budi Santoso', school='SMA Negeri 3')
+        user = User.objects.create_user('siti', email='siti@example.com', password='x')
+        self.p2 = ParticipantProfile.objects.create(user=user, full_name='Siti Aminah', school='SMA Kristen')
+
+    def test_question_search(self):
+        self.assertEqual(list(search_questions(Question.objects.all(), 'gravi')), [self.q1])
+        self.assertEqual(list(search_questions(Question.objects.all(), 'nacl')), [self.q2])
+        self.assertEqual(search_questions(Question.objects.all(), '').count(), 2)
+
+    def test_participant_search_follows_updates(self):
+        profiles = ParticipantProfile.objects.all()
+        self.assertEqual(list(search_participants(profiles, 'negeri budi')), [self.p1])
+        self.assertEqual(list(search_participants(profiles, 'siti@example')), [self.p2])
+
+        self.p2.user.username = 'aminah_baru'
+        self.p2.user.save()
+        self.p2.school = 'SMA Negeri 9'
+        self.p2.save()
+        self.assertEqual(list(search_participants(profiles, 'aminah_baru')), [self.p2])
+        self.assertEqual(search_participants(profiles, 'negeri').count(), 2)
+
+        self.p1.delete()
+        self.assertEqual(list(search_participants(profiles, 'negeri')), [self.p2])
+
+    def test_like_fallback(self):
+        with mock.patch('exam.search._has_fts', return_value=False):
+            self.assertEqual(list(search_participants(ParticipantProfile.objects.all(), 'Santoso')), [self.p1])
+            self.assertEqual(list(search_questions(Question.objects.all(), 'H2O')), [self.q2])
+
+    def test_admin_changelist_uses_index(self):
+        admin_user = User.objects.create_superuser('root', 'root@example.com', 'x')
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:exam_participantprofile_changelist'), {'q': 'kristen'})
+        self.assertContains(response, 'Siti Aminah')
+        self.assertNotContains(response, 'Budi Santoso')
+
+
+class AdminScalingTests(ScalingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser('root', 'root@example.com', 'x'))
+
+    def run_scales(self, url, data=None):
+        results = []
+        for scale in SCALES:
+            self.grow_to(scale)
+            queries, steps = self.measure('get', url, data)
+            results.append((self.data_rows(), queries, steps))
+        return results
+
+    def test_answer_changelist(self):
+        results = self.run_scales(reverse('admin:exam_participantanswer_changelist'))
+        self.assertScales(results, max_queries=8)
+
+    def test_answer_changelist_by_attempt(self):
+        self.grow_to(1)
+        pt = ParticipantTryout.objects.filter(participantanswer__isnull=False).first()
+        results = self.run_scales(
+            reverse('admin:exam_participantanswer_changelist'), {'participant_tryout__id__exact': pt.pk},
+        )
+        self.assertScales(results, max_queries=8)
+        response = self.client.get(reverse('admin:exam_participantanswer_changelist'),
+                                   {'participant_tryout__id__exact': pt.pk})
+        self.assertEqual(len(response.context['cl'].result_list), pt.participantanswer_set.count())
+
+    def test_attempt_changelist_filtered(self):
+        self.grow_to(1)
+        tryout = Tryout.objects.first()
+        results = self.run_scales(
+            reverse('admin:exam_participanttryout_changelist'),
+            {'tryout__id__exact': tryout.pk, 'is_finished__exact': 1},
+        )
+        self.assertScales(results, max_queries=8)
+
+    def test_cursor_pagination_walks_all_rows(self):
+        self.grow_to(1)
+        url = reverse('admin:exam_participanttryout_changelist')
+        seen = []
+        params = {}
+        while True:
+            response = self.client.get(url, params)
+            cl = response.context['cl']
+            seen += [obj.pk for obj in cl.result_list]
+            if not cl.next_cursor:
+                break
+            params = {'cursor': cl.next_cursor}
+        self.assertEqual(seen, list(ParticipantTryout.objects.order_by('-pk').values_list('pk', flat=True)))
+
+    def test_attempt_search_uses_participant_index(self):
+        self.grow_to(1)
+        profile = ParticipantProfile.objects.first()
+        response = self.client.get(reverse('admin:exam_participanttryout_changelist'), {'q': profile.user.username})
+        self.assertTrue(response.context['cl'].result_list)
+        self.assertTrue(all(pt.participant_id == profile.pk for pt in response.context['cl'].result_list))
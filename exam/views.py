@@ -1,11 +1,17 @@
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from datetime import timedelta
+from django.http import FileResponse, Http404, JsonResponse
+from django.utils._os import safe_join
+from django.views.decorators.http import require_GET, require_POST
+from datetime import datetime, timedelta, timezone as dt_timezone
+import os
 
-from .models import Tryout, ParticipantTryout, ParticipantAnswer, Question
+from . import admission, answers, attempts, fragments, live
+from .ratelimit import rate_limited
+from .models import Tryout, ParticipantTryout, AnswerJournal
 
 @login_required
 def tryout_list(request):
@@ -17,18 +23,24 @@ def tryout_list(request):
     tryouts = Tryout.objects.filter(is_published=True).order_by('publish_time')
     
     # Get participant status for each tryout
+    attempts = {
+        pt.tryout_id: pt
+        for pt in ParticipantTryout.objects.filter(participant=profile)
+    }
+    now = timezone.now()
+    versions = fragments.versions([tryout.id for tryout in tryouts])
     tryout_status = {}
     for tryout in tryouts:
-        try:
-            pt = ParticipantTryout.objects.get(participant=profile, tryout=tryout)
+        tryout.fragment_version = versions.get(tryout.id, 1)
+        pt = attempts.get(tryout.id)
+        if pt is not None:
             tryout_status[tryout.id] = {
                 'started': pt.started_at is not None,
                 'finished': pt.is_finished,
                 'can_start': False
             }
-        except ParticipantTryout.DoesNotExist:
+        else:
             # Check if tryout is accessible (published and time has come)
-            now = timezone.now()
             can_start = tryout.is_published and now >= tryout.publish_time
             tryout_status[tryout.id] = {
                 'started': False,
@@ -40,7 +52,8 @@ def tryout_list(request):
         'profile': profile,
         'tryouts': tryouts,
         'tryout_status': tryout_status,
-        'now': timezone.now(),
+        'now': now,
+        'fragment_seconds': fragments.cache_seconds(),
     }
     return render(request, 'exam/tryout_list.html', context)
 
@@ -58,6 +71,16 @@ def start_tryout(request, pk):
     if not tryout.is_published or now < tryout.publish_time:
         return redirect('exam:tryout_list')
     
+    # Ruang tunggu: attempt baru dibuat (dan timer mulai) hanya setelah peserta diizinkan masuk
+    if attempts.load(request, pk) is None:
+        ticket = admission.admit(tryout.id, tryout.publish_time.timestamp(), profile.id, profile.day)
+        if not ticket.admitted:
+            return render(request, 'exam/waiting_room.html', {
+                'tryout': tryout,
+                'admission': ticket,
+                'poll_seconds': settings.ADMISSION_POLL_SECONDS,
+            })
+    
     # Get or create participant tryout
     pt, created = ParticipantTryout.objects.get_or_create(
         participant=profile,
@@ -72,96 +95,120 @@ def start_tryout(request, pk):
     if not pt.started_at:
         pt.started_at = now
         pt.save()
+        live.record_started(tryout.id)
     
     # Check if time is up
     end_time = pt.started_at + timedelta(minutes=tryout.work_time_minutes)
     if now > end_time:
-        pt.is_finished = True
-        pt.finished_at = now
-        pt.save()
+        _finish_expired(pt, now)
         return redirect('exam:tryout_list')
     
+    # Endpoint ujian berikutnya cukup memverifikasi konteks ini, tanpa query profil/try out/attempt
+    attempts.establish(request, pt)
     return redirect('exam:take_exam', pk=pk)
 
+def _finish_expired(pt, now):
+    pt.compact_answer_journal()
+    pt.is_finished = True
+    pt.finished_at = now
+    pt.save()
+    live.record_finished(pt)
+
+@login_required
+def admission_status(request, pk):
+    """AJAX polling endpoint of the waiting room, answered from the cache"""
+    status = live.request_status(request)
+    if status is None:
+        return JsonResponse({'success': False, 'error': 'Unauthorized'})
+    
+    opening = admission.opening(pk)
+    if opening is None or not opening['published']:
+        return JsonResponse({'success': False, 'error': 'Tryout not found'})
+    
+    ticket = admission.admit(pk, opening['publish_time'], status['id'], status['day'])
+    return JsonResponse({
+        'success': True,
+        'admitted': ticket.admitted,
+        'wait_seconds': ticket.wait_seconds,
+        'ahead': ticket.ahead,
+    })
+
 @login_required
 def take_exam(request, pk):
     """Main exam page"""
-    if not hasattr(request.user, 'participantprofile'):
+    if live.request_status(request) is None:
         return redirect('dashboard:index')
     
-    profile = request.user.participantprofile
-    tryout = get_object_or_404(Tryout, pk=pk)
-    
-    # Get participant tryout
-    try:
-        pt = ParticipantTryout.objects.get(participant=profile, tryout=tryout)
-    except ParticipantTryout.DoesNotExist:
+    attempt = attempts.load(request, pk)
+    if attempt is None:
         return redirect('exam:start_tryout', pk=pk)
     
     # Check if finished
-    if pt.is_finished:
+    if attempt.finished:
         return redirect('exam:tryout_list')
     
     # Check time limit
     now = timezone.now()
-    end_time = pt.started_at + timedelta(minutes=tryout.work_time_minutes)
-    
-    if now > end_time:
-        pt.is_finished = True
-        pt.finished_at = now
-        pt.save()
+    if attempt.expired(now):
+        pt = ParticipantTryout.objects.filter(pk=attempt.id).first()
+        if pt is None:
+            return redirect('exam:start_tryout', pk=pk)
+        _finish_expired(pt, now)
         return redirect('exam:tryout_list')
     
-    # Get all questions
-    questions = tryout.questions.all().order_by('number')
+    tryout = get_object_or_404(Tryout, pk=pk)
     
-    # Get existing answers
-    existing_answers = {}
-    for answer in ParticipantAnswer.objects.filter(participant_tryout=pt):
-        existing_answers[answer.question.id] = answer.selected_option
+    # Get all questions (lazy: tidak di-query bila naskah sudah ada di fragment cache)
+    questions = tryout.questions.prefetch_related('attachments__asset').order_by('number')
     
-    # Calculate remaining time in seconds
-    remaining_seconds = int((end_time - now).total_seconds())
+    # Get existing answers
+    existing_answers = answers.stored_options(attempt.id)
+    for entry in AnswerJournal.objects.latest_for(attempt.id):
+        existing_answers[entry.question_id] = entry.selected_option
     
     context = {
-        'profile': profile,
         'tryout': tryout,
         'questions': questions,
         'existing_answers': existing_answers,
-        'participant_tryout': pt,
-        'remaining_seconds': remaining_seconds,
-        'end_time': end_time,
+        'remaining_seconds': attempt.remaining_seconds(now),
+        'end_time': datetime.fromtimestamp(attempt.deadline, tz=dt_timezone.utc),
+        'paper_version': fragments.version(tryout.id),
+        'fragment_seconds': fragments.cache_seconds(),
     }
     return render(request, 'exam/take_exam.html', context)
 
 @require_POST
 @login_required
+@rate_limited('save_answer')
 def save_answer(request, pk):
     """AJAX endpoint to save answer"""
-    if not hasattr(request.user, 'participantprofile'):
-        return JsonResponse({'success': False, 'error': 'Unauthorized'})
-    
-    profile = request.user.participantprofile
-    tryout = get_object_or_404(Tryout, pk=pk)
-    
-    try:
-        pt = ParticipantTryout.objects.get(participant=profile, tryout=tryout)
-    except ParticipantTryout.DoesNotExist:
+    attempt = attempts.load(request, pk)
+    if attempt is None:
         return JsonResponse({'success': False, 'error': 'Tryout not found'})
     
-    if pt.is_finished:
+    if attempt.finished:
         return JsonResponse({'success': False, 'error': 'Tryout already finished'})
     
-    question_id = request.POST.get('question_id')
-    selected_option = request.POST.get('selected_option')
+    if attempt.expired(timezone.now()):
+        return JsonResponse({'success': False, 'error': 'Time is up'})
     
-    question = get_object_or_404(Question, id=question_id, tryout=tryout)
+    try:
+        question_id = int(request.POST.get('question_id'))
+    except (TypeError, ValueError):
+        raise Http404
+    if question_id not in attempts.question_ids(pk):
+        raise Http404
+    
+    # Kosong = jawaban dihapus; selain itu hanya A-D (SQLite tidak menegakkan choices)
+    selected_option = request.POST.get('selected_option') or None
+    if selected_option is not None and selected_option not in answers.OPTIONS:
+        return JsonResponse({'success': False, 'error': 'Invalid option'})
     
-    # Save or update answer
-    answer, created = ParticipantAnswer.objects.update_or_create(
-        participant_tryout=pt,
-        question=question,
-        defaults={'selected_option': selected_option}
+    # Append only, dipadatkan ke ParticipantAnswer saat submit / waktu habis
+    AnswerJournal.objects.create(
+        participant_tryout_id=attempt.id,
+        question_id=question_id,
+        selected_option=selected_option
     )
     
     return JsonResponse({'success': True})
@@ -169,36 +216,32 @@ def save_answer(request, pk):
 @require_POST
 @login_required
 def submit_exam(request, pk):
-    if not hasattr(request.user, 'participantprofile'):
-        return redirect('dashboard:index')
-
-    profile = request.user.participantprofile
-    tryout = get_object_or_404(Tryout, pk=pk)
-
-    try:
-        pt = ParticipantTryout.objects.get(participant=profile, tryout=tryout)
-    except ParticipantTryout.DoesNotExist:
+    attempt = attempts.load(request, pk)
+    if attempt is None:
+        if live.request_status(request) is None:
+            return redirect('dashboard:index')
         return redirect('exam:tryout_list')
 
-    # hitung skor
-    from .models import ParticipantAnswer, Question
-    answers = ParticipantAnswer.objects.filter(participant_tryout=pt).select_related('question')
-    total_score = 0.0
-    max_score = 0.0
+    # Metadata cache bisa lebih tua dari reset massal di proses lain
+    pt = ParticipantTryout.objects.filter(pk=attempt.id).first()
+    if pt is None:
+        return redirect('exam:start_tryout', pk=pk)
+    # Cek dari DB, bukan metadata cache: submit kedua tidak boleh memadatkan & menilai ulang
+    if pt.is_finished:
+        return redirect('exam:thank_you', pk=pk)
+    pt.compact_answer_journal()
 
-    for q in Question.objects.filter(tryout=tryout):
-        max_score += q.score
-    for ans in answers:
-        if ans.selected_option == ans.question.correct_option:
-            total_score += ans.question.score
+    # hitung skor (baris ParticipantAnswer atau vektor packed)
+    total_score, max_score = answers.score(pt)
 
     pt.is_finished = True
     pt.finished_at = timezone.now()
     pt.score = total_score
     pt.max_score = max_score
     pt.save()
+    live.record_finished(pt)
 
-    return redirect('exam:thank_you', pk=tryout.id)
+    return redirect('exam:thank_you', pk=pk)
 
 @login_required
 def thank_you(request, pk):
@@ -209,19 +252,52 @@ def thank_you(request, pk):
 
 @require_POST
 @login_required
+@rate_limited('track_out_of_app')
 def track_out_of_app(request, pk):
     """AJAX endpoint to track when user leaves app"""
-    if not hasattr(request.user, 'participantprofile'):
+    attempt = attempts.load(request, pk)
+    if attempt is None:
         return JsonResponse({'success': False})
     
-    profile = request.user.participantprofile
-    tryout = get_object_or_404(Tryout, pk=pk)
+    # state=in dikirim saat peserta kembali ke tab ujian
+    if request.POST.get('state') == 'in':
+        live.record_back(attempt)
+        return JsonResponse({'success': True})
+    
+    live.record_out(attempt)
     
+    return JsonResponse({'success': True})
+
+@login_required
+def heartbeat(request, pk):
+    """AJAX endpoint for timer resync and presence, served from the attempt context"""
+    attempt = attempts.load(request, pk)
+    if attempt is None:
+        return JsonResponse({'success': False, 'error': 'Tryout not found'})
+
+    now = timezone.now()
+    if not attempt.finished:
+        live.record_seen(attempt.id)
+
+    status = live.request_status(request)
+    return JsonResponse({
+        'success': True,
+        'server_time': now.isoformat(),
+        'remaining_seconds': attempt.remaining_seconds(now),
+        'finished': attempt.finished,
+        'blocked': bool(status and status['blocked']),
+    })
+
+@require_GET
+def media_asset(request, path):
+    """Serve content-hashed question images with far-future immutable caching"""
     try:
-        pt = ParticipantTryout.objects.get(participant=profile, tryout=tryout)
-        pt.out_of_app_count += 1
-        pt.save()
-        
-        return JsonResponse({'success': True, 'count': pt.out_of_app_count})
-    except ParticipantTryout.DoesNotExist:
-        return JsonResponse({'success': False})
+        full_path = safe_join(settings.MEDIA_ROOT, 'assets', path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    response = FileResponse(open(full_path, 'rb'))
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
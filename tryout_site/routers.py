@@ -0,0 +1,101 @@
+"""
+Read-replica routing for dashboard and report views.
+
+Views decorated with @replica_reads send their reads to the READ_REPLICA_ALIAS
+connection; everything else, and every write, stays on the primary. After a
+write the client gets a short-lived cookie that pins its reads to the primary
+so it always sees its own changes (the dashboard still writes on GET links,
+so writes are detected from the executed SQL rather than the HTTP method).
+"""
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+PIN_COOKIE = 'db_pin_primary'
+
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replica adalah salinan file primary, tidak pernah dimigrasi sendiri
+        return db == 'default'
+
+
+@contextmanager
+def use_database(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def use_primary():
+    """Force primary reads inside a replica_reads view, e.g. right after a write"""
+    return use_database('default')
+
+
+def _replica_alias(request):
+    alias = getattr(settings, 'READ_REPLICA_ALIAS', None)
+    if not alias or getattr(request, 'db_pinned', False) or request.GET.get('primary'):
+        return None
+    return alias
+
+
+def _stream_with(alias, content):
+    with use_database(alias):
+        yield from content
+
+
+def replica_reads(view_func):
+    """Serve a read-only view from the replica (no-op when no replica is configured)"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        alias = _replica_alias(request)
+        if alias is None:
+            return view_func(request, *args, **kwargs)
+
+        with use_database(alias):
+            response = view_func(request, *args, **kwargs)
+        # Isi StreamingHttpResponse baru dibaca setelah view selesai
+        if isinstance(response, StreamingHttpResponse):
+            response.streaming_content = _stream_with(alias, response.streaming_content)
+        return response
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """Pin a client's reads to the primary for REPLICA_PIN_SECONDS after it writes"""
+    WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.db_pinned = PIN_COOKIE in request.COOKIES
+        wrote = []
+
+        def detect_write(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith(self.WRITE_PREFIXES) and 'django_session' not in sql:
+                wrote.append(True)
+            return execute(sql, params, many, context)
+
+        with connections['default'].execute_wrapper(detect_write):
+            response = self.get_response(request)
+        if wrote:
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True)
+        return response
@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-your-secret-key-here-change-in-production'
@@ -30,6 +32,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'exam.middleware.BlockedUserMiddleware',
+    'dashboard.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'tryout_site.urls'
@@ -50,15 +53,127 @@ TEMPLATES = [
     },
 ]
 
+# Profil template (env TEMPLATE_PROFILE):
+#   debug      : template dibaca ulang dari disk setiap render (enak saat mengedit)
+#   production : cached loader, tiap template hanya di-parse sekali per proses
+TEMPLATE_PROFILE = os.environ.get('TEMPLATE_PROFILE', 'debug' if DEBUG else 'production')
+
+_template_loaders = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_PROFILE == 'production':
+    _template_loaders = [('django.template.loaders.cached.Loader', _template_loaders)]
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = _template_loaders
+
+# Masa simpan fragment template ({% cache %}); kuncinya ikut versi try out, jadi
+# perubahan soal / try out langsung memakai fragment baru
+FRAGMENT_CACHE_SECONDS = 60 * 60 * 6
+
 WSGI_APPLICATION = 'tryout_site.wsgi.application'
 
+# WAL: pembaca (snapshot_db, refresh_replica, dashboard) tidak pernah menahan penulis jawaban
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {'init_command': 'PRAGMA journal_mode=WAL;'},
     }
 }
 
+# Profil read replica: DB_REPLICA_PATH=/path/replica.sqlite3 mengarahkan view
+# dashboard/laporan (@replica_reads) ke salinan file yang di-refresh berkala
+# dengan `manage.py refresh_replica --interval 30`. Semua tulis tetap ke primary.
+READ_REPLICA_ALIAS = None
+REPLICA_PIN_SECONDS = 10
+
+if os.environ.get('DB_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DB_REPLICA_PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICA_ALIAS = 'replica'
+    DATABASE_ROUTERS = ['tryout_site.routers.ReplicaRouter']
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.contrib.sessions.middleware.SessionMiddleware'),
+                      'tryout_site.routers.ReplicaPinMiddleware')
+
+# Profil session untuk hari ujian: SESSION_PROFILE=cached_db atau signed_cookies
+# supaya baca/tulis django_session tidak berebut lock SQLite dengan jawaban.
+#   db             : default Django, setiap request membaca django_session
+#   cached_db      : dibaca dari cache, DB hanya saat cache miss / simpan. Wajib SHARED_CACHE:
+#                    dengan LocMem per proses, session yang sudah logout masih hidup di worker lain
+#   signed_cookies : tanpa I/O session sama sekali, masa berlaku dibuat pendek. Logout tidak
+#                    mencabut cookie lama; peserta yang diblokir tetap ditolak BlockedUserMiddleware
+SESSION_PROFILE = os.environ.get('SESSION_PROFILE', 'db')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tryout-site',
+    }
+}
+
+# Untuk lebih dari satu worker, cache harus dipakai bersama (penghitung live dll).
+# SHARED_CACHE menandai cache yang terlihat oleh semua worker: hanya dengan itu status
+# blokir/selesai peserta boleh dibaca dari cache (LocMem per proses tidak ikut invalidasi).
+SHARED_CACHE = os.environ.get('SHARED_CACHE') == '1'
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+    SHARED_CACHE = True
+
+# Penghitung live di dashboard dicocokkan ulang dengan database tiap N detik
+LIVE_COUNTERS_RECONCILE_SECONDS = 60
+
+# Heartbeat ujian: cache metadata attempt, jendela "online" dan jeda tulis last_seen_at ke DB
+LIVE_ATTEMPT_CACHE_SECONDS = 60 * 5
+LIVE_ONLINE_SECONDS = 90
+LIVE_PRESENCE_WRITE_SECONDS = 120
+
+# Rate limit per peserta untuk endpoint AJAX ujian (token bucket di dalam proses):
+# rate = token per detik, burst = jumlah request beruntun yang masih diterima
+RATE_LIMITS = {
+    'save_answer': {'rate': 5, 'burst': 20},
+    'track_out_of_app': {'rate': 0.5, 'burst': 6},
+}
+RATE_LIMIT_FLUSH_SECONDS = 10
+
+# Ruang tunggu saat try out dibuka: peserta per detik yang boleh mulai, per kohort
+# ParticipantProfile.day (hari yang tidak ada di sini langsung masuk), dan jeda polling.
+# Mati secara default, mis. {1: 20, 2: 20}; hanya berlaku dengan SHARED_CACHE karena antreannya di cache
+ADMISSION_RATES = {}
+ADMISSION_POLL_SECONDS = 3
+
+# Penyimpanan jawaban setelah attempt selesai: 'rows' = satu ParticipantAnswer per jawaban,
+# 'packed' = satu vektor byte per attempt di ParticipantTryout.packed_answers (exam/answers.py)
+ANSWER_STORAGE = os.environ.get('ANSWER_STORAGE', 'rows')
+
+# Aksi massal peserta (blokir / reset / hapus) dijalankan per N peserta, satu transaksi per chunk
+BULK_CHUNK_SIZE = 500
+
+# Laporan distribusi nilai di-cache per try out sampai nilai berubah (submit / regrade);
+# batas waktu ini hanya untuk perubahan lain seperti edit sekolah peserta
+REPORT_CACHE_SECONDS = 60 * 60
+
+# Profiler sampling (diaktifkan staff dari dashboard): jarak antar sampel stack,
+# seberapa sering saklar dibaca dari cache, dan jumlah profil yang disimpan
+PROFILING_INTERVAL_MS = 5
+PROFILING_CONFIG_POLL_SECONDS = 5
+PROFILING_KEEP = 200
+
+if SESSION_PROFILE == 'cached_db':
+    if not SHARED_CACHE:
+        raise ImproperlyConfigured('SESSION_PROFILE=cached_db butuh cache bersama (REDIS_URL atau SHARED_CACHE=1)')
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+elif SESSION_PROFILE == 'signed_cookies':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+    SESSION_COOKIE_AGE = 60 * 60 * 6
+    SESSION_COOKIE_HTTPONLY = True
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -78,12 +193,25 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Snapshot online database (manage.py snapshot_db), jumlah file yang disimpan
+SNAPSHOT_DIR = BASE_DIR / 'snapshots'
+SNAPSHOT_KEEP = 48
+
+# Gambar soal: lebar varian yang dibuat worker process_media, kualitas WebP, dan
+# masa cache browser (nama file memuat hash isi, jadi aman dianggap immutable)
+MEDIA_VARIANT_WIDTHS = [320, 640, 1024]
+MEDIA_VARIANT_QUALITY = 80
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/'
 LOGIN_REDIRECT_URL = '/exam/tryout-list/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Masa berlaku token login sekali pakai di kartu peserta (detik)
+LOGIN_TOKEN_MAX_AGE = 60 * 60 * 24 * 3
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
@@ -3,11 +3,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from exam.views import media_asset
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('accounts.urls')),
     path('exam/', include('exam.urls')),
     path('dashboard/', include('dashboard.urls')),
+    # Gambar soal (nama berisi hash isi); di production sebaiknya dilayani web server
+    # dengan header Cache-Control yang sama
+    path(settings.MEDIA_URL.lstrip('/') + 'assets/<path:path>', media_asset, name='media_asset'),
 ]
 
 if settings.DEBUG: